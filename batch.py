@@ -0,0 +1,65 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+from controllers.batch_io import read_profiles, write_recommendation, write_error
+from services.batch_recommendation import BatchRecommendationService, ENGINES, SEEDED_ENGINES
+from services.metrics import MetricsRegistry, profiling
+from services.result_cache import ResultCache
+
+
+def main() -> None:
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="여러 사용자 프로필(CSV/JSONL)의 식단을 한 번에 추천하여 JSONL로 저장합니다.")
+    parser.add_argument('profiles', help="프로필 파일 (.csv 또는 .jsonl)")
+    parser.add_argument('-o', '--output', help="결과 JSONL 파일 (기본: 표준 출력)")
+    parser.add_argument('-a', '--algorithm', choices=sorted(ENGINES), default='greedy')
+    parser.add_argument('-n', '--num-combinations', type=int, default=5)
+    parser.add_argument('--time-limit', type=float, help="문제(프로필 묶음)마다의 탐색 시간 제한(초)")
+    parser.add_argument('--seed', type=int, help="같은 seed면 같은 결과 (정수 계획법은 항상 같은 결과)")
+    parser.add_argument('--db', default=os.path.join(base_dir, 'db', '음식DB.xlsx'))
+    parser.add_argument('--cache-dir', help="결과 캐시를 저장할 폴더 (다음 실행에서 재사용)")
+    parser.add_argument('--energy-step', type=float, default=10.0, help="목표 에너지 양자화 구간(kcal)")
+    parser.add_argument('--nutrient-step', type=float, default=1.0, help="목표 영양소 양자화 구간(g)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="알고리즘의 진행 메시지를 표준 오류로 출력")
+    parser.add_argument('--metrics', help="실행 통계와 구간별 시간을 저장할 JSON 파일")
+    parser.add_argument('--profile', help="cProfile/tracemalloc 보고서를 저장할 폴더 (batch.prof, batch.txt)")
+    args = parser.parse_args()
+
+    metrics = MetricsRegistry()
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    stats = {}
+    start_time = time.time()
+    try:
+        # 알고리즘의 진행 메시지는 결과와 섞이지 않도록 표준 오류로 보냄
+        with contextlib.redirect_stdout(sys.stderr), \
+                (profiling(args.profile, 'batch') if args.profile else contextlib.nullcontext()):
+            cache = ResultCache(energy_step=args.energy_step, nutrient_step=args.nutrient_step,
+                                cache_dir=args.cache_dir, metrics=metrics)
+            engine_options = {'time_limit': args.time_limit} if args.time_limit is not None else {}
+            if args.seed is not None and args.algorithm in SEEDED_ENGINES:
+                engine_options['seed'] = args.seed
+            service = BatchRecommendationService(args.db, algorithm=args.algorithm, result_cache=cache,
+                                                 metrics=metrics, verbose=args.verbose, **engine_options)
+            profiles = read_profiles(args.profiles, on_error=lambda user_id, message: write_error(out, user_id, message))
+            for user_id, requirements, combinations in service.iter_recommendations(profiles, args.num_combinations,
+                                                                                    stats=stats):
+                with metrics.timer('batch.serialize'):
+                    write_recommendation(out, user_id, requirements, combinations)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            json.dump(metrics.snapshot(), f, ensure_ascii=False, indent=2)
+
+    print(f"일괄 추천 완료: 사용자 {stats.get('users', 0)}명, 서로 다른 문제 {stats.get('groups', 0)}개, "
+          f"캐시 적중 {stats.get('cache_hits', 0)}회, {time.time() - start_time:.2f}초", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import sys
+
+from services.batch_recommendation import ENGINES
+from services.benchmark import BenchmarkService
+
+
+def main() -> None:
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="가상 사용자와 늘린 음식DB로 추천 알고리즘들의 속도, 메모리, 품질을 측정해 JSON으로 저장합니다.")
+    parser.add_argument('-o', '--output', help="결과 JSON 파일 (기본: 표준 출력)")
+    parser.add_argument('-e', '--engines', nargs='+', choices=sorted(ENGINES), default=list(BenchmarkService.DEFAULT_ENGINES))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 2, 4], help="음식DB를 늘릴 배수들")
+    parser.add_argument('--profiles-per-combination', type=int, default=2,
+                        help="성별 x 목적 x 활동량 조합마다 만들 가상 사용자 수")
+    parser.add_argument('-n', '--num-combinations', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=10.0,
+                        help="사용자마다의 탐색 시간 제한(초, 0이면 제한 없음)")
+    parser.add_argument('--db', default=os.path.join(base_dir, 'db', '음식DB.xlsx'))
+    parser.add_argument('--work-dir', default=os.path.join(base_dir, 'db', 'benchmark'),
+                        help="늘린 음식DB를 저장해 두고 재사용할 폴더")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON 파일 (회귀가 있으면 종료 코드 1)")
+    parser.add_argument('--threshold', type=float, default=0.1, help="회귀로 볼 변화 비율")
+    parser.add_argument('--profile', help="(알고리즘, 카탈로그 크기)별 cProfile/tracemalloc 보고서를 저장할 폴더")
+    args = parser.parse_args()
+
+    service = BenchmarkService(args.db, args.work_dir, seed=args.seed, profile_dir=args.profile)
+    report = service.run(engines=args.engines, scales=args.scales,
+                         profiles_per_combination=args.profiles_per_combination,
+                         num_combinations=args.num_combinations, time_limit=args.time_limit or None)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        lines, regressions = BenchmarkService.compare(baseline, report, args.threshold)
+        for line in lines:
+            print(line, file=sys.stderr)
+        if regressions:
+            print(f"회귀 {len(regressions)}건 (기준 {args.threshold:.0%}):", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
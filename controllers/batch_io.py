@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+from typing import Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from models.user_info import UserInfo
+from models.menu_combination import MenuCombination
+from models.enums import FoodCategory, ActivityLevel
+
+PROFILE_FIELDS = ['id', 'height', 'weight', 'age', 'sex', 'purpose', 'activity', 'preference']
+
+_categories_by_code = {c.code: c for c in FoodCategory}
+_activity_by_code = {level.code: level for level in ActivityLevel}
+
+
+def read_profiles(path: str, on_error: Optional[Callable[[str, str], None]] = None) -> Iterator[Tuple[str, UserInfo]]:
+    """
+    CSV 또는 JSONL 파일에서 사용자 프로필을 한 줄씩 읽어 (id, UserInfo)로 돌려줍니다.
+
+    열: id, height(cm), weight(kg), age, sex(남 0 | 여 1), purpose(일반 0 | 다이어트 1 | 벌크업 2),
+        activity(활동량 번호 1~5), preference(선호 분류 코드, 1~3순위. CSV는 '1|5|8', JSONL은 [1, 5, 8])
+    잘못된 줄은 on_error(id, 오류 메시지)로 넘기고 건너뜁니다. (on_error가 없으면 ValueError)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if extension in ('.jsonl', '.ndjson'):
+            rows = (json.loads(line) for line in f if line.strip())
+        elif extension == '.csv':
+            rows = csv.DictReader(f)
+        else:
+            raise ValueError(f"지원하지 않는 프로필 파일 형식입니다: {path} (.csv 또는 .jsonl)")
+
+        for line_no, row in enumerate(rows, start=1):
+            user_id = str(row.get('id') or line_no)
+            try:
+                user = parse_profile(row)
+            except (KeyError, TypeError, ValueError) as e:
+                message = f"{line_no}번째 프로필 오류: {e}"
+                if on_error is None:
+                    raise ValueError(message) from e
+                on_error(user_id, message)
+                continue
+            yield user_id, user
+
+
+def parse_profile(row: Dict) -> UserInfo:
+    """dict 형태의 프로필 한 줄을 UserInfo로 만듭니다. (대화형 입력과 같은 범위 검사)"""
+    height = _ranged(float(row['height']), 0.0, 300.0, 'height')
+    weight = _ranged(float(row['weight']), 0.0, 1000.0, 'weight')
+    age = _ranged(int(row['age']), 0, 150, 'age')
+
+    sex = int(row['sex'])
+    if sex not in (0, 1):
+        raise ValueError(f"sex는 0 또는 1이어야 합니다: {sex}")
+    purpose = int(row['purpose'])
+    if purpose not in (0, 1, 2):
+        raise ValueError(f"purpose는 0, 1, 2 중 하나여야 합니다: {purpose}")
+
+    activity = _activity_by_code.get(int(row['activity']))
+    if activity is None:
+        raise ValueError(f"알 수 없는 활동량 번호입니다: {row['activity']}")
+
+    preference = []
+    for code in _preference_codes(row.get('preference')):
+        category = _categories_by_code.get(code)
+        if category is None:
+            raise ValueError(f"알 수 없는 음식 분류 코드입니다: {code}")
+        if category not in preference:
+            preference.append(category)
+
+    user = UserInfo(height=height, weight=weight, age=age, sex=sex, purpose=purpose,
+                    preference=preference, activity_factor=activity)
+    user.calculate_bmi()
+    return user
+
+
+def write_recommendation(out: IO[str], user_id: str, requirements: Dict[str, float],
+                         combinations: List[MenuCombination]) -> None:
+    """사용자 한 명의 추천 결과(요구량, 조합)를 JSONL 한 줄로 씁니다."""
+    record = {
+        'id': user_id,
+        'requirements': requirements,
+        'combinations': [combination.to_dict() for combination in combinations],
+    }
+    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def write_error(out: IO[str], user_id: str, message: str) -> None:
+    """읽지 못한 프로필은 오류 기록으로 남깁니다."""
+    out.write(json.dumps({'id': user_id, 'error': message}, ensure_ascii=False) + '\n')
+
+
+def _ranged(value, lo, hi, name: str):
+    if not lo < value < hi:
+        raise ValueError(f"{name} 값이 범위({lo} ~ {hi})를 벗어났습니다: {value}")
+    return value
+
+
+def _preference_codes(value) -> List[int]:
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        return [int(code) for code in value.replace(';', '|').replace(',', '|').split('|') if code.strip()]
+    if isinstance(value, int):
+        return [value]
+    return [int(code) for code in value]
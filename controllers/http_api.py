@@ -0,0 +1,132 @@
+import asyncio
+import json
+from typing import Dict, Optional, Tuple
+
+from controllers.batch_io import parse_profile
+from models.user_info import UserInfo
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+}
+
+MAX_HEADER_LINES = 100
+
+
+class HttpError(Exception):
+    """상태 코드와 함께 JSON 오류 응답으로 바꿀 예외입니다."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class HttpRequest:
+    """
+    Args:
+        method(str): 'GET', 'POST' 등
+        path(str): 쿼리 문자열을 뺀 경로
+        headers(dict[str, str]): 소문자 헤더 이름 -> 값
+        body(bytes): 요청 본문
+        keep_alive(bool): 응답 후 연결을 유지할지 여부 (HTTP/1.1 기본 유지)
+    """
+    __slots__ = ('method', 'path', 'headers', 'body', 'keep_alive')
+
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes, keep_alive: bool):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+
+
+async def read_request(reader: asyncio.StreamReader, max_body_bytes: int) -> Optional[HttpRequest]:
+    """
+    HTTP/1.x 요청 하나를 읽습니다. 연결이 닫혀 더 읽을 요청이 없으면 None을 반환합니다.
+    본문은 Content-Length 만큼만 읽습니다. (chunked 전송은 지원하지 않음)
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HttpError(400, "잘못된 요청 줄입니다.")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(400, "헤더가 너무 많습니다.")
+
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HttpError(400, "chunked 전송은 지원하지 않습니다. Content-Length를 지정해주세요.")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, "Content-Length가 올바르지 않습니다.")
+    if length > max_body_bytes:
+        raise HttpError(413, f"요청 본문은 {max_body_bytes}바이트 이하여야 합니다.")
+    body = await reader.readexactly(length) if length > 0 else b''
+
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    return HttpRequest(method.upper(), target.split('?', 1)[0], headers, body, keep_alive)
+
+
+async def write_json(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool) -> None:
+    """payload를 JSON 응답으로 보냅니다."""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n")
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+
+def parse_recommendation_request(body: bytes) -> Tuple[UserInfo, Dict]:
+    """
+    추천 요청 본문(JSON)을 읽어 (UserInfo, 요청 옵션)으로 나눕니다.
+    프로필 필드는 일괄 추천 파일과 같습니다. (height, weight, age, sex, purpose, activity, preference)
+    옵션: algorithm(str), num_combinations(int), time_budget(float, 초), seed(int) - 없는 값은 서버 기본값을 씁니다.
+    """
+    try:
+        data = json.loads(body.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        raise HttpError(400, "요청 본문이 올바른 JSON이 아닙니다.")
+    if not isinstance(data, dict):
+        raise HttpError(400, "요청 본문은 JSON 객체여야 합니다.")
+
+    try:
+        user = parse_profile(data)
+    except KeyError as e:
+        raise HttpError(400, f"프로필 필드가 없습니다: {e}")
+    except (TypeError, ValueError) as e:
+        raise HttpError(400, f"프로필 오류: {e}")
+
+    options = {}
+    try:
+        if data.get('algorithm') is not None:
+            options['algorithm'] = str(data['algorithm'])
+        if data.get('num_combinations') is not None:
+            options['num_combinations'] = int(data['num_combinations'])
+        if data.get('time_budget') is not None:
+            options['time_budget'] = float(data['time_budget'])
+        if data.get('seed') is not None:
+            options['seed'] = int(data['seed'])
+    except (TypeError, ValueError) as e:
+        raise HttpError(400, f"요청 옵션 오류: {e}")
+    return user, options
@@ -6,15 +6,15 @@ from services.nutrition_requirement_service import NutritionRequirementService
 from services.genetic import GeneticService
 from services.greedy import GreedyService
 from services.backtracking import BacktrackingService
+from services.ilp import IlpService
+from services.meet_in_middle import MeetInMiddleService
 
 
 def display_recommendations(combinations):
-    if not combinations:
-        print("\n추천된 식단이 없습니다.")
-        return
-
-    print(f"\n--- 총 {len(combinations)}개의 식단 조합을 찾았습니다. ---")
+    """조합을 받는 대로 출력합니다. (리스트 또는 iter_recommendations 생성기)"""
+    count = 0
     for i, (combo, totals) in enumerate(combinations):
+        count += 1
         print(f"\n--- 조합 {i+1} ---")
         total_calories = totals['energy']
         total_protein = totals['protein']
@@ -22,7 +22,7 @@ def display_recommendations(combinations):
         total_fat = totals['fat']
 
         for food in combo:
-            print(f"- {food['식품명']} (에너지: {food['에너지(kcal)']}kcal, 단백질: {food['단백질(g)']}g)")
+            print(f"- {food['식품명']} (에너지: {food['에너지(kcal)']:g}kcal, 단백질: {food['단백질(g)']:g}g)")
 
         print("\n[영양 정보 요약]")
         print(f"총 칼로리: {total_calories:.2f} kcal")
@@ -31,6 +31,11 @@ def display_recommendations(combinations):
         print(f"총 지방: {total_fat:.2f} g")
         print("-" * 20)
 
+    if not count:
+        print("\n추천된 식단이 없습니다.")
+    else:
+        print(f"\n--- 총 {count}개의 식단 조합을 찾았습니다. ---")
+
 
 def main() -> None:
     print("=========== 식단 추천 프로그램 (외식용) ===========")
@@ -47,14 +52,16 @@ def main() -> None:
     print("1. 그리디 알고리즘")
     print("2. 유전 알고리즘")
     print("3. 백트래킹 알고리즘")
+    print("4. 정수 계획법 (ILP, scipy 필요)")
+    print("5. 음식 쌍 색인 (최대 6개 메뉴)")
 
     while True:
         try:
-            choice = int(input("사용할 알고리즘을 선택하세요 (1, 2 또는 3): "))
-            if choice in [1, 2, 3]:
+            choice = int(input("사용할 알고리즘을 선택하세요 (1 ~ 5): "))
+            if choice in [1, 2, 3, 4, 5]:
                 break
             else:
-                print("1, 2 또는 3을 입력해주세요.")
+                print("1 ~ 5 사이의 숫자를 입력해주세요.")
         except ValueError:
             print("숫자를 입력해주세요.")
 
@@ -66,12 +73,13 @@ def main() -> None:
     db_path = os.path.join(base_dir, 'db', '음식DB.xlsx')
 
     try:
+        # 각 알고리즘은 찾는 대로 조합을 내보내므로 첫 조합부터 바로 출력됩니다.
         print("\n=============== 식단 구성 중... ===============")
 
         if choice == 1:
             # 그리디 알고리즘 사용
             greedy_service = GreedyService(db_path=db_path)
-            combinations = greedy_service.get_recommendations(
+            combinations = greedy_service.iter_recommendations(
                 user,
                 num_combinations=1000 # 조합 개수
             )
@@ -79,16 +87,32 @@ def main() -> None:
             # 유전 알고리즘 사용
             genetic_service = GeneticService(db_path=db_path)
             # population_size: 세대당 개체 수, generations: 진화 세대 수
-            combinations = genetic_service.get_recommendations(
+            combinations = genetic_service.iter_recommendations(
                 user,
                 num_combinations=1000,
                 population_size=200, # 100 -> 200
                 generations=100      # 50 -> 100
             )
-        else: # choice == 3
+        elif choice == 3:
             # 백트래킹 알고리즘 사용
             backtracking_service = BacktrackingService(db_path=db_path)
-            combinations = backtracking_service.get_recommendations(
+            combinations = backtracking_service.iter_recommendations(
+                user,
+                num_combinations=1000
+            )
+        elif choice == 4:
+            # 정수 계획법 사용 (조합마다 풀이 한 번이므로 적은 수의 최적 조합만 찾고, 제한 시간은 안전장치)
+            print("정수 계획법은 목적 함수 기준으로 최적임이 보장된 조합을 최대 20개까지 찾습니다. (최대 30초)")
+            ilp_service = IlpService(db_path=db_path)
+            combinations = ilp_service.iter_recommendations(
+                user,
+                num_combinations=20,
+                time_limit=30.0
+            )
+        else: # choice == 5
+            # 음식 쌍 색인 사용 (색인은 처음 한 번 만들어 db 폴더에 캐시)
+            pair_service = MeetInMiddleService(db_path=db_path)
+            combinations = pair_service.iter_recommendations(
                 user,
                 num_combinations=1000
             )
@@ -0,0 +1,54 @@
+from typing import Dict, Iterator, List, Sequence
+
+
+class MenuCombination:
+    """
+    추천된 식단 조합 하나입니다.
+
+    음식 카탈로그 인덱스(tuple)와 영양소 합계 4개만 보관하고, 식품명 등은 출력하거나
+    직렬화할 때 카탈로그에서 찾습니다. (카탈로그는 모든 조합이 같은 객체를 공유)
+    기존 결과 형식처럼 (음식 dict 리스트, 합계 dict)로 풀어 쓸 수 있습니다. (길이 2인 쌍처럼 동작)
+        foods, totals = combination
+    음식 개수는 size로 얻습니다.
+
+    Args:
+        indices(tuple[int]): 음식의 카탈로그 인덱스
+        energy(float): kcal, protein/fat/carbs(float): g
+    """
+    __slots__ = ('indices', 'energy', 'protein', 'fat', 'carbs', 'catalog')
+
+    def __init__(self, indices: Sequence[int], totals: Sequence[float], catalog):
+        self.indices = tuple(int(i) for i in indices)
+        self.energy, self.protein, self.fat, self.carbs = (float(v) for v in totals)
+        self.catalog = catalog
+
+    def __iter__(self) -> Iterator:
+        yield self.foods
+        yield self.totals
+
+    def __getitem__(self, item):
+        return (self.foods, self.totals)[item]
+
+    def __repr__(self) -> str:
+        return f"MenuCombination({self.names()}, energy={self.energy:g})"
+
+    @property
+    def size(self) -> int:
+        """메뉴의 음식 개수"""
+        return len(self.indices)
+
+    @property
+    def foods(self) -> List[Dict]:
+        """음식 dict 리스트 (식품명, 분류, 영양소)."""
+        return [self.catalog.food_record(i) for i in self.indices]
+
+    @property
+    def totals(self) -> Dict[str, float]:
+        return {'energy': self.energy, 'protein': self.protein, 'fat': self.fat, 'carbs': self.carbs}
+
+    def names(self) -> List[str]:
+        return [str(self.catalog.names[i]) for i in self.indices]
+
+    def to_dict(self) -> Dict:
+        """JSON 직렬화용 dict (식품명과 합계)."""
+        return {'foods': self.names(), 'totals': self.totals}
@@ -18,6 +18,9 @@ class UserInfo:
         fat_required(float): g
         
     """
+    __slots__ = ('height', 'weight', 'age', 'sex', 'bmi', 'purpose', 'preference', 'activity_factor',
+                 'calories_required', 'carbon_required', 'protein_required', 'fat_required')
+
     def __init__(self, height=0.0, weight=0.0, age=0, sex=None, purpose=None, preference=None, activity_factor=None):
         self.height = height
         self.weight = weight
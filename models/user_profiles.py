@@ -0,0 +1,108 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models.user_info import UserInfo
+from models.enums import Sex, DietPurpose, FoodCategory, ActivityLevel
+
+_activity_by_code = {level.code: level for level in ActivityLevel}
+_categories_by_code = {c.code: c for c in FoodCategory}
+
+
+class UserProfiles:
+    """
+    여러 사용자 프로필을 열 단위 배열로 보관합니다. (struct-of-arrays)
+    수십만 명을 UserInfo 객체로 들고 있지 않도록 일괄 처리에서 사용합니다.
+
+    Args:
+        ids(list[str]): 사용자 id
+        height, weight(float64): cm, kg (요구량 계산이 UserInfo와 같은 값이 되도록 float64)
+        age(int16), sex(int8, Sex 값), purpose(int8, DietPurpose 값), activity(int8, ActivityLevel.code)
+        preference(int16, N x 3): 1~3순위 FoodCategory.code (없으면 0)
+
+        calories_required, protein_required, fat_required, carbon_required(float64): 요구량 (계산 전에는 None)
+    """
+    __slots__ = ('ids', 'height', 'weight', 'age', 'sex', 'purpose', 'activity', 'preference',
+                 'calories_required', 'protein_required', 'fat_required', 'carbon_required')
+
+    REQUIREMENT_FIELDS = ('calories_required', 'protein_required', 'fat_required', 'carbon_required')
+
+    def __init__(self, ids: List[str], height: np.ndarray, weight: np.ndarray, age: np.ndarray, sex: np.ndarray,
+                 purpose: np.ndarray, activity: np.ndarray, preference: np.ndarray):
+        self.ids = ids
+        self.height = np.asarray(height, dtype=np.float64)
+        self.weight = np.asarray(weight, dtype=np.float64)
+        self.age = np.asarray(age, dtype=np.int16)
+        self.sex = np.asarray(sex, dtype=np.int8)
+        self.purpose = np.asarray(purpose, dtype=np.int8)
+        self.activity = np.asarray(activity, dtype=np.int8)
+        self.preference = np.asarray(preference, dtype=np.int16).reshape(len(ids), 3)
+
+        self.calories_required: Optional[np.ndarray] = None
+        self.protein_required: Optional[np.ndarray] = None
+        self.fat_required: Optional[np.ndarray] = None
+        self.carbon_required: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_users(cls, profiles: Iterable[Tuple[str, UserInfo]]) -> 'UserProfiles':
+        """(id, UserInfo)들을 열 단위로 모읍니다. (UserInfo는 읽는 대로 버려도 됨)"""
+        ids, rows = [], []
+        for user_id, user in profiles:
+            codes = [category.code for category in user.preference[:3]]
+            ids.append(user_id)
+            rows.append((user.height, user.weight, user.age, user.sex.value, user.purpose.value,
+                         user.activity_factor.code, *codes, *[0] * (3 - len(codes))))
+        columns = np.array(rows, dtype=np.float64).reshape(len(ids), 9).T
+        return cls(ids, columns[0], columns[1], columns[2], columns[3], columns[4], columns[5], columns[6:].T)
+
+    @property
+    def activity_factor(self) -> np.ndarray:
+        """활동 지수 배열 (ActivityLevel.factor)."""
+        factors = np.zeros(max(_activity_by_code) + 1)
+        for code, level in _activity_by_code.items():
+            factors[code] = level.factor
+        return factors[self.activity]
+
+    def requirement_inputs(self) -> Dict[str, np.ndarray]:
+        """NutritionRequirementService.calculate_requirements_columnar에 넘길 배열들."""
+        return {
+            'height': self.height,
+            'weight': self.weight,
+            'age': self.age,
+            'sex': self.sex,
+            'purpose': self.purpose,
+            'activity_factor': self.activity_factor,
+        }
+
+    def set_requirements(self, requirements: Dict[str, np.ndarray]) -> None:
+        for name in self.REQUIREMENT_FIELDS:
+            setattr(self, name, requirements[name])
+
+    def requirements(self, i: int) -> Dict[str, float]:
+        """i번째 사용자의 요구량 (kcal, g)."""
+        return {
+            'calories': float(self.calories_required[i]),
+            'protein': float(self.protein_required[i]),
+            'fat': float(self.fat_required[i]),
+            'carbs': float(self.carbon_required[i]),
+        }
+
+    def user(self, i: int) -> UserInfo:
+        """i번째 사용자를 UserInfo로 만듭니다. (요구량이 계산되어 있으면 함께 채움)"""
+        user = UserInfo(
+            height=float(self.height[i]),
+            weight=float(self.weight[i]),
+            age=int(self.age[i]),
+            sex=Sex(int(self.sex[i])),
+            purpose=DietPurpose(int(self.purpose[i])),
+            preference=[_categories_by_code[code] for code in self.preference[i].tolist() if code],
+            activity_factor=_activity_by_code[int(self.activity[i])],
+        )
+        user.calculate_bmi()
+        if self.calories_required is not None:
+            for name in self.REQUIREMENT_FIELDS:
+                setattr(user, name, float(getattr(self, name)[i]))
+        return user
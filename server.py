@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import os
+
+from services.batch_recommendation import ENGINES
+from services.recommendation_server import RecommendationServer
+
+
+def main() -> None:
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="JSON 프로필을 받아 식단을 추천하는 HTTP 서버를 실행합니다.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('-a', '--algorithm', choices=sorted(ENGINES), default='greedy', help="기본 알고리즘")
+    parser.add_argument('-n', '--num-combinations', type=int, default=5, help="기본 조합 개수")
+    parser.add_argument('-w', '--workers', type=int, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--threads', action='store_true',
+                        help="프로세스 대신 스레드 풀을 사용 (카탈로그/색인과 결과 캐시를 워커들이 한 벌만 공유)")
+    parser.add_argument('--time-budget', type=float, default=10.0, help="요청당 기본 시간 예산(초)")
+    parser.add_argument('--max-time-budget', type=float, default=60.0, help="요청에서 지정할 수 있는 최대 시간 예산(초)")
+    parser.add_argument('--max-pending', type=int, help="동시에 처리할 최대 요청 수 (기본: 워커 수 x 4, 넘으면 503)")
+    parser.add_argument('--db', default=os.path.join(base_dir, 'db', '음식DB.xlsx'))
+    parser.add_argument('--cache-dir', help="워커들이 공유할 결과 캐시 폴더")
+    parser.add_argument('--energy-step', type=float, default=10.0, help="목표 에너지 양자화 구간(kcal)")
+    parser.add_argument('--nutrient-step', type=float, default=1.0, help="목표 영양소 양자화 구간(g)")
+    parser.add_argument('--no-cache', action='store_true', help="결과 캐시를 쓰지 않음")
+    args = parser.parse_args()
+
+    cache_options = False if args.no_cache else dict(energy_step=args.energy_step, nutrient_step=args.nutrient_step,
+                                                     cache_dir=args.cache_dir)
+    server = RecommendationServer(args.db, algorithm=args.algorithm, workers=args.workers,
+                                  num_combinations=args.num_combinations, time_budget=args.time_budget,
+                                  max_time_budget=args.max_time_budget, max_pending=args.max_pending,
+                                  cache_options=cache_options, threads=args.threads)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n추천 서버를 종료합니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,65 @@
-import pandas as pd
+import multiprocessing
+import numpy as np
 import random
 import time
-import sys
-from typing import List, Dict, Optional, Tuple
-
-sys.setrecursionlimit(3000)
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Dict, Optional, Sequence, Tuple
 
 from models.user_info import UserInfo
+from models.menu_combination import MenuCombination
+from services.food_catalog import FoodCatalog, ENERGY, PROTEIN
+from services.metrics import MetricsRegistry, silent, timed
+from services.parallel import drain_queue, stream_search
+from services.result_cache import ResultCache
+from services.search_context import SearchContext
 
 
 class BacktrackingService:
-    def __init__(self, db_path: str):
-        self.df = self._load_nutrition_data(db_path)
-        if self.df is None:
-            raise FileNotFoundError(f"'{db_path}'에서 데이터를 불러오는 데 실패했습니다.")
-
-        self.df = self.df[self.df['에너지(kcal)'] > 0]
-        self.food_list = self.df.to_dict('records')
-        print(f"전체 {len(self.food_list)}개 식품 데이터를 사용합니다. (백트래킹용)")
-
-    def _load_nutrition_data(self, file_path: str) -> Optional[pd.DataFrame]:
-        """Excel 파일에서 영양 데이터를 불러옵니다. (GreedyService와 동일)"""
-        try:
-            df = pd.read_excel(file_path)
-            required_cols = ['식품명', '분류', '에너지(kcal)', '단백질(g)', '지방(g)', '탄수화물(g)']
-            df = df[required_cols]
-            for col in required_cols[2:]:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-            df['분류'] = df['분류'].fillna('기타')
-            df = df.fillna(0)
+    MAX_STEPS = 50000000  # 탐색 횟수 (병렬 탐색에서는 하위 트리들이 나누어 씀)
+    MAX_MENU_ITEMS = 6  # 메뉴 개수 제한
+    BOUND_BUCKETS = 64  # 상한 표의 에너지 구간 수
+    TASKS_PER_WORKER = 8  # 병렬 탐색에서 워커당 작업 묶음 수
 
-            return df
-        except FileNotFoundError:
-            print(f"오류: '{file_path}' 경로에서 파일을 찾을 수 없습니다.")
-            return None
-        except Exception as e:
-            print(f"데이터를 불러오는 중 오류가 발생했습니다: {e}")
-            return None
+    def __init__(self, db_path: str, result_cache: Optional[ResultCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, verbose: bool = True):
+        """
+        metrics: 실행 통계(탐색 횟수 포함)와 구간별 시간(load, init, search, dedup)을 기록할 곳
+        verbose: False이면 진행 메시지를 출력하지 않습니다. (일괄 처리, 서버 워커 등)
+        """
+        self.db_path = db_path
+        self.result_cache = result_cache
+        self.metrics = metrics
+        self.log = print if verbose else silent
+        with timed(metrics, 'backtracking.load'):
+            self.catalog = FoodCatalog.load(db_path)
+        with timed(metrics, 'backtracking.init'):
+            # 기본 탐색 순서 (에너지가 0보다 큰 음식의 카탈로그 인덱스, 요청마다 복사해 섞음)
+            self.food_order: Tuple[int, ...] = tuple(np.flatnonzero(self.catalog.nutrients[:, ENERGY] > 0).tolist())
+        self.log(f"전체 {len(self.food_order)}개 식품 데이터를 사용합니다. (백트래킹용)")
+
+    def get_recommendations(self, user: UserInfo, num_combinations: int = 5, workers: Optional[int] = None,
+                            split_depth: int = 1, time_limit: Optional[float] = None,
+                            seed: Optional[int] = None, stats: Optional[Dict] = None) -> List[MenuCombination]:
+        """
+        사용자 정보에 기반하여 백트래킹 알고리즘으로 음식 조합을 추천합니다. (iter_recommendations의 결과를 모두 모은 리스트)
+        """
+        return list(self.iter_recommendations(user, num_combinations, workers, split_depth, time_limit, seed, stats))
 
-    def get_recommendations(self, user: UserInfo, num_combinations: int = 5) -> List[Tuple[List[Dict], Dict]]:
+    def iter_recommendations(self, user: UserInfo, num_combinations: int = 5, workers: Optional[int] = None,
+                             split_depth: int = 1, time_limit: Optional[float] = None,
+                             seed: Optional[int] = None, stats: Optional[Dict] = None) -> Iterator[MenuCombination]:
         """
-        사용자 정보에 기반하여 백트래킹 알고리즘으로 음식 조합을 추천합니다.
+        백트래킹 알고리즘으로 찾은 조합을 찾는 대로 하나씩 내보냅니다.
+        탐색은 별도 스레드에서 진행되며, 생성기를 닫으면 탐색(병렬 탐색의 워커 포함)을 멈춥니다.
+
+        workers: 2 이상이면 탐색 트리를 앞쪽 음식 split_depth개로 정해지는 하위 트리들로 나누어
+            프로세스 풀에서 동시에 탐색합니다. (1 또는 None이면 현재 프로세스에서 순차 탐색)
+        split_depth: 하위 트리를 나누는 깊이 (1: 첫 음식, 2: 첫 두 음식)
+        time_limit: 탐색 시간 제한(초). 지나면 그때까지 찾은 조합까지만 내보내고 멈춥니다. (탐색 횟수 제한과 함께 적용)
+        seed: 탐색 순서를 섞는 난수의 seed. 같은 seed를 주면 같은 결과를 반환합니다.
+            (병렬 탐색은 하위 트리가 끝나는 순서에 따라 결과가 달라질 수 있음)
+        stats: 실행 통계(찾은 개수, 목표 개수를 채웠는지(satisfied), 시간 제한으로 멈췄는지(timed_out), 탐색 횟수)를 받을 dict.
+            서비스 하나를 여러 스레드에서 함께 쓸 때는 요청마다 따로 넘깁니다. 결과 캐시에서 찾은 경우에는 채우지 않습니다.
         """
         # 목표치 설정
         targets = {
@@ -51,100 +69,383 @@ class BacktrackingService:
             'carbs': user.carbon_required / 3 * 0.8
         }
 
-        preference = user.preference[0].label if user.preference else None
+        # 결과 캐시를 쓰면 구간의 보수적인 경계로 양자화한 목표치로 탐색 (비슷한 요구량의 사용자끼리 결과 공유)
+        if self.result_cache is not None:
+            targets = self.result_cache.quantize(targets)
 
-        # 데이터 셔플링 (다양성 확보를 위해 먼저 섞음)
-        random.shuffle(self.food_list)
+        preference = user.preference[0].code if user.preference else None
 
         if preference:
-            print(f"\n[Backtracking] 사용자 선호 음식(1순위): '{preference}'")
-            # 선호 음식을 앞으로 보냄 (Stable sort이므로 섞인 순서 유지됨)
-            self.food_list.sort(key=lambda x: x['분류'] == preference, reverse=True)
+            self.log(f"\n[Backtracking] 사용자 선호 음식(1순위): '{user.preference[0].label}'")
         else:
-            print("\n[Backtracking] 사용자 선호 음식이 설정되지 않았습니다.")
+            self.log("\n[Backtracking] 사용자 선호 음식이 설정되지 않았습니다.")
 
-        print("\n[한 끼 식사 목표 영양소 (최소 기준)]")
-        print(
+        self.log("\n[한 끼 식사 목표 영양소 (최소 기준)]")
+        self.log(
             f"에너지 <= {targets['energy']:.2f}kcal, 단백질 >= {targets['protein']:.2f}g, 지방 >= {targets['fat']:.2f}g, 탄수화물 >= {targets['carbs']:.2f}g")
 
-        return self._find_combinations_backtracking(targets, num_combinations)
+        context = SearchContext(time_limit, seed, stats)
 
-    def _find_combinations_backtracking(self, targets: Dict, num_combinations: int) -> List[Tuple[List[Dict], Dict]]:
-        """
-        백트래킹 알고리즘을 사용하여 조건에 맞는 조합을 찾습니다.
-        """
-        print(f"\n--- Backtracking 알고리즘 ({num_combinations}개 조합 탐색) ---")
-        start_time = time.time()
-
-        found_combinations = []
-        found_signatures = set()
+        def compute() -> Iterator[MenuCombination]:
+            food_order = self._order_foods(preference, random.Random(context.seed))
+            return self._iter_combinations_backtracking(food_order, targets, num_combinations, context, workers,
+                                                        split_depth)
 
-        self.steps = 0
-        MAX_STEPS = 50000000  # 탐색 횟수
-        MAX_MENU_ITEMS = 6   # 메뉴 개수 제한
+        if self.result_cache is None:
+            yield from compute()
+            return
+        # 시간 제한으로 멈춘 결과는 저장하지 않으므로 time_limit은 키에 넣지 않음
+        yield from self.result_cache.iter_or_compute('backtracking', self.catalog, targets, preference,
+                                                     dict(num_combinations=num_combinations, workers=workers, split_depth=split_depth, seed=seed), compute,
+                                                     complete=lambda: not context.stats['timed_out'])
 
-        # 탐색 공간 설정 (너무 많으면 느리므로 상위 N개만 사용)
-        search_space_size = 2000
-        search_space = self.food_list[:search_space_size] if len(self.food_list) > search_space_size else self.food_list
-        print(f"탐색 공간 크기: {len(search_space)}개 (최대 스텝: {MAX_STEPS})")
-
-        def backtrack(start_idx, current_menu, current_nutrition):
-            if len(found_combinations) >= num_combinations:
-                return
-            if self.steps > MAX_STEPS:
-                return
-
-            self.steps += 1
+    def _order_foods(self, preference: Optional[int], rng: random.Random) -> List[int]:
+        """
+        이번 탐색의 순서를 만듭니다. 음식 목록을 rng로 섞은 뒤 선호 음식을 앞으로 보낸 새 리스트를 반환합니다.
+        (서비스의 food_order는 요청 사이에 공유되므로 바꾸지 않음)
+        """
+        # 데이터 셔플링 (다양성 확보를 위해 먼저 섞음)
+        food_order = list(self.food_order)
+        rng.shuffle(food_order)
 
-            # 가지치기: 에너지가 목표를 초과하면 중단
-            if current_nutrition['energy'] > targets['energy']:
-                return
+        if preference:
+            # 분류 색인의 소속 마스크로 선호 음식을 앞으로 보냄 (각 묶음 안에서는 섞인 순서 유지)
+            shuffled = np.array(food_order, dtype=np.intp)
+            preferred = self.catalog.category_index.mask(preference)[shuffled]
+            food_order = np.concatenate([shuffled[preferred], shuffled[~preferred]]).tolist()
+        return food_order
+
+    def _iter_combinations_backtracking(self, food_order: List[int], targets: Dict, num_combinations: int,
+                                        context: SearchContext, workers: Optional[int] = None,
+                                        split_depth: int = 1) -> Iterator[MenuCombination]:
+        """
+        백트래킹 알고리즘을 사용하여 조건에 맞는 조합을 food_order 순서로 찾는 대로 내보냅니다.
+        요청의 시간 제한이 지나면 중단 신호와 같은 경로(should_stop)로 탐색을 멈춥니다.
+        """
+        self.log(f"\n--- Backtracking 알고리즘 ({num_combinations}개 조합 탐색) ---")
+        start_time = time.time()
+        deadline = context.deadline
 
-            # 가지치기: 메뉴 개수 초과 시 중단
-            if len(current_menu) > MAX_MENU_ITEMS:
-                return
+        # 탐색 공간: 상한 가지치기 덕분에 카탈로그 전체를 사용
+        search_space = food_order
+        self.log(f"탐색 공간 크기: {len(search_space)}개 (최대 스텝: {self.MAX_STEPS})")
 
-            # 조건 만족 확인
-            if (current_nutrition['protein'] >= targets['protein'] and
-                    current_nutrition['fat'] >= targets['fat'] and
-                    current_nutrition['carbs'] >= targets['carbs']):
+        found_signatures = set()
+        progress = {'steps': 0, 'dedup_seconds': 0.0}  # 탐색 스레드에서 기록
 
+        def search(emit: Callable[[MenuCombination], None], cancelled: Callable[[], bool]) -> None:
+            def collect(combination: List[int]) -> bool:
                 # 중복 조합 방지 (식품명 정렬하여 시그니처 생성)
-                signature = tuple(sorted([f['식품명'] for f in current_menu]))
-                if signature not in found_signatures:
-                    found_signatures.add(signature)
-                    found_combinations.append((list(current_menu), current_nutrition.copy()))
-                    return
-
-            # 다음 음식 탐색
-            for i in range(start_idx, len(search_space)):
-                if self.steps > MAX_STEPS: break
-                if len(found_combinations) >= num_combinations: break
-
-                food = search_space[i]
-
-                # 미래 예측 가지치기: 현재 칼로리에 이 음식을 더했을 때 이미 초과라면 스킵
-                if current_nutrition['energy'] + food['에너지(kcal)'] > targets['energy']:
+                dedup_start = time.perf_counter()
+                signature = self.catalog.signature(combination)
+                duplicate = signature in found_signatures
+                progress['dedup_seconds'] += time.perf_counter() - dedup_start
+                if duplicate or len(found_signatures) >= num_combinations:
+                    return False
+                found_signatures.add(signature)
+                emit(self.catalog.materialize(combination))
+                return True
+
+            def should_stop() -> bool:
+                return len(found_signatures) >= num_combinations or cancelled() or deadline.expired()
+
+            if workers and workers > 1:
+                progress['steps'] = self._search_partitioned(search_space, targets, num_combinations, workers,
+                                                             split_depth, collect, should_stop)
+            else:
+                progress['steps'] = self._search_subtrees(search_space, targets, [()], self.MAX_STEPS, collect,
+                                                          should_stop)
+
+        found_count = 0
+        combinations = stream_search(search)
+        try:
+            for combination in combinations:
+                found_count += 1
+                yield combination
+        finally:
+            # 탐색 스레드가 멈출 때까지 기다림 (소비자가 중간에 닫은 경우 포함)
+            combinations.close()
+            end_time = time.time()
+            timed_out = found_count < num_combinations and deadline.reached
+            context.finish(
+                found=found_count,
+                satisfied=found_count >= num_combinations,
+                timed_out=timed_out,
+                steps=progress['steps'],
+            )
+
+            if not found_count:
+                self.log("기준을 만족하는 조합을 찾지 못했습니다.")
+                self.log("팁: 목표 영양소가 너무 높거나, 칼로리 제한이 너무 낮을 수 있습니다.")
+            else:
+                self.log(f"총 {found_count}개의 조합을 발견했습니다.")
+            if timed_out:
+                self.log(f"시간 제한({context.time_limit}초)으로 탐색을 멈췄습니다.")
+
+            self.log(f"백트래킹 알고리즘 총 실행 시간: {end_time - start_time:.4f}초 (탐색 횟수: {progress['steps']})")
+            if self.metrics is not None:
+                self.metrics.record_run('backtracking', context.stats,
+                                        {'search': end_time - start_time, 'dedup': progress['dedup_seconds']})
+
+    def _search_partitioned(self, search_space: List[int], targets: Dict, num_combinations: int, workers: int,
+                            split_depth: int, collect: Callable[[List[int]], bool],
+                            should_stop: Callable[[], bool]) -> int:
+        """
+        탐색 트리를 앞쪽 음식들(prefix)로 정해지는 하위 트리로 나누어 프로세스 풀에서 탐색합니다.
+        하위 트리는 탐색 순서대로 연속된 묶음으로 제출하므로, 앞으로 정렬된 선호 음식의 하위 트리부터 탐색됩니다.
+        각 하위 트리는 MAX_STEPS를 하위 트리 수로 나눈 만큼의 탐색 횟수를 씁니다.
+        찾은 조합은 수집 함수로 흘려보내 중복을 제거하고, 목표 개수에 도달하면 공유 이벤트로 모든 워커를 멈춥니다.
+        반환값: 모든 워커의 탐색 횟수 합
+        """
+        energy = self.catalog.nutrients[search_space, ENERGY].tolist()
+        prefixes = self._split_prefixes(energy, targets['energy'], split_depth)
+        step_budget = max(1, self.MAX_STEPS // max(1, len(prefixes)))
+        chunk_size = -(-len(prefixes) // (workers * self.TASKS_PER_WORKER))
+        chunks = [prefixes[start:start + chunk_size] for start in range(0, len(prefixes), chunk_size)]
+        self.log(f"병렬 탐색: 하위 트리 {len(prefixes)}개, 작업 {len(chunks)}개, 프로세스 {workers}개 "
+              f"(하위 트리당 최대 스텝: {step_budget})")
+
+        steps = 0
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+            solution_queue = manager.Queue()
+            stop_event = manager.Event()
+            futures = [pool.submit(_subtree_worker, self.db_path, search_space, targets, chunk, step_budget,
+                                   num_combinations, solution_queue, stop_event)
+                       for chunk in chunks]
+            try:
+                while True:
+                    running = not all(future.done() for future in futures)
+                    for solutions in drain_queue(solution_queue, timeout=0.01 if running else 0):
+                        for combination in solutions:
+                            collect(combination)
+                    if should_stop():
+                        stop_event.set()
+                        for future in futures:
+                            future.cancel()
+                    if not running:
+                        break
+                steps = sum(future.result() for future in futures if not future.cancelled())
+            finally:
+                stop_event.set()
+                pool.shutdown(cancel_futures=True)
+
+        return steps
+
+    def _split_prefixes(self, energy: List[float], target_energy: float, split_depth: int) -> List[Tuple[int, ...]]:
+        """
+        하위 트리의 뿌리가 되는 앞쪽 음식 위치들을 탐색 순서대로 만듭니다.
+        더 늘릴 수 없는 prefix는 그대로 두어 (예: 첫 음식만으로 에너지가 찬 경우) 빠지는 노드가 없게 합니다.
+        """
+        prefixes: List[Tuple[int, ...]] = [()]
+        for _ in range(min(split_depth, self.MAX_MENU_ITEMS)):
+            extended = []
+            for prefix in prefixes:
+                prefix_energy = sum(energy[pos] for pos in prefix)
+                children = [prefix + (pos,) for pos in range(prefix[-1] + 1 if prefix else 0, len(energy))
+                            if prefix_energy + energy[pos] <= target_energy]
+                extended.extend(children if children or not prefix else [prefix])
+            prefixes = extended
+        return prefixes
+
+    def _search_subtrees(self, search_space: List[int], targets: Dict, prefixes: Sequence[Tuple[int, ...]],
+                         step_budget: int, collect: Callable[[List[int]], bool],
+                         should_stop: Callable[[], bool], check_interval: int = 4096) -> int:
+        """
+        prefix(탐색 공간 위치)로 시작하는 하위 트리들을 차례로 깊이 우선 탐색합니다. (빈 prefix는 전체 트리)
+        조건을 만족하는 조합은 collect로 넘기며, 처음 보는 조합(True)이면 그 아래로는 확장하지 않습니다.
+        should_stop은 새 조합을 찾았을 때와 check_interval 스텝마다 확인합니다.
+        반환값: 탐색 횟수 합 (하위 트리마다 step_budget까지)
+        """
+        MAX_MENU_ITEMS = self.MAX_MENU_ITEMS
+
+        # 탐색 공간 순서대로 정렬된 영양소 열 (에너지, 단백질, 지방, 탄수화물)
+        energy, protein, fat, carbs = (column.tolist() for column in self.catalog.nutrients[search_space].T)
+        target_energy = targets['energy']
+        target_protein = targets['protein']
+        target_fat = targets['fat']
+        target_carbs = targets['carbs']
+        space_size = len(search_space)
+
+        # 상한 가지치기용 접미사 표: 위치 i 이후의 음식을 최대 r개, 남은 에너지 안에서 골랐을 때
+        # 얻을 수 있는 단백질/지방/탄수화물/열량 환산 합계의 최댓값 (영양소별 0/1 배낭 상한)
+        # 열량 환산(단백질·탄수화물 4kcal/g, 지방 9kcal/g)은 세 영양소를 함께 보는 상한으로,
+        # 열량 제한이 빠듯해 세 기준을 동시에 채울 수 없는 가지를 잘라냄
+        bound_values = self.catalog.nutrients[search_space][:, PROTEIN:] @ np.array([
+            [1, 0, 0, 4],
+            [0, 1, 0, 9],
+            [0, 0, 1, 4],
+        ], dtype=np.float64)
+        bounds, bucket_width = self._build_suffix_bounds(
+            bound_values, self.catalog.nutrients[search_space, ENERGY], target_energy, MAX_MENU_ITEMS)
+        bounds = memoryview(bounds.reshape(-1))
+        buckets = self.BOUND_BUCKETS
+        slot_stride = MAX_MENU_ITEMS + 1
+        inv_bucket_width = 1.0 / bucket_width
+        # float32 표와 합산 순서 차이로 생기는 오차 때문에 정확히 목표에 닿는 가지를 잘못 자르지 않도록 여유를 둠
+        bound_protein = target_protein - 1e-3
+        bound_fat = target_fat - 1e-3
+        bound_carbs = target_carbs - 1e-3
+        bound_macro = 4 * max(target_protein, 0) + 9 * max(target_fat, 0) + 4 * max(target_carbs, 0) - 1e-2
+
+        # 명시적 스택: 깊이 d의 노드는 음식 d개를 고른 상태이며, 고정 크기 버퍼에 보관합니다.
+        #   menu[:d]: 고른 음식의 탐색 공간 위치, next_pos[d]: 다음에 시도할 위치, end_pos[d]: 시도할 위치의 끝
+        #   *_sum[d]: 고른 음식들의 영양소 합계
+        menu = [0] * MAX_MENU_ITEMS
+        next_pos = [0] * (MAX_MENU_ITEMS + 1)
+        end_pos = [space_size] * (MAX_MENU_ITEMS + 1)
+        energy_sum = [0.0] * (MAX_MENU_ITEMS + 1)
+        protein_sum = [0.0] * (MAX_MENU_ITEMS + 1)
+        fat_sum = [0.0] * (MAX_MENU_ITEMS + 1)
+        carbs_sum = [0.0] * (MAX_MENU_ITEMS + 1)
+
+        total_steps = 0
+        for prefix in prefixes:
+            # prefix 구간의 깊이에서는 정해진 음식 하나만 시도
+            prefix_len = len(prefix)
+            for d in range(MAX_MENU_ITEMS + 1):
+                end_pos[d] = prefix[d] + 1 if d < prefix_len else space_size
+            next_pos[0] = prefix[0] if prefix_len else 0
+
+            depth = 0
+            steps = 1
+            stopped = False
+            while depth >= 0:
+                if steps > step_budget:
+                    break
+
+                # 가지치기: 메뉴 개수 제한에 도달한 노드는 더 확장하지 않음
+                if depth == MAX_MENU_ITEMS:
+                    depth -= 1
                     continue
 
-                new_nutrition = current_nutrition.copy()
-                new_nutrition['energy'] += food['에너지(kcal)']
-                new_nutrition['protein'] += food['단백질(g)']
-                new_nutrition['fat'] += food['지방(g)']
-                new_nutrition['carbs'] += food['탄수화물(g)']
-
-                backtrack(i + 1, current_menu + [food], new_nutrition)
-
-        backtrack(0, [], {'energy': 0, 'protein': 0, 'fat': 0, 'carbs': 0})
-
-        end_time = time.time()
-
-        if not found_combinations:
-            print("기준을 만족하는 조합을 찾지 못했습니다.")
-            print("팁: 목표 영양소가 너무 높거나, 칼로리 제한이 너무 낮을 수 있습니다.")
-        else:
-            print(f"총 {len(found_combinations)}개의 조합을 발견했습니다.")
-
-        print(f"백트래킹 알고리즘 총 실행 시간: {end_time - start_time:.4f}초 (탐색 횟수: {self.steps})")
+                # 미래 예측 가지치기: 현재 칼로리에 더했을 때 목표를 초과하는 음식은 건너뜀
+                current_energy = energy_sum[depth]
+                i = next_pos[depth]
+                end = end_pos[depth]
+                while i < end and current_energy + energy[i] > target_energy:
+                    i += 1
+                if i >= end:
+                    # 더 시도할 음식이 없으면 한 단계 되돌아감 (pop)
+                    depth -= 1
+                    continue
 
-        return found_combinations
+                # 상한 가지치기: 위치 i 이후의 남은 칸/에너지로 최소 기준에 닿을 수 없으면 되돌아감
+                bucket = min(int((target_energy - current_energy) * inv_bucket_width + 1e-9), buckets - 1)
+                base = ((i * slot_stride + MAX_MENU_ITEMS - depth) * buckets + bucket) * 4
+                current_protein = protein_sum[depth]
+                current_fat = fat_sum[depth]
+                current_carbs = carbs_sum[depth]
+                if (current_protein + bounds[base] < bound_protein or
+                        current_fat + bounds[base + 1] < bound_fat or
+                        current_carbs + bounds[base + 2] < bound_carbs or
+                        4 * current_protein + 9 * current_fat + 4 * current_carbs + bounds[base + 3] < bound_macro):
+                    depth -= 1
+                    continue
+                next_pos[depth] = i + 1
+
+                # 자식 노드 방문 (push)
+                steps += 1
+                if not steps % check_interval and should_stop():
+                    stopped = True
+                    break
+                menu[depth] = i
+                child = depth + 1
+                child_protein = current_protein + protein[i]
+                child_fat = current_fat + fat[i]
+                child_carbs = current_carbs + carbs[i]
+
+                # 조건 만족 확인 (처음 보는 조합이면 더 확장하지 않음)
+                if child_protein >= target_protein and child_fat >= target_fat and child_carbs >= target_carbs:
+                    if collect([search_space[pos] for pos in menu[:child]]):
+                        if should_stop():
+                            stopped = True
+                            break
+                        continue
+
+                energy_sum[child] = current_energy + energy[i]
+                protein_sum[child] = child_protein
+                fat_sum[child] = child_fat
+                carbs_sum[child] = child_carbs
+                next_pos[child] = i + 1 if child >= prefix_len else prefix[child]
+                depth = child
+
+            total_steps += steps
+            if stopped:
+                break
+
+        return total_steps
+
+    def _build_suffix_bounds(self, values: np.ndarray, energy: np.ndarray, target_energy: float,
+                             max_items: int) -> Tuple[np.ndarray, float]:
+        """
+        탐색 순서의 각 위치에 대한 접미사 상한 표를 만듭니다.
+        table[i, r, b, k]: 위치 i 이후 음식 중 최대 r개를, 에너지 합이 b번째 구간 이하가 되도록 골랐을 때
+        values[:, k] 합의 최댓값. 에너지는 BOUND_BUCKETS개 구간으로 나누고 음식 에너지는 내림하므로
+        실제 최댓값보다 작아지지 않는 (가지치기에 안전한) 상한입니다.
+        반환값: (float32 표 (N+1, max_items+1, BOUND_BUCKETS, K), 구간 폭)
+        """
+        buckets = self.BOUND_BUCKETS
+        size, num_values = values.shape
+        bucket_width = max(target_energy, 1e-9) / (buckets - 1)
+        costs = np.floor(energy / bucket_width).astype(np.int64)
+
+        table = np.zeros((size + 1, max_items + 1, buckets, num_values), dtype=np.float32)
+        for i in range(size - 1, -1, -1):
+            table[i] = table[i + 1]
+            cost = costs[i]
+            if cost < buckets:
+                # 위치 i의 음식을 고르는 경우: 칸 하나와 에너지 cost 구간을 쓰고 값을 더함
+                np.maximum(table[i, 1:, cost:], table[i + 1, :-1, :buckets - cost] + values[i],
+                           out=table[i, 1:, cost:])
+
+        return table, bucket_width
+
+
+_worker_services: Dict[str, BacktrackingService] = {}
+
+
+def _subtree_worker(db_path: str, search_space: List[int], targets: Dict, prefixes: List[Tuple[int, ...]],
+                    step_budget: int, num_combinations: int, solution_queue, stop_event,
+                    flush_interval: float = 0.02) -> int:
+    """
+    프로세스 풀 워커: 프로세스마다 서비스를 한 번만 만들고 하위 트리 묶음을 탐색합니다.
+    찾은 조합은 flush_interval 간격으로 묶어 큐로 보내고, 그때마다 중단 신호를 확인합니다.
+    반환값: 탐색 횟수
+    """
+    if stop_event.is_set():
+        return 0
+    service = _worker_services.get(db_path)
+    if service is None:
+        service = _worker_services[db_path] = BacktrackingService(db_path, verbose=False)
+
+    signatures = set()
+    pending = []
+    state = {'last_flush': time.monotonic(), 'stop': False}
+
+    def collect(combination: List[int]) -> bool:
+        signature = service.catalog.signature(combination)
+        if signature in signatures:
+            return False
+        signatures.add(signature)
+        pending.append(combination)
+        return True
+
+    def flush() -> None:
+        if pending:
+            solution_queue.put(list(pending))
+            pending.clear()
+        state['stop'] = stop_event.is_set()
+        state['last_flush'] = time.monotonic()
+
+    def should_stop() -> bool:
+        # 한 작업에서 목표 개수를 넘게 찾을 필요는 없음
+        if len(signatures) >= num_combinations:
+            return True
+        if time.monotonic() - state['last_flush'] >= flush_interval:
+            flush()
+        return state['stop']
+
+    try:
+        return service._search_subtrees(search_space, targets, prefixes, step_budget, collect, should_stop)
+    finally:
+        flush()
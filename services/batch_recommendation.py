@@ -0,0 +1,88 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from models.user_info import UserInfo
+from models.user_profiles import UserProfiles
+from models.menu_combination import MenuCombination
+from services.nutrition_requirement_service import NutritionRequirementService
+from services.metrics import MetricsRegistry
+from services.result_cache import ResultCache
+from services.genetic import GeneticService
+from services.greedy import GreedyService
+from services.backtracking import BacktrackingService
+from services.ilp import IlpService
+from services.meet_in_middle import MeetInMiddleService
+
+ENGINES = {
+    'greedy': GreedyService,
+    'genetic': GeneticService,
+    'backtracking': BacktrackingService,
+    'ilp': IlpService,
+    'pairs': MeetInMiddleService,
+}
+# 난수를 쓰는 알고리즘 (seed 인자를 받으며, 같은 seed면 같은 결과). 정수 계획법은 결정적입니다.
+SEEDED_ENGINES = ('greedy', 'genetic', 'backtracking', 'pairs')
+
+
+class BatchRecommendationService:
+    """
+    여러 사용자의 식단을 한 번에 추천합니다.
+
+    요구량을 열 단위로 한 번에 계산한 뒤 요구량과 1순위 선호 분류가 같은 사용자끼리 묶어 문제마다 한 번만 탐색하고,
+    묶음이 끝날 때마다 결과를 흘려보냅니다. 요구량이 조금씩 다른 사용자들은 결과 캐시의
+    양자화된 목표치 구간에서 다시 합쳐집니다.
+    metrics와 verbose는 알고리즘 서비스에 그대로 넘깁니다. (기본 결과 캐시도 같은 metrics에 기록)
+    """
+
+    def __init__(self, db_path: str, algorithm: str = 'greedy', result_cache: Optional[ResultCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, verbose: bool = True, **engine_options):
+        if algorithm not in ENGINES:
+            raise ValueError(f"알 수 없는 알고리즘입니다: {algorithm} (가능: {', '.join(ENGINES)})")
+
+        self.result_cache = result_cache if result_cache is not None else ResultCache(metrics=metrics)
+        self.engine = ENGINES[algorithm](db_path, result_cache=self.result_cache, metrics=metrics, verbose=verbose)
+        self.engine_options = engine_options
+        self.requirement_service = NutritionRequirementService()
+
+    def iter_recommendations(self, profiles: Union[UserProfiles, Iterable[Tuple[str, UserInfo]]],
+                             num_combinations: int = 5, stats: Optional[Dict[str, int]] = None
+                             ) -> Iterator[Tuple[str, Dict[str, float], List[MenuCombination]]]:
+        """
+        프로필들의 추천 결과를 (id, 요구량, 조합 리스트)로 돌려줍니다.
+        (id, UserInfo)들을 주면 열 단위 UserProfiles로 모은 뒤 처리합니다.
+        같은 묶음의 사용자들은 같은 조합 리스트 객체를 공유합니다. 묶음은 처음 나온 순서대로 처리합니다.
+        stats: 실행 통계(사용자 수, 묶음 수, 결과 캐시 적중/미스 수)를 받을 dict (끝까지 소비하면 캐시 수까지 채움)
+        """
+        if not isinstance(profiles, UserProfiles):
+            profiles = UserProfiles.from_users(profiles)
+        groups = self.group_profiles(profiles)
+        stats = {} if stats is None else stats
+        stats.clear()
+        stats.update(users=len(profiles), groups=len(groups))
+
+        for members in groups:
+            combinations = self.engine.get_recommendations(profiles.user(members[0]), num_combinations=num_combinations,
+                                                           **self.engine_options)
+            for i in members.tolist():
+                yield profiles.ids[i], profiles.requirements(i), combinations
+
+        stats['cache_hits'] = self.result_cache.hits
+        stats['cache_misses'] = self.result_cache.misses
+
+    def group_profiles(self, profiles: UserProfiles) -> List[np.ndarray]:
+        """
+        요구량을 한 번에 계산하고 (요구량, 1순위 선호 분류)가 같은 사용자끼리 묶습니다.
+        반환값: 묶음별 사용자 위치 배열 (처음 나온 순서)
+        """
+        if not len(profiles):
+            return []
+        profiles.set_requirements(
+            self.requirement_service.calculate_requirements_columnar(**profiles.requirement_inputs()))
+
+        keys = np.column_stack([getattr(profiles, name) for name in UserProfiles.REQUIREMENT_FIELDS]
+                               + [profiles.preference[:, 0]])
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        members = np.split(np.argsort(inverse, kind='stable'), np.cumsum(np.bincount(inverse))[:-1])
+        return [members[group] for group in np.argsort(first)]
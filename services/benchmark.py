@@ -0,0 +1,295 @@
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.user_info import UserInfo
+from models.enums import Sex, DietPurpose, FoodCategory, ActivityLevel
+from services.batch_recommendation import ENGINES, SEEDED_ENGINES
+from services.food_catalog import FoodCatalog
+from services.metrics import MetricsRegistry, profiling
+from services.nutrition_requirement_service import NutritionRequirementService
+
+try:
+    import resource
+except ImportError:  # Windows에서는 최대 RSS를 재지 않음
+    resource = None
+
+
+class BenchmarkService:
+    """
+    추천 알고리즘들의 재현 가능한 성능 비교입니다.
+
+    - 프로필: Sex x DietPurpose x ActivityLevel의 모든 조합마다 profiles_per_combination명씩,
+      seed로 정해지는 신장/체중/나이/선호 분류를 가진 가상 사용자
+    - 카탈로그: 음식DB를 scale배로 늘린 카탈로그 (복사본은 식품명에 ' #k'를 붙이고 영양소를 ±10% 흔듦)
+    - 측정: 사용자별 지연 시간 백분위수, 초당 조합 수, 최대 메모리(RSS, tracemalloc),
+      품질(공통 기준 충족률, 에너지 활용률, 선호 분류 비율, 목표 개수 충족률),
+      알고리즘이 남긴 실행 통계와 구간별 시간(metrics)
+
+    (알고리즘, 카탈로그 크기)마다 새 프로세스(spawn)에서 실행하므로 메모리 측정과 캐시가 서로 섞이지 않습니다.
+    난수를 쓰는 알고리즘에는 seed를 넘기므로 같은 seed면 같은 조합이 나옵니다. (시간 제한에 걸린 경우 제외)
+    """
+    DEFAULT_ENGINES = ('greedy', 'genetic', 'backtracking')
+    JITTER = 0.1  # 늘린 카탈로그의 영양소 변동 폭 (±10%)
+
+    def __init__(self, db_path: str, work_dir: str, seed: int = 0, profile_dir: Optional[str] = None):
+        """profile_dir: 주면 (알고리즘, 카탈로그 크기)마다 측정 구간의 cProfile/tracemalloc 보고서를 저장합니다."""
+        self.db_path = db_path
+        self.work_dir = work_dir
+        self.seed = seed
+        self.profile_dir = profile_dir
+
+    def synthetic_profiles(self, profiles_per_combination: int = 2) -> List[Tuple[str, UserInfo]]:
+        """모든 성별/목적/활동량 조합의 가상 사용자를 만듭니다. (같은 seed면 같은 프로필)"""
+        rng = random.Random(self.seed)
+        categories = list(FoodCategory)
+        profiles = []
+        for sex in Sex:
+            for purpose in DietPurpose:
+                for activity in ActivityLevel:
+                    for k in range(profiles_per_combination):
+                        if sex == Sex.MALE:
+                            height, weight = rng.uniform(160, 190), rng.uniform(55, 100)
+                        else:
+                            height, weight = rng.uniform(148, 178), rng.uniform(42, 85)
+                        user = UserInfo(height=round(height, 1), weight=round(weight, 1), age=rng.randint(18, 75),
+                                        sex=sex, purpose=purpose, preference=rng.sample(categories, rng.randint(0, 3)),
+                                        activity_factor=activity)
+                        user.calculate_bmi()
+                        user_id = f"{sex.name}-{purpose.name}-{activity.name}-{k}".lower()
+                        profiles.append((user_id, user))
+        return profiles
+
+    def scaled_catalog(self, scale: int) -> str:
+        """
+        음식DB를 scale배로 늘린 xlsx 경로를 반환합니다. (scale 1은 원본)
+        work_dir에 한 번 만들어 두고 같은 (scale, seed)면 재사용하므로, 카탈로그 캐시(.cache.npz)도 함께 재사용됩니다.
+        """
+        if scale <= 1:
+            return self.db_path
+        stem = os.path.splitext(os.path.basename(self.db_path))[0]
+        path = os.path.join(self.work_dir, f"{stem}.x{scale}.seed{self.seed}.xlsx")
+        if os.path.exists(path):
+            return path
+
+        catalog = FoodCatalog.load(self.db_path)
+        size = len(catalog)
+        rng = np.random.default_rng(self.seed)
+        jitter = np.ones((size * scale, 4))
+        jitter[size:] = rng.uniform(1 - self.JITTER, 1 + self.JITTER, size=(size * (scale - 1), 4))
+        nutrients = np.round(np.tile(catalog.nutrients, (scale, 1)) * jitter, 2)
+        names = np.concatenate([catalog.names] + [np.char.add(catalog.names.astype(str), f" #{k}")
+                                                  for k in range(1, scale)])
+
+        columns = FoodCatalog.REQUIRED_COLS
+        df = pd.DataFrame({
+            columns[0]: names,
+            columns[1]: np.tile(catalog.categories, scale),
+            columns[2]: np.tile(catalog.category_codes, scale),
+            **{name: nutrients[:, i] for i, name in enumerate(FoodCatalog.NUTRIENT_COLS)},
+        })
+        os.makedirs(self.work_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.xlsx"
+        df.to_excel(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def run(self, engines: Sequence[str] = DEFAULT_ENGINES, scales: Sequence[int] = (1, 2, 4),
+            profiles_per_combination: int = 2, num_combinations: int = 5,
+            time_limit: Optional[float] = None) -> Dict:
+        """모든 (카탈로그 크기, 알고리즘) 조합을 측정해 JSON으로 저장할 수 있는 보고서를 반환합니다."""
+        for engine in engines:
+            if engine not in ENGINES:
+                raise ValueError(f"알 수 없는 알고리즘입니다: {engine} (가능: {', '.join(ENGINES)})")
+        profiles = self.synthetic_profiles(profiles_per_combination)
+
+        results = []
+        context = multiprocessing.get_context('spawn')
+        for scale in scales:
+            db_path = self.scaled_catalog(scale)
+            for engine in engines:
+                print(f"[benchmark] {engine} x{scale} ({len(profiles)}명) 측정 중...", file=sys.stderr)
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(_run_case, engine, db_path, profiles, num_combinations,
+                                         time_limit, self.seed, self.profile_dir, f"{engine}.x{scale}").result()
+                result['scale'] = scale
+                results.append(result)
+                latency = result['latency_ms']
+                print(f"[benchmark] {engine} x{scale}: p50 {latency['p50']:.1f}ms, p99 {latency['p99']:.1f}ms, "
+                      f"{result['combinations_per_second']:.1f} 조합/초, "
+                      f"기준 충족률 {result['quality']['feasibility_rate']:.2f}", file=sys.stderr)
+
+        return {
+            'meta': {
+                'revision': _git_revision(os.path.dirname(os.path.abspath(__file__))),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'seed': self.seed,
+                'profiles': len(profiles),
+                'num_combinations': num_combinations,
+                'time_limit': time_limit,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            },
+            'results': results,
+        }
+
+    @staticmethod
+    def compare(baseline: Dict, current: Dict, threshold: float = 0.1) -> Tuple[List[str], List[str]]:
+        """
+        두 보고서의 같은 (알고리즘, 카탈로그 크기) 결과를 비교합니다.
+        지연 시간(p50/p99)이 threshold 비율 이상 늘거나, 초당 조합 수/기준 충족률이 threshold 비율 이상 줄면 회귀로 봅니다.
+        반환값: (비교 줄, 회귀 줄)
+        """
+        baseline_results = {(r['engine'], r['scale']): r for r in baseline.get('results', [])}
+        lines, regressions = [], []
+        for result in current.get('results', []):
+            before = baseline_results.get((result['engine'], result['scale']))
+            if before is None:
+                continue
+            checks = [
+                ('p50(ms)', before['latency_ms']['p50'], result['latency_ms']['p50'], True),
+                ('p99(ms)', before['latency_ms']['p99'], result['latency_ms']['p99'], True),
+                ('조합/초', before['combinations_per_second'], result['combinations_per_second'], False),
+                ('기준 충족률', before['quality']['feasibility_rate'], result['quality']['feasibility_rate'], False),
+            ]
+            for name, old, new, lower_is_better in checks:
+                change = (new - old) / old if old else 0.0
+                line = f"{result['engine']} x{result['scale']} {name}: {old:.3f} -> {new:.3f} ({change:+.1%})"
+                lines.append(line)
+                if (change > threshold) if lower_is_better else (change < -threshold):
+                    regressions.append(line)
+        return lines, regressions
+
+
+def meal_targets(user: UserInfo) -> Dict:
+    """
+    품질 평가용 공통 한 끼 기준 (백트래킹/정수 계획법의 기준과 같음).
+    알고리즘마다 탐색 목표가 조금씩 다르므로 같은 기준으로 비교하기 위해 씁니다.
+    """
+    return {
+        'energy': user.calories_required / 3 + 200,
+        'protein': user.protein_required / 3 * 0.8,
+        'fat': user.fat_required / 3 * 0.8,
+        'carbs': user.carbon_required / 3 * 0.8,
+    }
+
+
+def _run_case(engine: str, db_path: str, profiles: List[Tuple[str, UserInfo]], num_combinations: int,
+              time_limit: Optional[float], seed: int, profile_dir: Optional[str] = None,
+              label: str = 'profile') -> Dict:
+    """
+    벤치마크 프로세스: 알고리즘 하나를 카탈로그 하나에서 모든 프로필에 대해 측정합니다.
+    profile_dir를 주면 지연 시간을 재는 구간을 프로파일링합니다. (지연 시간도 그만큼 늘어남)
+    """
+    options = {}
+    if engine in SEEDED_ENGINES:
+        options['seed'] = seed
+    if time_limit is not None:
+        options['time_limit'] = time_limit
+
+    metrics = MetricsRegistry()
+    setup_start = time.perf_counter()
+    service = ENGINES[engine](db_path, metrics=metrics, verbose=False)
+    setup_seconds = time.perf_counter() - setup_start
+    catalog = service.catalog
+
+    requirement_service = NutritionRequirementService()
+    for _, user in profiles:
+        requirement_service.calculate_requirements(user)
+
+    # 첫 프로필을 tracemalloc으로 한 번 실행 (준비 운동 겸, 추적 비용 때문에 지연 시간에서는 제외)
+    tracemalloc.start()
+    service.get_recommendations(profiles[0][1], num_combinations, **options)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    metrics.reset()  # 준비 운동은 실행 통계에서 제외 (읽기 시간은 setup_seconds)
+
+    latencies = []
+    combinations_found = 0
+    satisfied = 0
+    timed_out = 0
+    feasible = 0
+    utilization = []
+    preference_share = []
+    measured = []
+    with profiling(profile_dir, label) if profile_dir else nullcontext():
+        for _, user in profiles:
+            stats = {}
+            start = time.perf_counter()
+            combinations = service.get_recommendations(user, num_combinations, stats=stats, **options)
+            latencies.append(time.perf_counter() - start)
+            timed_out += bool(stats.get('timed_out'))
+            measured.append(combinations)
+
+    for (_, user), combinations in zip(profiles, measured):
+        combinations_found += len(combinations)
+        satisfied += len(combinations) >= num_combinations
+        targets = meal_targets(user)
+        preference = user.preference[0].code if user.preference else None
+        for combination in combinations:
+            feasible += (combination.energy <= targets['energy'] + 1e-6 and
+                         combination.protein >= targets['protein'] - 1e-6 and
+                         combination.fat >= targets['fat'] - 1e-6 and
+                         combination.carbs >= targets['carbs'] - 1e-6)
+            utilization.append(combination.energy / targets['energy'])
+            if preference is not None:
+                codes = catalog.category_codes[list(combination.indices)]
+                preference_share.append(float(np.mean(codes == preference)))
+
+    latencies_ms = np.array(latencies) * 1000
+    total_seconds = float(np.sum(latencies))
+    return {
+        'engine': engine,
+        'catalog_size': len(catalog),
+        'profiles': len(profiles),
+        'setup_seconds': round(setup_seconds, 4),
+        'latency_ms': {
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p90': float(np.percentile(latencies_ms, 90)),
+            'p99': float(np.percentile(latencies_ms, 99)),
+            'mean': float(latencies_ms.mean()),
+            'max': float(latencies_ms.max()),
+        },
+        'total_seconds': total_seconds,
+        'combinations': combinations_found,
+        'combinations_per_second': combinations_found / total_seconds if total_seconds > 0 else 0.0,
+        'peak_rss_mb': _peak_rss_mb(),
+        'tracemalloc_peak_mb': traced_peak / 2 ** 20,
+        'quality': {
+            'satisfied_rate': satisfied / len(profiles),
+            'timed_out_rate': timed_out / len(profiles),
+            'feasibility_rate': feasible / combinations_found if combinations_found else 0.0,
+            'energy_utilization': float(np.mean(utilization)) if utilization else 0.0,
+            'preference_share': float(np.mean(preference_share)) if preference_share else None,
+        },
+        'metrics': metrics.snapshot(),
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 리눅스는 KB, macOS는 바이트 단위
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def _git_revision(path: str) -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=path, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
@@ -0,0 +1,82 @@
+from typing import Optional
+
+import numpy as np
+
+
+class CategoryIndex:
+    """
+    음식을 FoodCategory 코드(식품대분류코드)별로 묶고, 묶음 안에서 에너지 오름차순으로 정렬해 둔 색인입니다.
+    "분류 X에서 에너지가 남은 예산 이하인 음식" 같은 조회를 매번 전체 음식을 훑지 않고 이진 탐색으로 처리합니다.
+
+    카탈로그를 만들 때 한 번 만들어 (FoodCatalog.category_index) 모든 알고리즘이 함께 쓰며, 배열은 모두 읽기 전용입니다.
+        codes(int16, G): 카탈로그에 있는 분류 코드 (오름차순)
+        offsets(int64, G+1): codes[g] 분류의 음식은 foods[offsets[g]:offsets[g + 1]]
+        foods(int32, N): (분류 코드, 에너지) 순으로 정렬한 카탈로그 인덱스 (같으면 카탈로그 순서)
+        energy(float64, N): foods 순서의 에너지
+        by_energy(int32, N): 분류와 무관하게 에너지 오름차순으로 정렬한 카탈로그 인덱스
+        sorted_energy(float64, N): by_energy 순서의 에너지
+        rank(int32, N): 카탈로그 인덱스 -> by_energy에서의 위치
+        masks(bool, G x N): 분류별 소속 여부 (카탈로그 인덱스 순서)
+    """
+
+    def __init__(self, category_codes: np.ndarray, energy: np.ndarray):
+        category_codes = np.asarray(category_codes, dtype=np.int16)
+        energy = np.asarray(energy, dtype=np.float64)
+
+        self.foods = np.lexsort((energy, category_codes)).astype(np.int32)
+        self.energy = energy[self.foods]
+        grouped_codes = category_codes[self.foods]
+        self.codes, starts = np.unique(grouped_codes, return_index=True)
+        self.offsets = np.append(starts, len(self.foods)).astype(np.int64)
+
+        self.by_energy = np.argsort(energy, kind='stable').astype(np.int32)
+        self.sorted_energy = energy[self.by_energy]
+        self.rank = np.empty(len(energy), dtype=np.int32)
+        self.rank[self.by_energy] = np.arange(len(energy), dtype=np.int32)
+
+        self.masks = self.codes[:, None] == category_codes[None, :]
+        self._empty_mask = np.zeros(len(energy), dtype=bool)
+
+        for array in (self.foods, self.energy, self.codes, self.offsets, self.by_energy, self.sorted_energy,
+                      self.rank, self.masks, self._empty_mask):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.foods)
+
+    def _group(self, code: int) -> Optional[int]:
+        g = int(np.searchsorted(self.codes, code))
+        return g if g < len(self.codes) and self.codes[g] == code else None
+
+    def members(self, code: int) -> np.ndarray:
+        """분류의 음식 (카탈로그 인덱스, 에너지 오름차순). 카탈로그에 없는 분류면 빈 배열입니다."""
+        g = self._group(code)
+        if g is None:
+            return self.foods[:0]
+        return self.foods[self.offsets[g]:self.offsets[g + 1]]
+
+    def within(self, code: Optional[int], max_energy: float, min_energy: float = -np.inf) -> np.ndarray:
+        """
+        분류의 음식 중 에너지가 [min_energy, max_energy] 구간인 음식 (카탈로그 인덱스, 에너지 오름차순).
+        code가 None이면 모든 분류에서 찾습니다.
+        """
+        if code is None:
+            foods, energy = self.by_energy, self.sorted_energy
+        else:
+            g = self._group(code)
+            if g is None:
+                return self.foods[:0]
+            foods = self.foods[self.offsets[g]:self.offsets[g + 1]]
+            energy = self.energy[self.offsets[g]:self.offsets[g + 1]]
+        start = np.searchsorted(energy, min_energy, side='left')
+        end = np.searchsorted(energy, max_energy, side='right')
+        return foods[start:end]
+
+    def affordable(self, max_energy: float) -> int:
+        """에너지가 max_energy 이하인 음식 수 (by_energy의 앞에서부터 그만큼이 해당 음식)"""
+        return int(np.searchsorted(self.sorted_energy, max_energy, side='right'))
+
+    def mask(self, code: int) -> np.ndarray:
+        """분류 소속 여부 (bool, 카탈로그 인덱스 순서, 읽기 전용). 카탈로그에 없는 분류면 모두 False입니다."""
+        g = self._group(code)
+        return self._empty_mask if g is None else self.masks[g]
@@ -0,0 +1,29 @@
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    탐색 시간 제한입니다. 만든 시점부터 time_limit초 뒤가 마감이며, None이면 마감이 없습니다.
+    expired()가 한 번이라도 True를 반환하면 reached가 True로 남아, 탐색이 시간 제한 때문에
+    멈췄는지(탐색을 다 해서 끝났는지와 구분) 나중에 알 수 있습니다.
+    """
+    __slots__ = ('time_limit', 'at', 'reached')
+
+    def __init__(self, time_limit: Optional[float] = None):
+        self.time_limit = time_limit
+        self.at = time.monotonic() + time_limit if time_limit is not None else None
+        self.reached = False
+
+    def expired(self) -> bool:
+        if self.at is None:
+            return False
+        if not self.reached and time.monotonic() >= self.at:
+            self.reached = True
+        return self.reached
+
+    def remaining(self) -> Optional[float]:
+        """남은 시간(초, 0 이상). 마감이 없으면 None."""
+        if self.at is None:
+            return None
+        return max(self.at - time.monotonic(), 0.0)
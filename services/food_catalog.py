@@ -0,0 +1,197 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.menu_combination import MenuCombination
+from services.category_index import CategoryIndex
+
+# nutrients 행렬의 열 순서
+ENERGY, PROTEIN, FAT, CARBS = range(4)
+NUTRIENT_KEYS = ('energy', 'protein', 'fat', 'carbs')
+
+
+class FoodCatalog:
+    """
+    음식 DB(xlsx)를 한 번만 파싱하여 모든 서비스가 공유하는 식품 카탈로그입니다.
+
+    xlsx 파싱 결과는 원본 옆에 바이너리 캐시(.cache.npz)로 저장되며,
+    원본의 수정 시각/크기(불일치 시 해시)가 같으면 다음 실행부터 캐시를 바로 읽습니다.
+    같은 프로세스 안에서는 경로별로 한 번만 로드된 인스턴스를 재사용합니다.
+
+    알고리즘은 열 단위 배열만 사용하고, 식품명 등 문자열은 결과를 돌려줄 때만 만듭니다.
+        nutrients(float64, N x 4): 에너지, 단백질, 지방, 탄수화물
+        category_codes(int16, N): FoodCategory.code (식품대분류코드)
+        name_ids(int32, N): 같은 식품명은 같은 id (중복 조합 판정용)
+    인스턴스는 여러 서비스와 스레드가 함께 쓰므로 배열은 모두 읽기 전용입니다. (바꿔야 하면 복사해서 사용)
+    category_index: 분류별, 에너지 순 색인 (선호 분류/에너지 예산 조회용, CategoryIndex 참고)
+    """
+
+    REQUIRED_COLS = ['식품명', '분류', '식품대분류코드', '에너지(kcal)', '단백질(g)', '지방(g)', '탄수화물(g)']
+    NUTRIENT_COLS = REQUIRED_COLS[3:]
+    CACHE_VERSION = 2
+    CACHE_SUFFIX = '.cache.npz'
+
+    _loaded: Dict[str, Tuple[Tuple[int, int], 'FoodCatalog']] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, names: np.ndarray, categories: np.ndarray, category_codes: np.ndarray,
+                 nutrients: np.ndarray, source_hash: str = ''):
+        self.names = names
+        self.categories = categories
+        self.category_codes = category_codes.astype(np.int16, copy=False)
+        self.nutrients = np.ascontiguousarray(nutrients, dtype=np.float64)
+        self.source_hash = source_hash
+
+        _, name_ids = np.unique(names, return_inverse=True)
+        self.name_ids = name_ids.astype(np.int32).reshape(-1)
+        for array in (self.names, self.categories, self.category_codes, self.nutrients, self.name_ids):
+            array.flags.writeable = False
+        self.category_index = CategoryIndex(self.category_codes, self.nutrients[:, ENERGY])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def load(cls, db_path: str, use_cache: bool = True) -> 'FoodCatalog':
+        """경로에 해당하는 카탈로그를 반환합니다. (프로세스 캐시 → 디스크 캐시 → xlsx 순)"""
+        abs_path = os.path.abspath(db_path)
+        try:
+            stat = os.stat(abs_path)
+        except FileNotFoundError:
+            print(f"오류: '{db_path}' 경로에서 파일을 찾을 수 없습니다.")
+            raise FileNotFoundError(f"'{db_path}'에서 데이터를 불러오는 데 실패했습니다.")
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        with cls._lock:
+            cached = cls._loaded.get(abs_path)
+            if cached is not None and cached[0] == stat_key:
+                return cached[1]
+
+            catalog = cls._load_cache(abs_path, stat_key) if use_cache else None
+            if catalog is None:
+                catalog = cls._load_workbook(abs_path)
+                if catalog is None:
+                    raise FileNotFoundError(f"'{db_path}'에서 데이터를 불러오는 데 실패했습니다.")
+                if use_cache:
+                    catalog._save_cache(abs_path + cls.CACHE_SUFFIX, stat_key)
+
+            cls._loaded[abs_path] = (stat_key, catalog)
+            return catalog
+
+    @classmethod
+    def _load_workbook(cls, file_path: str) -> Optional['FoodCatalog']:
+        """Excel 파일에서 영양 데이터를 불러옵니다."""
+        try:
+            df = pd.read_excel(file_path)
+            df = df[cls.REQUIRED_COLS]
+            for col in cls.NUTRIENT_COLS:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+            # FutureWarning 수정을 위해 inplace=True 대신 재할당 방식 사용
+            df['분류'] = df['분류'].fillna('기타')
+            df['식품대분류코드'] = pd.to_numeric(df['식품대분류코드'], errors='coerce')
+            df = df.fillna(0)
+        except Exception as e:
+            print(f"데이터를 불러오는 중 오류가 발생했습니다: {e}")
+            return None
+
+        return cls(
+            names=df['식품명'].astype(str).to_numpy(dtype=str),
+            categories=df['분류'].astype(str).to_numpy(dtype=str),
+            category_codes=df['식품대분류코드'].to_numpy(dtype=np.int16),
+            nutrients=df[cls.NUTRIENT_COLS].to_numpy(dtype=np.float64),
+            source_hash=_file_hash(file_path),
+        )
+
+    @classmethod
+    def _load_cache(cls, db_path: str, stat_key: Tuple[int, int]) -> Optional['FoodCatalog']:
+        """디스크 캐시가 원본과 일치하면 캐시에서 카탈로그를 복원합니다."""
+        cache_path = db_path + cls.CACHE_SUFFIX
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                if int(data['version']) != cls.CACHE_VERSION:
+                    return None
+                source_hash = str(data['source_hash'])
+                stat_matches = tuple(int(v) for v in data['source_stat']) == stat_key
+                if not stat_matches and source_hash != _file_hash(db_path):
+                    return None
+                catalog = cls(
+                    names=data['names'],
+                    categories=data['categories'],
+                    category_codes=data['category_codes'],
+                    nutrients=data['nutrients'],
+                    source_hash=source_hash,
+                )
+        except Exception:
+            # 손상된 캐시는 무시하고 원본에서 다시 만듭니다.
+            return None
+
+        # 내용은 같고 수정 시각만 바뀐 경우(git checkout 등) 메타데이터만 갱신합니다.
+        if not stat_matches:
+            catalog._save_cache(cache_path, stat_key)
+        return catalog
+
+    def _save_cache(self, cache_path: str, stat_key: Tuple[int, int]) -> None:
+        """카탈로그를 바이너리 캐시로 저장합니다. (원자적 교체)"""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    version=np.int64(self.CACHE_VERSION),
+                    source_stat=np.array(stat_key, dtype=np.int64),
+                    source_hash=np.array(self.source_hash),
+                    names=self.names,
+                    categories=self.categories,
+                    category_codes=self.category_codes,
+                    nutrients=self.nutrients,
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # 읽기 전용 환경 등에서는 캐시 없이 계속 진행합니다.
+            print(f"카탈로그 캐시를 저장하지 못했습니다: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def food_record(self, idx: int) -> Dict:
+        """인덱스에 해당하는 음식 하나를 dict로 반환합니다."""
+        energy, protein, fat, carbs = self.nutrients[idx].tolist()
+        return {
+            '식품명': str(self.names[idx]),
+            '분류': str(self.categories[idx]),
+            '에너지(kcal)': energy,
+            '단백질(g)': protein,
+            '지방(g)': fat,
+            '탄수화물(g)': carbs,
+        }
+
+    def totals(self, indices: Sequence[int]) -> np.ndarray:
+        """음식 인덱스들의 영양소 합계(에너지, 단백질, 지방, 탄수화물)를 계산합니다."""
+        return self.nutrients[np.asarray(indices, dtype=np.intp)].sum(axis=0)
+
+    def signature(self, indices: Sequence[int]) -> Tuple[int, ...]:
+        """중복 조합 판정용 시그니처 (정렬된 식품명 id)."""
+        return tuple(sorted(self.name_ids[np.asarray(indices, dtype=np.intp)].tolist()))
+
+    def materialize(self, indices: Sequence[int]) -> MenuCombination:
+        """결과로 돌려줄 조합을 만듭니다. (식품명 등은 출력할 때 카탈로그에서 찾음)"""
+        return MenuCombination(indices, self.totals(indices).tolist(), self)
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def targets_to_array(targets: Dict) -> np.ndarray:
+    """{'energy', 'protein', 'fat', 'carbs'} 목표치를 nutrients 열 순서의 배열로 바꿉니다."""
+    return np.array([targets[key] for key in NUTRIENT_KEYS], dtype=np.float64)
@@ -1,45 +1,73 @@
-import pandas as pd
-import random
+import multiprocessing
+import numpy as np
+import os
 import time
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 
 from models.user_info import UserInfo
+from models.menu_combination import MenuCombination
+from services.food_catalog import FoodCatalog
+from services.metrics import MetricsRegistry, silent, timed
+from services.parallel import drain_queue, stream_search
+from services.result_cache import ResultCache
+from services.search_context import SearchContext
 
 
 class GeneticService:
-    def __init__(self, db_path: str):
-        self.df = self._load_nutrition_data(db_path)
-        if self.df is None:
-            raise FileNotFoundError(f"'{db_path}'에서 데이터를 불러오는 데 실패했습니다.")
-        self.food_list = self.df.to_dict('records')
-        print(f"전체 {len(self.food_list)}개 식품 데이터를 사용합니다.")
-
-    def _load_nutrition_data(self, file_path: str) -> Optional[pd.DataFrame]:
-        """Excel 파일에서 영양 데이터를 불러옵니다."""
-        try:
-            df = pd.read_excel(file_path)
-            required_cols = ['식품명', '분류', '에너지(kcal)', '단백질(g)', '지방(g)', '탄수화물(g)']
-            df = df[required_cols]
-            for col in required_cols[2:]:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # FutureWarning 수정을 위해 inplace=True 대신 재할당 방식 사용
-            df['분류'] = df['분류'].fillna('기타')
-            df = df.fillna(0)
-            
-            return df
-        except FileNotFoundError:
-            print(f"오류: '{file_path}' 경로에서 파일을 찾을 수 없습니다.")
-            return None
-        except Exception as e:
-            print(f"데이터를 불러오는 중 오류가 발생했습니다: {e}")
-            return None
+    MAX_FOODS = 7  # 한 끼에 포함될 최대 음식 개수
+    MAX_RESTARTS = 20  # 무한 루프 방지용 최대 재시작 횟수 (섬 모델은 같은 총 세대 수 안에서 진행)
+
+    def __init__(self, db_path: str, result_cache: Optional[ResultCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, verbose: bool = True):
+        """
+        metrics: 실행 통계(세대 수 포함)와 구간별 시간(load, search, dedup)을 기록할 곳
+        verbose: False이면 진행 메시지를 출력하지 않습니다. (일괄 처리, 서버 워커 등)
+        """
+        self.db_path = db_path
+        self.result_cache = result_cache
+        self.metrics = metrics
+        self.log = print if verbose else silent
+        with timed(metrics, 'genetic.load'):
+            self.catalog = FoodCatalog.load(db_path)
+        self.log(f"전체 {len(self.catalog)}개 식품 데이터를 사용합니다.")
 
     def get_recommendations(self, user: UserInfo, num_combinations: int = 5,
-                          population_size: int = 100, generations: int = 50) -> List[Tuple[List[Dict], Dict]]:
+                          population_size: int = 100, generations: int = 50,
+                          islands: Optional[int] = None, migration_interval: int = 10, migration_size: int = 5,
+                          workers: Optional[int] = None, stall_generations: Optional[int] = 10,
+                          time_limit: Optional[float] = None, seed: Optional[int] = None,
+                          stats: Optional[Dict] = None) -> List[MenuCombination]:
         """
-        사용자 정보에 기반하여 유전 알고리즘으로 음식 조합을 추천합니다.
+        사용자 정보에 기반하여 유전 알고리즘으로 음식 조합을 추천합니다. (iter_recommendations의 결과를 모두 모은 리스트)
+        """
+        return list(self.iter_recommendations(user, num_combinations, population_size, generations, islands,
+                                              migration_interval, migration_size, workers, stall_generations, time_limit,
+                                              seed, stats))
+
+    def iter_recommendations(self, user: UserInfo, num_combinations: int = 5,
+                             population_size: int = 100, generations: int = 50,
+                             islands: Optional[int] = None, migration_interval: int = 10, migration_size: int = 5,
+                             workers: Optional[int] = None, stall_generations: Optional[int] = 10,
+                             time_limit: Optional[float] = None, seed: Optional[int] = None,
+                             stats: Optional[Dict] = None) -> Iterator[MenuCombination]:
+        """
+        유전 알고리즘으로 찾은 고유한 조합을 찾는 대로 하나씩 내보냅니다.
+        진화는 별도 스레드에서 진행되며, 생성기를 닫으면 세대 중간에라도(섬 모델의 워커 포함) 멈춥니다.
         목표 조합 개수를 채울 때까지 알고리즘을 반복 실행합니다 (Restart Strategy).
+
+        islands: 2 이상이면 섬 모델로 실행합니다. 섬마다 개체군이 프로세스 풀에서 동시에 진화하고,
+            migration_interval 세대마다 상위 migration_size개 개체를 다음 섬(링 구조)으로 보냅니다.
+        workers: 섬 모델의 프로세스 수 (기본: min(섬 수, CPU 수), 1이면 현재 프로세스에서 실행)
+        stall_generations: 이 세대 수 동안 새 조합이 없고 최고 적합도도 오르지 않으면 해당 실행을 조기 종료합니다.
+            (None이면 항상 generations 세대를 모두 진행)
+        time_limit: 탐색 시간 제한(초). 지나면 세대 중간에라도 멈추고 그때까지 찾은 조합까지만 내보냅니다.
+            (재시작 횟수 제한과 함께 적용)
+        seed: 같은 seed를 주면 같은 결과를 반환합니다. (섬 모델은 섬마다 seed에서 파생한 생성기를 써서 workers 수와 무관,
+            시간 제한이나 소비자가 중간에 멈춘 경우는 멈춘 시점에 따라 달라질 수 있음)
+        stats: 실행 통계(진행/절약 세대 수, 목표 개수를 채웠는지(satisfied), 시간 제한으로 멈췄는지(timed_out) 등)를 받을 dict.
+            서비스 하나를 여러 스레드에서 함께 쓸 때는 요청마다 따로 넘깁니다. 결과 캐시에서 찾은 경우에는 채우지 않습니다.
         """
         # 목표 영양소를 3으로 나누어 한 끼 분량을 계산합니다.
         targets = {
@@ -48,140 +76,351 @@ class GeneticService:
             'fat': user.fat_required / 3,
             'carbs': user.carbon_required / 3 - 50
         }
+
+        # 결과 캐시를 쓰면 구간의 보수적인 경계로 양자화한 목표치로 탐색 (비슷한 요구량의 사용자끼리 결과 공유)
+        if self.result_cache is not None:
+            targets = self.result_cache.quantize(targets)
         
-        preference = user.preference[0].label if user.preference else None
+        preference = user.preference[0].code if user.preference else None
         
         if preference:
-            print(f"\n사용자 선호 음식(1순위): '{preference}'")
+            self.log(f"\n사용자 선호 음식(1순위): '{user.preference[0].label}'")
         else:
-            print("\n사용자 선호 음식이 설정되지 않았습니다.")
+            self.log("\n사용자 선호 음식이 설정되지 않았습니다.")
             
-        print("\n[한 끼 식사 목표 영양소]")
-        print(f"에너지 <= {targets['energy']:.2f}kcal, 단백질 >= {targets['protein']:.2f}g, 지방 >= {targets['fat']:.2f}g, 탄수화물 >= {targets['carbs']:.2f}g")
-
+        self.log("\n[한 끼 식사 목표 영양소]")
+        self.log(f"에너지 <= {targets['energy']:.2f}kcal, 단백질 >= {targets['protein']:.2f}g, 지방 >= {targets['fat']:.2f}g, 탄수화물 >= {targets['carbs']:.2f}g")
+
+        context = SearchContext(time_limit, seed, stats)
+
+        def compute() -> Iterator[MenuCombination]:
+            return self._iter_combinations_genetic(targets, num_combinations, preference, population_size, generations,
+                                                   islands, migration_interval, migration_size, workers,
+                                                   stall_generations, context)
+
+        if self.result_cache is None:
+            yield from compute()
+            return
+        # 시간 제한으로 멈춘 결과는 저장하지 않으므로 time_limit은 키에 넣지 않음
+        yield from self.result_cache.iter_or_compute(
+            'genetic', self.catalog, targets, preference,
+            dict(num_combinations=num_combinations, population_size=population_size, generations=generations,
+                 islands=islands, migration_interval=migration_interval, migration_size=migration_size,
+                 stall_generations=stall_generations, seed=seed), compute,
+            complete=lambda: not context.stats['timed_out'])
+
+    def _iter_combinations_genetic(self, targets: Dict, num_combinations: int, preference: Optional[int],
+                                   population_size: int, generations: int, islands: Optional[int],
+                                   migration_interval: int, migration_size: int, workers: Optional[int],
+                                   stall_generations: Optional[int],
+                                   context: SearchContext) -> Iterator[MenuCombination]:
+        """
+        목표 조합 개수를 채울 때까지 유전 알고리즘을 반복 실행하며 (섬 모델이면 섬 모델 한 번)
+        수집기에 새로 들어온 조합을 찾는 대로 내보냅니다.
+        요청의 시간 제한이 지나면 수집기가 완료 상태가 되어, 목표 개수에 도달했을 때와 같은 경로로 멈춥니다.
+        """
         # --- 반복 실행 로직 시작 ---
-        print(f"\n--- 유전 알고리즘 시작 (목표: {num_combinations}개 조합) ---")
+        self.log(f"\n--- 유전 알고리즘 시작 (목표: {num_combinations}개 조합) ---")
         total_start_time = time.time()
-        
-        all_unique_combinations = []
-        global_signatures = set()
-        
-        attempt = 0
-        max_attempts = 20  # 무한 루프 방지용 최대 시도 횟수
-        
-        while len(all_unique_combinations) < num_combinations and attempt < max_attempts:
-            attempt += 1
-            needed = num_combinations - len(all_unique_combinations)
-
-            # 한 번의 GA 실행
-            # 인구수와 세대수는 실행 속도를 위해 조절 가능 (여기서는 입력값 유지)
-            batch_results = self._run_single_ga_batch(targets, population_size, generations, preference)
-            
-            # 결과 통합 (중복 제거)
-            new_count = 0
-            for combo, totals, fitness in batch_results:
-                signature = tuple(sorted([f['식품명'] for f in combo]))
-                if signature not in global_signatures:
-                    global_signatures.add(signature)
-                    all_unique_combinations.append((combo, totals))
-                    new_count += 1
-                    
-            # 만약 이번 실행에서 새로운 조합을 하나도 못 찾았다면, 다음 실행에서는 돌연변이율을 높이거나 다양성을 위한 조치가 필요할 수 있음
-
-        total_end_time = time.time()
-        print(f"\n=== 유전 알고리즘 최종 완료 ===")
-        print(f"총 실행 시간: {total_end_time - total_start_time:.4f}초")
-        print(f"최종 발견된 조합 수: {len(all_unique_combinations)}개")
-        
-        # 결과가 너무 많으면 적합도 순으로 정렬하거나 해야 하지만, 
-        # 현재 구조상 적합도 정보는 저장하지 않고 있으므로 발견된 순서대로 반환하거나 
-        # 필요하다면 다시 평가하여 정렬할 수 있습니다. 
-        # 여기서는 발견된 순서대로 반환하되, 요청된 개수만큼 자릅니다.
-        return all_unique_combinations[:num_combinations]
+        deadline = context.deadline
+        generations_budget = generations * self.MAX_RESTARTS
+        # 탐색 스레드가 끝날 때 채우는 작업량 (중간에 멈추면 초기값 그대로)
+        run = {
+            'generations_run': 0,
+            'generations_budget': generations_budget,
+            'generations_saved': generations_budget,
+            'restarts': 0,
+            'found': 0,
+        }
+        collectors = []
+
+        def search(emit: Callable[[MenuCombination], None], cancelled: Callable[[], bool]) -> None:
+            collector = _SolutionCollector(self.catalog, num_combinations, on_found=emit,
+                                           cancelled=lambda: cancelled() or deadline.expired())
+            collectors.append(collector)
+
+            attempt = 0
+            max_attempts = self.MAX_RESTARTS
+            rng = np.random.default_rng(context.seed)
+            generations_run = 0
+            budget = generations_budget
+
+            if islands and islands > 1:
+                # 섬 모델: 재시작 대신 개체군을 유지하며 섬 사이에 우수 개체를 교환
+                max_attempts = 0
+                generations_run, budget = self._run_island_model(
+                    targets, collector, population_size, generations, preference, rng,
+                    islands, migration_interval, migration_size, workers, stall_generations)
+
+            while not collector.done and attempt < max_attempts:
+                attempt += 1
+
+                # 한 번의 GA 실행 (결과는 수집기에서 바로 중복 제거되며, 목표 개수에 도달하면 세대 중간에도 중단)
+                # 인구수와 세대수는 실행 속도를 위해 조절 가능 (여기서는 입력값 유지)
+                generations_run += self._run_single_ga_batch(targets, population_size, generations, preference, rng,
+                                                             collector, stall_generations)
+
+            run.update({
+                'generations_run': generations_run,
+                'generations_budget': budget,
+                'generations_saved': budget - generations_run,
+                'restarts': attempt,
+                'found': len(collector.combinations),
+            })
+
+        # 수집기는 발견한 순서대로 목표 개수까지만 받으므로 그대로 내보냄
+        combinations = stream_search(search)
+        try:
+            yield from combinations
+        finally:
+            combinations.close()
+
+            satisfied = run['found'] >= num_combinations
+            stats = context.finish(**run, satisfied=satisfied, timed_out=not satisfied and deadline.reached)
+            total_end_time = time.time()
+            self.log("\n=== 유전 알고리즘 최종 완료 ===")
+            self.log(f"총 실행 시간: {total_end_time - total_start_time:.4f}초")
+            self.log(f"진행 세대 수: {stats['generations_run']} / {stats['generations_budget']} "
+                  f"(절약: {stats['generations_saved']}세대)")
+            self.log(f"최종 발견된 조합 수: {stats['found']}개")
+            if stats['timed_out']:
+                self.log(f"시간 제한({context.time_limit}초)으로 탐색을 멈췄습니다.")
+            if self.metrics is not None:
+                dedup_seconds = sum(collector.dedup_seconds for collector in collectors)
+                self.metrics.record_run('genetic', stats,
+                                        {'search': total_end_time - total_start_time, 'dedup': dedup_seconds})
 
     def _run_single_ga_batch(self, targets: Dict, population_size: int, generations: int,
-                               preference: Optional[str]) -> List[Tuple[List[Dict], Dict, float]]:
+                               preference: Optional[int], rng: np.random.Generator,
+                               collector: '_SolutionCollector', stall_generations: Optional[int] = None) -> int:
         """
-        유전 알고리즘을 1회 실행하여 유효한 조합들을 반환합니다.
+        유전 알고리즘을 1회 실행하여 유효한 조합들을 수집기에 넣습니다.
+        반환값: 실제로 진행한 세대 수
         """
-        # 초기 개체군 생성
-        population = self._initialize_population(population_size, targets)
-
-        best_solutions_in_run = []
+        # 초기 개체군 생성 (개체군 x MAX_FOODS 정수 행렬, 빈 칸은 -1)
+        population = self._initialize_population(population_size, rng)
+        _, generations_run = self._run_generations(population, targets, generations, preference, rng,
+                                                   collector.add, lambda: collector.done, stall_generations)
+        return generations_run
+
+    def _run_generations(self, population: np.ndarray, targets: Dict, generations: int, preference: Optional[int],
+                         rng: np.random.Generator, collect: Callable[[List[int], np.ndarray, float], bool],
+                         should_stop: Callable[[], bool], stall_generations: Optional[int] = None,
+                         plateau_tolerance: float = 1e-6) -> Tuple[np.ndarray, int]:
+        """
+        주어진 개체군을 최대 generations 세대 동안 진화시키며, 매 세대 상위 20%의 유효한 조합을 collect로 넘깁니다.
+        collect는 처음 보는 조합이면 True를 반환하고, should_stop()이 True가 되면 세대 중간이라도 즉시 멈춥니다.
+        stall_generations: 이 세대 수 동안 새 조합이 없고 최고 적합도도 오르지 않으면 조기 종료합니다.
+        반환값: (마지막 개체군, 실제로 진행한 세대 수)
+        """
+        population_size = len(population)
         local_signatures = set()
+        best_fitness = -np.inf
+        stale_generations = 0
+        generations_run = 0
 
         for gen in range(generations):
-            # 적합도 계산
-            fitness_scores = [(individual, self._calculate_fitness(individual, targets, preference))
-                            for individual in population]
+            if should_stop():
+                break
+            generations_run += 1
+
+            # 세대 전체의 적합도를 한 번에 계산
+            fitness, totals = self._calculate_fitness(population, targets, preference)
             
-            # 적합도 순 정렬
-            fitness_scores.sort(key=lambda x: x[1], reverse=True)
+            # 적합도 순 정렬 (동점이면 기존 순서 유지)
+            order = np.argsort(-fitness, kind='stable')
 
             # 마지막 세대이거나, 중간중간 우수한 개체 수집
             # 여기서는 매 세대 상위 20%를 후보로 등록 (중복 제거하며)
             top_count = max(1, int(population_size * 0.2))
-            for individual, fitness in fitness_scores[:top_count]:
-                if fitness > 0: # 유효한 해만
-                    signature = tuple(sorted([idx for idx in individual if idx != -1]))
+            new_count = 0
+            for rank in order[:top_count].tolist():
+                if fitness[rank] > 0: # 유효한 해만
+                    combination = [idx for idx in population[rank].tolist() if idx != -1]
+                    signature = tuple(sorted(combination))
                     if signature not in local_signatures and len(signature) > 0:
                         local_signatures.add(signature)
-                        combination = [self.food_list[idx] for idx in individual if idx != -1]
-                        totals = self._calculate_nutrition(combination)
-                        best_solutions_in_run.append((combination, totals, fitness))
+                        if collect(combination, totals[rank], float(fitness[rank])):
+                            new_count += 1
+                        if should_stop():
+                            return population, generations_run
+
+            # 정체 판단: 새 조합도 없고 최고 적합도도 제자리
+            generation_best = float(fitness[order[0]])
+            improved = generation_best > best_fitness + plateau_tolerance
+            best_fitness = max(best_fitness, generation_best)
+            stale_generations = 0 if (new_count or improved) else stale_generations + 1
+            if stall_generations and stale_generations >= stall_generations:
+                break
 
             # 다음 세대 생성
-            population = self._evolve_population(fitness_scores, population_size, targets)
+            population = self._evolve_population(population, fitness, order, rng)
 
-        return best_solutions_in_run
+        return population, generations_run
 
-    def _initialize_population(self, population_size: int, targets: Dict) -> List[List[int]]:
+    def _run_island_model(self, targets: Dict, collector: '_SolutionCollector', population_size: int, generations: int,
+                          preference: Optional[int], rng: np.random.Generator, islands: int, migration_interval: int,
+                          migration_size: int, workers: Optional[int],
+                          stall_generations: Optional[int]) -> Tuple[int, int]:
+        """
+        섬 모델 유전 알고리즘을 실행합니다.
+        섬들은 migration_interval 세대씩(에포크) 동시에 진화하며, 찾은 유효한 조합을 즉시 중복 제거 수집기로
+        흘려보냅니다. 에포크가 끝나면 우수 개체를 다음 섬으로 이주시킵니다.
+        수집기가 목표 개수에 도달하면 공유 이벤트로 모든 섬이 세대 중간에라도 멈춥니다.
+        workers가 1이면 현재 프로세스에서 섬을 차례로 실행하므로 결과가 재현됩니다.
+        반환값: (모든 섬이 실제로 진행한 세대 수의 합, 세대 수 예산)
+        """
+        # 재시작 전략과 같은 총 세대 수 예산을 섬들이 나누어 씀
+        max_generations = max(migration_interval, generations * self.MAX_RESTARTS // islands)
+        seeds = np.random.SeedSequence(int(rng.integers(2 ** 32))).spawn(islands)
+        island_rngs = [np.random.default_rng(seed) for seed in seeds]
+        populations = [self._initialize_population(population_size, island_rng) for island_rng in island_rngs]
+        immigrants: List[Optional[np.ndarray]] = [None] * islands
+        stalled = [False] * islands
+        stall_threshold = max(1, int(population_size * 0.2) // 2)
+
+        workers = workers or min(islands, os.cpu_count() or 1)
+        self.log(f"섬 모델: 섬 {islands}개, 프로세스 {workers}개, 섬당 최대 {max_generations}세대")
+
+        generation = 0
+        generations_run = 0
+
+        manager = multiprocessing.Manager() if workers > 1 else None
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            solution_queue = manager.Queue() if manager is not None else None
+            stop_event = manager.Event() if manager is not None else None
+
+            while generation < max_generations and not collector.done:
+                epoch = min(migration_interval, max_generations - generation)
+                new_counts = [0] * islands
+
+                def collect(island: int, combination: List[int], totals: np.ndarray, fitness: float) -> bool:
+                    is_new = collector.add(combination, totals, fitness)
+                    new_counts[island] += is_new
+                    return is_new
+
+                if pool is not None:
+                    futures = [pool.submit(_island_epoch_worker, self.db_path, targets, preference, epoch, migration_size,
+                                           populations[i], immigrants[i], island_rngs[i], stalled[i], stall_generations,
+                                           i, solution_queue, stop_event)
+                               for i in range(islands)]
+                    # 섬들이 진화하는 동안 흘러오는 조합을 수집하다가 목표에 도달하면 모든 섬에 중단 신호
+                    while True:
+                        running = not all(future.done() for future in futures)
+                        for island, solutions in drain_queue(solution_queue, timeout=0.01 if running else 0):
+                            for solution in solutions:
+                                collect(island, *solution)
+                        if collector.done:
+                            stop_event.set()
+                        if not running:
+                            break
+                    results = [future.result() for future in futures]
+                else:
+                    results = [self._run_island_epoch(targets, preference, epoch, migration_size,
+                                                      populations[i], immigrants[i], island_rngs[i], stalled[i],
+                                                      partial(collect, i), lambda: collector.done, stall_generations)
+                               for i in range(islands)]
+                generation += epoch
+
+                for i, (population, island_rng, elites, island_generations) in enumerate(results):
+                    populations[i] = population
+                    island_rngs[i] = island_rng
+                    generations_run += island_generations
+                    # 링 구조 이주: i번 섬의 엘리트가 다음 섬으로
+                    immigrants[(i + 1) % islands] = elites
+
+                    # 에포크 동안 새 조합이 한 세대 상위 20%의 절반에도 못 미치면 정체된 섬으로 보고
+                    # 다음 에포크에서 엘리트를 제외한 개체를 새로 만듦
+                    stalled[i] = new_counts[i] < stall_threshold
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if manager is not None:
+                manager.shutdown()
+
+        self.log(f"섬 모델 진행 세대: 총 {generations_run}세대 (섬당 최대 {generation}세대)")
+        return generations_run, max_generations * islands
+
+    def _run_island_epoch(self, targets: Dict, preference: Optional[int], generations: int, migration_size: int,
+                          population: np.ndarray, immigrants: Optional[np.ndarray], rng: np.random.Generator,
+                          reseed: bool, collect: Callable[[List[int], np.ndarray, float], bool],
+                          should_stop: Callable[[], bool], stall_generations: Optional[int] = None
+                          ) -> Tuple[np.ndarray, np.random.Generator, np.ndarray, int]:
+        """
+        섬 하나를 한 에포크 동안 진화시킵니다.
+        도착한 이주 개체는 가장 적합도가 낮은 개체를 대체합니다.
+        reseed: 정체된 섬이면 엘리트(상위 10%)를 제외한 개체를 새로 만들어 다양성을 회복합니다.
+        반환값: (개체군, 난수 생성기, 다음 섬으로 보낼 엘리트, 진행한 세대 수)
+        """
+        if reseed or (immigrants is not None and len(immigrants)):
+            fitness, _ = self._calculate_fitness(population, targets, preference)
+            ascending = np.argsort(fitness, kind='stable')
+            population = population.copy()
+            if reseed:
+                weak = ascending[:len(population) - max(2, len(population) // 10)]
+                population[weak] = self._initialize_population(len(weak), rng)
+            if immigrants is not None and len(immigrants):
+                worst = ascending[:len(immigrants)]
+                population[worst] = immigrants[:len(worst)]
+
+        population, generations_run = self._run_generations(population, targets, generations, preference, rng,
+                                                            collect, should_stop, stall_generations)
+
+        fitness, _ = self._calculate_fitness(population, targets, preference)
+        elites = population[np.argsort(-fitness, kind='stable')[:migration_size]]
+        return population, rng, elites, generations_run
+
+    def _initialize_population(self, population_size: int, rng: np.random.Generator) -> np.ndarray:
         """
         초기 개체군을 생성합니다.
-        각 개체는 식품 인덱스의 리스트로 표현됩니다.
+        각 개체는 식품 인덱스의 행(길이 MAX_FOODS, 빈 칸은 -1)으로 표현됩니다.
         """
-        population = []
-        max_foods = 7  # 한 끼에 포함될 최대 음식 개수
+        num_catalog_foods = len(self.catalog)
+        max_foods = min(self.MAX_FOODS, num_catalog_foods)
 
-        for _ in range(population_size):
-            # 랜덤하게 3~7개의 음식 선택
-            num_foods = random.randint(3, max_foods)
-            individual = random.sample(range(len(self.food_list)), num_foods)
+        # 행마다 무작위 키가 가장 작은 음식들을 고르면 중복 없는 균등 표본이 됩니다.
+        keys = rng.random((population_size, num_catalog_foods))
+        picked = np.argpartition(keys, max_foods - 1, axis=1)[:, :max_foods]
+        picked = np.take_along_axis(picked, np.argsort(np.take_along_axis(keys, picked, axis=1), axis=1), axis=1)
 
-            # 고정 길이로 만들기 위해 -1로 패딩
-            while len(individual) < max_foods:
-                individual.append(-1)
+        population = np.full((population_size, self.MAX_FOODS), -1, dtype=np.int64)
+        population[:, :max_foods] = picked
 
-            population.append(individual)
+        # 랜덤하게 3~7개의 음식만 남김
+        num_foods = rng.integers(min(3, max_foods), max_foods + 1, size=population_size)
+        population[np.arange(self.MAX_FOODS) >= num_foods[:, None]] = -1
 
         return population
 
-    def _calculate_fitness(self, individual: List[int], targets: Dict, preference: Optional[str]) -> float:
+    def _calculate_fitness(self, population: np.ndarray, targets: Dict,
+                           preference: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
         """
-        개체의 적합도를 계산합니다.
+        개체군 전체의 적합도를 한 번에 계산합니다.
         높은 점수일수록 목표에 가까운 조합입니다.
+        반환값: (개체별 적합도, 개체별 영양소 합계(개체군 x 4))
         """
-        # 실제 음식만 추출 (-1 제외)
-        foods = [self.food_list[idx] for idx in individual if idx != -1]
-
-        if len(foods) == 0:
-            return 0.0
+        # 실제 음식만 합산 (-1 칸은 0으로 가림)
+        valid = population >= 0
+        food_counts = valid.sum(axis=1)
+        gathered = self.catalog.nutrients[np.where(valid, population, 0)]
+        totals = np.where(valid[..., None], gathered, 0.0).sum(axis=1)
+        energy, protein, fat, carbs = totals.T
 
-        # 현재 영양소 합계 계산
-        totals = self._calculate_nutrition(foods)
-
-        # 에너지 초과 시 큰 페널티
-        if totals['energy'] > targets['energy']:
-            energy_penalty = (totals['energy'] - targets['energy']) / targets['energy']
-            return -1000 * energy_penalty
+        target_energy = targets['energy']
 
         # 목표 달성도 계산
-        protein_score = min(totals['protein'] / targets['protein'], 1.0) if targets['protein'] > 0 else 1.0
-        fat_score = min(totals['fat'] / targets['fat'], 1.0) if targets['fat'] > 0 else 1.0
-        carbs_score = min(totals['carbs'] / targets['carbs'], 1.0) if targets['carbs'] > 0 else 1.0
+        def achievement(amount: np.ndarray, target: float) -> np.ndarray:
+            if target > 0:
+                return np.minimum(amount / target, 1.0)
+            return np.ones_like(amount)
+
+        protein_score = achievement(protein, targets['protein'])
+        fat_score = achievement(fat, targets['fat'])
+        carbs_score = achievement(carbs, targets['carbs'])
 
         # 에너지 활용도 (목표에 가까울수록 좋음)
-        energy_utilization = totals['energy'] / targets['energy'] if targets['energy'] > 0 else 0
+        energy_utilization = energy / target_energy if target_energy > 0 else np.zeros_like(energy)
 
         # 기본 점수 (영양소 달성도의 평균)
         base_score = (protein_score + fat_score + carbs_score) * 10
@@ -192,126 +431,205 @@ class GeneticService:
         # 선호 음식 보너스
         preference_bonus = 0
         if preference:
-            preference_count = sum(1 for food in foods if food.get('분류') == preference)
+            preference_count = (valid & self.catalog.category_index.mask(preference)[population]).sum(axis=1)
             preference_bonus = preference_count * 1.5
 
         # 음식 개수 페널티 (너무 많거나 적으면 감점)
-        food_count_penalty = abs(len(foods) - 5) * 0.5
+        food_count_penalty = np.abs(food_counts - 5) * 0.5
 
         total_score = base_score + energy_bonus + preference_bonus - food_count_penalty
+        fitness = np.maximum(total_score, 0.0)
 
-        return max(total_score, 0.0)
+        # 에너지 초과 시 큰 페널티
+        over_energy = energy > target_energy
+        fitness[over_energy] = -1000 * ((energy[over_energy] - target_energy) / target_energy)
 
-    def _calculate_nutrition(self, foods: List[Dict]) -> Dict:
-        """음식 리스트의 총 영양소를 계산합니다."""
-        return {
-            'energy': sum(f['에너지(kcal)'] for f in foods),
-            'protein': sum(f['단백질(g)'] for f in foods),
-            'fat': sum(f['지방(g)'] for f in foods),
-            'carbs': sum(f['탄수화물(g)'] for f in foods)
-        }
+        # 음식이 하나도 없는 개체
+        fitness[food_counts == 0] = 0.0
+
+        return fitness, totals
 
-    def _evolve_population(self, fitness_scores: List[Tuple[List[int], float]],
-                          population_size: int, targets: Dict) -> List[List[int]]:
+    def _evolve_population(self, population: np.ndarray, fitness: np.ndarray, order: np.ndarray,
+                           rng: np.random.Generator) -> np.ndarray:
         """
-        선택, 교차, 돌연변이를 통해 다음 세대를 생성합니다.
+        선택, 교차, 돌연변이를 통해 다음 세대를 한 번에 생성합니다.
+        order: 적합도 내림차순 개체 인덱스
         """
-        # 엘리트 선택 (상위 10% 보존)
-        elite_count = max(2, population_size // 10)
-        new_population = [individual for individual, _ in fitness_scores[:elite_count]]
+        population_size = len(population)
 
-        # 토너먼트 선택을 통한 부모 선택 및 교차
-        while len(new_population) < population_size:
-            parent1 = self._tournament_selection(fitness_scores)
-            parent2 = self._tournament_selection(fitness_scores)
+        # 엘리트 선택 (상위 10% 보존)
+        elite_count = min(max(2, population_size // 10), population_size)
+        elites = population[order[:elite_count]]
 
-            # 교차
-            child1, child2 = self._crossover(parent1, parent2)
+        # 토너먼트 선택을 통한 부모 선택 및 교차 (자식은 두 명씩 생성)
+        num_children = population_size - elite_count
+        num_pairs = (num_children + 1) // 2
+        parents = self._tournament_selection(population, fitness, 2 * num_pairs, rng)
+        child1, child2 = self._crossover(parents[:num_pairs], parents[num_pairs:], rng)
 
-            # 돌연변이
-            child1 = self._mutate(child1, targets)
-            child2 = self._mutate(child2, targets)
+        # (child1, child2) 순서로 번갈아 배치한 뒤 개체 수에 맞춰 자름
+        children = np.stack([child1, child2], axis=1).reshape(-1, population.shape[1])[:num_children]
 
-            new_population.append(child1)
-            if len(new_population) < population_size:
-                new_population.append(child2)
+        # 돌연변이
+        children = self._mutate(children, rng)
 
-        return new_population[:population_size]
+        return np.concatenate([elites, children])
 
-    def _tournament_selection(self, fitness_scores: List[Tuple[List[int], float]],
-                              tournament_size: int = 5) -> List[int]:
-        """토너먼트 선택으로 부모를 선택합니다."""
-        tournament = random.sample(fitness_scores, min(tournament_size, len(fitness_scores)))
-        winner = max(tournament, key=lambda x: x[1])
-        return winner[0].copy()
+    def _tournament_selection(self, population: np.ndarray, fitness: np.ndarray, num_parents: int,
+                              rng: np.random.Generator, tournament_size: int = 5) -> np.ndarray:
+        """토너먼트 선택으로 부모들을 한 번에 선택합니다. (참가자 인덱스 행렬에서 행별 최고 적합도)"""
+        tournament_size = min(tournament_size, len(population))
+        contestants = rng.integers(len(population), size=(num_parents, tournament_size))
+        winners = contestants[np.arange(num_parents), np.argmax(fitness[contestants], axis=1)]
+        return population[winners]
 
-    def _crossover(self, parent1: List[int], parent2: List[int]) -> Tuple[List[int], List[int]]:
+    def _crossover(self, parents1: np.ndarray, parents2: np.ndarray,
+                   rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
         """
-        단일 점 교차를 수행합니다.
+        부모 쌍마다 단일 점 교차를 수행합니다. (교차점 앞은 자기 유전자, 뒤는 상대 유전자)
         """
-        if random.random() > 0.7:  # 70% 확률로 교차
-            return parent1.copy(), parent2.copy()
+        num_pairs, length = parents1.shape
 
-        # 교차점 선택
-        crossover_point = random.randint(1, len(parent1) - 1)
+        # 70% 확률로 교차, 교차점은 1 ~ length-1
+        do_crossover = rng.random(num_pairs) < 0.7
+        crossover_points = rng.integers(1, length, size=num_pairs)
+        crossover_points[~do_crossover] = length
+        keep_own = np.arange(length) < crossover_points[:, None]
 
-        child1 = parent1[:crossover_point] + parent2[crossover_point:]
-        child2 = parent2[:crossover_point] + parent1[crossover_point:]
+        child1 = np.where(keep_own, parents1, parents2)
+        child2 = np.where(keep_own, parents2, parents1)
 
         # 중복 제거
-        child1 = self._remove_duplicates(child1)
-        child2 = self._remove_duplicates(child2)
-
-        return child1, child2
+        return self._remove_duplicates(child1), self._remove_duplicates(child2)
 
-    def _remove_duplicates(self, individual: List[int]) -> List[int]:
-        """개체에서 중복된 음식 인덱스를 제거합니다."""
-        seen = set()
-        result = []
-        for idx in individual:
-            if idx == -1 or idx not in seen:
-                result.append(idx)
-                if idx != -1:
-                    seen.add(idx)
+    def _remove_duplicates(self, individuals: np.ndarray) -> np.ndarray:
+        """
+        개체마다 중복된 음식 인덱스를 제거합니다.
+        행을 정렬해 이웃 값을 비교하고, 처음 나온 값만 남긴 뒤 빈 칸(-1)은 뒤로 보냅니다.
+        """
+        sort_order = np.argsort(individuals, axis=1, kind='stable')
+        sorted_rows = np.take_along_axis(individuals, sort_order, axis=1)
 
-        # 길이 맞추기
-        while len(result) < len(individual):
-            result.append(-1)
+        duplicated_sorted = np.zeros(individuals.shape, dtype=bool)
+        duplicated_sorted[:, 1:] = (sorted_rows[:, 1:] == sorted_rows[:, :-1]) & (sorted_rows[:, 1:] != -1)
+        duplicated = np.empty_like(duplicated_sorted)
+        np.put_along_axis(duplicated, sort_order, duplicated_sorted, axis=1)
 
-        return result[:len(individual)]
+        # 중복 칸을 제외한 순서를 유지하며 앞으로 당기고, 남는 칸은 -1로 채움
+        compact_order = np.argsort(duplicated, axis=1, kind='stable')
+        result = np.take_along_axis(individuals, compact_order, axis=1)
+        result[np.take_along_axis(duplicated, compact_order, axis=1)] = -1
+        return result
 
-    def _mutate(self, individual: List[int], targets: Dict, mutation_rate: float = 0.3) -> List[int]:
+    def _mutate(self, individuals: np.ndarray, rng: np.random.Generator, mutation_rate: float = 0.3) -> np.ndarray:
         """
-        돌연변이를 수행합니다.
+        개체마다 mutation_rate 확률로 추가/제거/교체 중 하나의 돌연변이를 수행합니다.
         """
-        individual = individual.copy()
-
-        if random.random() < mutation_rate:
-            mutation_type = random.choice(['add', 'remove', 'replace'])
-
-            if mutation_type == 'add':
-                # 새로운 음식 추가
-                for i in range(len(individual)):
-                    if individual[i] == -1:
-                        new_food = random.randint(0, len(self.food_list) - 1)
-                        if new_food not in individual:
-                            individual[i] = new_food
-                        break
-
-            elif mutation_type == 'remove':
-                # 음식 제거
-                valid_indices = [i for i, idx in enumerate(individual) if idx != -1]
-                if valid_indices:
-                    remove_idx = random.choice(valid_indices)
-                    individual[remove_idx] = -1
-
-            elif mutation_type == 'replace':
-                # 음식 교체
-                valid_indices = [i for i, idx in enumerate(individual) if idx != -1]
-                if valid_indices:
-                    replace_idx = random.choice(valid_indices)
-                    new_food = random.randint(0, len(self.food_list) - 1)
-                    if new_food not in individual:
-                        individual[replace_idx] = new_food
-
-        return individual
+        individuals = individuals.copy()
+        count, length = individuals.shape
+        rows = np.arange(count)
+
+        mutation_type = np.where(rng.random(count) < mutation_rate, rng.integers(3, size=count), -1)
+        new_foods = rng.integers(len(self.catalog), size=count)
+        already_present = (individuals == new_foods[:, None]).any(axis=1)
+
+        empty = individuals == -1
+        has_empty = empty.any(axis=1)
+        has_food = ~empty.all(axis=1)
+
+        # 음식이 있는 칸 중 하나를 균등하게 선택
+        slot_keys = rng.random((count, length))
+        slot_keys[empty] = -1.0
+        food_slots = np.argmax(slot_keys, axis=1)
+
+        # 'add': 첫 번째 빈 칸에 새로운 음식 추가
+        add = (mutation_type == 0) & has_empty & ~already_present
+        individuals[rows[add], np.argmax(empty, axis=1)[add]] = new_foods[add]
+
+        # 'remove': 음식 제거
+        remove = (mutation_type == 1) & has_food
+        individuals[rows[remove], food_slots[remove]] = -1
+
+        # 'replace': 음식 교체
+        replace = (mutation_type == 2) & has_food & ~already_present
+        individuals[rows[replace], food_slots[replace]] = new_foods[replace]
+
+        return individuals
+
+
+class _SolutionCollector:
+    """
+    식품명 시그니처로 중복을 제거하며 조합을 목표 개수까지 모으는 수집기입니다.
+    on_found: 새 조합을 저장할 때마다 호출 (스트리밍), cancelled: True를 반환하면 목표 전이라도 done
+    """
+
+    def __init__(self, catalog: FoodCatalog, target: int,
+                 on_found: Optional[Callable[[MenuCombination], None]] = None,
+                 cancelled: Optional[Callable[[], bool]] = None):
+        self.catalog = catalog
+        self.target = target
+        self.on_found = on_found
+        self.cancelled = cancelled
+        self.signatures = set()
+        self.combinations: List[MenuCombination] = []
+        self.dedup_seconds = 0.0
+
+    @property
+    def done(self) -> bool:
+        return len(self.combinations) >= self.target or (self.cancelled is not None and self.cancelled())
+
+    def add(self, combination: List[int], totals: np.ndarray, fitness: float) -> bool:
+        """처음 보는 조합이면 저장하고 True를 반환합니다. (목표 개수를 채운 뒤에는 저장하지 않음)"""
+        dedup_start = time.perf_counter()
+        signature = self.catalog.signature(combination)
+        duplicate = signature in self.signatures
+        self.dedup_seconds += time.perf_counter() - dedup_start
+        if duplicate or len(self.combinations) >= self.target:
+            return False
+        self.signatures.add(signature)
+        menu = self.catalog.materialize(combination)
+        self.combinations.append(menu)
+        if self.on_found is not None:
+            self.on_found(menu)
+        return True
+
+
+_worker_services: Dict[str, GeneticService] = {}
+
+
+def _island_epoch_worker(db_path: str, targets: Dict, preference: Optional[int], generations: int, migration_size: int,
+                         population: np.ndarray, immigrants: Optional[np.ndarray], rng: np.random.Generator,
+                         reseed: bool, stall_generations: Optional[int], island: int, solution_queue, stop_event,
+                         flush_interval: float = 0.02):
+    """
+    프로세스 풀 워커: 프로세스마다 서비스를 한 번만 만들고 섬 하나의 에포크를 실행합니다.
+    찾은 조합은 flush_interval 간격으로 묶어 큐로 보내고, 그때마다 중단 신호를 확인합니다.
+    """
+    service = _worker_services.get(db_path)
+    if service is None:
+        service = _worker_services[db_path] = GeneticService(db_path, verbose=False)
+
+    pending = []
+    state = {'last_flush': time.monotonic(), 'stop': False}
+
+    def collect(combination: List[int], totals: np.ndarray, fitness: float) -> bool:
+        pending.append((combination, totals, fitness))
+        return True
+
+    def flush() -> None:
+        if pending:
+            solution_queue.put((island, list(pending)))
+            pending.clear()
+        state['stop'] = stop_event.is_set()
+        state['last_flush'] = time.monotonic()
+
+    def should_stop() -> bool:
+        if time.monotonic() - state['last_flush'] >= flush_interval:
+            flush()
+        return state['stop']
+
+    try:
+        return service._run_island_epoch(targets, preference, generations, migration_size, population, immigrants,
+                                         rng, reseed, collect, should_stop, stall_generations)
+    finally:
+        flush()
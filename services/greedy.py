@@ -1,43 +1,59 @@
-import pandas as pd
+import numpy as np
 import random
 import time
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Iterator, List, Dict, Optional, Tuple
 
 from models.user_info import UserInfo
+from models.menu_combination import MenuCombination
+from services.deadline import Deadline
+from services.food_catalog import FoodCatalog, ENERGY, PROTEIN
+from services.metrics import MetricsRegistry, silent, timed
+from services.result_cache import ResultCache
+from services.search_context import SearchContext
 
 
 class GreedyService:
-    def __init__(self, db_path: str):
-        self.df = self._load_nutrition_data(db_path)
-        if self.df is None:
-            raise FileNotFoundError(f"'{db_path}'에서 데이터를 불러오는 데 실패했습니다.")
-        self.food_list = self.df.to_dict('records')
-        print(f"전체 {len(self.food_list)}개 식품 데이터를 사용합니다.")
-
-    def _load_nutrition_data(self, file_path: str) -> Optional[pd.DataFrame]:
-        """Excel 파일에서 영양 데이터를 불러옵니다."""
-        try:
-            df = pd.read_excel(file_path)
-            required_cols = ['식품명', '분류', '에너지(kcal)', '단백질(g)', '지방(g)', '탄수화물(g)']
-            df = df[required_cols]
-            for col in required_cols[2:]:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # FutureWarning 수정을 위해 inplace=True 대신 재할당 방식 사용
-            df['분류'] = df['분류'].fillna('기타')
-            df = df.fillna(0)
-            
-            return df
-        except FileNotFoundError:
-            print(f"오류: '{file_path}' 경로에서 파일을 찾을 수 없습니다.")
-            return None
-        except Exception as e:
-            print(f"데이터를 불러오는 중 오류가 발생했습니다: {e}")
-            return None
+    def __init__(self, db_path: str, result_cache: Optional[ResultCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, verbose: bool = True):
+        """
+        metrics: 실행 통계와 구간별 시간(load, search, dedup)을 기록할 곳
+        verbose: False이면 진행 메시지를 출력하지 않습니다. (일괄 처리, 서버 워커 등)
+        """
+        self.db_path = db_path
+        self.result_cache = result_cache
+        self.metrics = metrics
+        self.log = print if verbose else silent
+        with timed(metrics, 'greedy.load'):
+            self.catalog = FoodCatalog.load(db_path)
+        with timed(metrics, 'greedy.init'):
+            # 에너지 오름차순(분류 색인의 by_energy 순서)으로 정렬한 영양소 행렬
+            # 남은 에너지 예산 안에 드는 후보가 항상 앞부분이 되므로, 매 단계 그 앞부분만 평가함
+            self.sorted_nutrients = self.catalog.nutrients[self.catalog.category_index.by_energy]
+            self.sorted_nutrients.flags.writeable = False
+        self.log(f"전체 {len(self.catalog)}개 식품 데이터를 사용합니다.")
+
+    def get_recommendations(self, user: UserInfo, num_combinations: int = 5, batch_size: Optional[int] = None,
+                            workers: Optional[int] = None, seed: Optional[int] = None,
+                            time_limit: Optional[float] = None, stats: Optional[Dict] = None) -> List[MenuCombination]:
+        """
+        사용자 정보에 기반하여 탐욕 알고리즘으로 음식 조합을 추천합니다. (iter_recommendations의 결과를 모두 모은 리스트)
+        """
+        return list(self.iter_recommendations(user, num_combinations, batch_size, workers, seed, time_limit, stats))
 
-    def get_recommendations(self, user: UserInfo, num_combinations: int = 5) -> List[Tuple[List[Dict], Dict]]:
+    def iter_recommendations(self, user: UserInfo, num_combinations: int = 5, batch_size: Optional[int] = None,
+                             workers: Optional[int] = None, seed: Optional[int] = None,
+                             time_limit: Optional[float] = None, stats: Optional[Dict] = None) -> Iterator[MenuCombination]:
         """
-        사용자 정보에 기반하여 탐욕 알고리즘으로 음식 조합을 추천합니다.
+        탐욕 알고리즘으로 찾은 고유한 조합을 찾는 대로 하나씩 내보냅니다.
+        필요한 만큼 읽은 뒤 생성기를 닫으면(close) 남은 시도를 하지 않습니다.
+
+        batch_size: 지정하면 그만큼의 시도를 2차원 상태로 묶어 한 번에 진행합니다. (배치 모드)
+        workers: 배치 모드에서 2 이상이면 배치들을 프로세스 풀에 나누어 실행합니다.
+        seed: 같은 seed를 주면 같은 결과를 반환합니다. (배치 모드는 workers 수와 무관)
+        time_limit: 탐색 시간 제한(초). 지나면 그때까지 찾은 조합까지만 내보내고 멈춥니다.
+        stats: 실행 통계(찾은 개수, 목표 개수를 채웠는지(satisfied), 시간 제한으로 멈췄는지(timed_out))를 받을 dict.
+            서비스 하나를 여러 스레드에서 함께 쓸 때는 요청마다 따로 넘깁니다. 결과 캐시에서 찾은 경우에는 채우지 않습니다.
         """
         # 목표 영양소를 3으로 나누어 한 끼 분량을 계산합니다.
         targets = {
@@ -46,149 +62,341 @@ class GreedyService:
             'fat': user.fat_required / 3,
             'carbs': user.carbon_required / 3 - 50
         }
+
+        # 결과 캐시를 쓰면 구간의 보수적인 경계로 양자화한 목표치로 탐색 (비슷한 요구량의 사용자끼리 결과 공유)
+        if self.result_cache is not None:
+            targets = self.result_cache.quantize(targets)
         
-        # 사용자 정보에서 1순위 선호도를 가져옵니다.
-        preference = user.preference[0].label if user.preference else None
+        # 사용자 정보에서 1순위 선호도를 가져옵니다. (카탈로그의 분류 코드로 비교)
+        preference = user.preference[0].code if user.preference else None
         
         if preference:
-            print(f"\n사용자 선호 음식(1순위): '{preference}' (선호도 점수 1.5배 적용)")
+            self.log(f"\n사용자 선호 음식(1순위): '{user.preference[0].label}' (선호도 점수 1.5배 적용)")
         else:
-            print("\n사용자 선호 음식이 설정되지 않았습니다.")
+            self.log("\n사용자 선호 음식이 설정되지 않았습니다.")
             
-        print("\n[한 끼 식사 목표 영양소]")
-        print(f"에너지 <= {targets['energy']:.2f}kcal, 단백질 >= {targets['protein']:.2f}g, 지방 >= {targets['fat']:.2f}g, 탄수화물 >= {targets['carbs']:.2f}g")
+        self.log("\n[한 끼 식사 목표 영양소]")
+        self.log(f"에너지 <= {targets['energy']:.2f}kcal, 단백질 >= {targets['protein']:.2f}g, 지방 >= {targets['fat']:.2f}g, 탄수화물 >= {targets['carbs']:.2f}g")
+
+        context = SearchContext(time_limit, seed, stats)
+
+        def compute() -> Iterator[MenuCombination]:
+            return self._iter_greedy_combinations(targets, num_combinations, preference, context,
+                                                  batch_size=batch_size, workers=workers)
 
-        return self._find_multiple_greedy_combinations(targets, num_combinations, preference)
+        if self.result_cache is None:
+            yield from compute()
+            return
+        # 시간 제한으로 멈춘 결과는 저장하지 않으므로 time_limit은 키에 넣지 않음
+        yield from self.result_cache.iter_or_compute('greedy', self.catalog, targets, preference,
+                                                     dict(num_combinations=num_combinations, batch_size=batch_size, seed=seed), compute,
+                                                     complete=lambda: not context.stats['timed_out'])
 
-    def _find_multiple_greedy_combinations(self, targets: Dict, num_combinations: int, preference: Optional[str]) -> List[Tuple[List[Dict], Dict]]:
+    def _iter_greedy_combinations(self, targets: Dict, num_combinations: int, preference: Optional[int],
+                                  context: SearchContext, batch_size: Optional[int] = None,
+                                  workers: Optional[int] = None) -> Iterator[MenuCombination]:
         """
-        Randomized Greedy 알고리즘을 여러 번 실행하여 다양한 조합을 찾습니다.
+        Randomized Greedy 알고리즘을 여러 번 실행하여 다양한 조합을 찾는 대로 내보냅니다.
+        시도 횟수(목표 개수의 10배)를 다 쓰거나 요청의 시간 제한이 지나면 멈춥니다.
         """
-        print(f"\n--- Randomized Greedy 알고리즘 ({num_combinations}개 조합 탐색) ---")
+        mode = f"배치 {batch_size}" if batch_size else "순차"
+        self.log(f"\n--- Randomized Greedy 알고리즘 ({num_combinations}개 조합 탐색, {mode}) ---")
         start_time = time.time()
+        deadline = context.deadline
+        seed = context.seed
 
-        found_combinations = []
+        found_count = 0
         found_signatures = set()
-
-        # 선호 음식 리스트 미리 필터링 (초기 선택용)
-        preferred_foods_indices = []
-        if preference:
-            preferred_foods_indices = [i for i, f in enumerate(self.food_list) if f.get('분류') == preference]
+        dedup_seconds = 0.0
 
         # 충분한 시도를 위해 반복 횟수 설정 (목표 개수의 10배 시도)
         max_attempts = num_combinations * 10
-        
+
+        if batch_size:
+            attempts = self._iter_batched_attempts(targets, preference, max_attempts, batch_size, workers, seed, deadline)
+        else:
+            attempts = self._iter_sequential_attempts(targets, preference, max_attempts, seed, deadline)
+
+        try:
+            for combination in attempts:
+                dedup_start = time.perf_counter()
+                signature = self.catalog.signature(combination)
+                is_new = signature not in found_signatures
+                dedup_seconds += time.perf_counter() - dedup_start
+                if is_new:
+                    found_signatures.add(signature)
+                    found_count += 1
+                    yield self.catalog.materialize(combination)
+                    if found_count >= num_combinations:
+                        break
+        finally:
+            # 배치 모드의 프로세스 풀은 생성기를 닫을 때 정리됩니다. (소비자가 중간에 멈춘 경우 포함)
+            attempts.close()
+
+            timed_out = found_count < num_combinations and deadline.reached
+            context.finish(
+                found=found_count,
+                satisfied=found_count >= num_combinations,
+                timed_out=timed_out,
+            )
+
+            if not found_count:
+                self.log("기준을 만족하는 조합을 찾지 못했습니다.")
+            else:
+                self.log(f"총 {found_count}개의 고유한 조합을 찾았습니다.")
+            if timed_out:
+                self.log(f"시간 제한({context.time_limit}초)으로 탐색을 멈췄습니다.")
+
+            end_time = time.time()
+            self.log(f"탐욕 알고리즘 총 실행 시간: {end_time - start_time:.4f}초")
+            if self.metrics is not None:
+                self.metrics.record_run('greedy', context.stats,
+                                        {'search': end_time - start_time, 'dedup': dedup_seconds})
+
+    def _iter_sequential_attempts(self, targets: Dict, preference: Optional[int], max_attempts: int,
+                                  seed: Optional[int], deadline: Optional[Deadline] = None) -> Iterator[List[int]]:
+        """
+        시도를 하나씩 실행하며 성공한 조합(음식 인덱스 리스트)을 내보냅니다. (deadline이 지나면 멈춤)
+        """
+        rng = random.Random(seed)
+        index = self.catalog.category_index
+
+        # 초기 선택 후보를 색인에서 조회 (목표 칼로리를 넘는 음식으로 시작한 시도는 바로 실패하므로 제외)
+        preferred_foods_indices = index.within(preference, targets['energy']).tolist() if preference else []
+        all_foods_indices = index.within(None, targets['energy']).tolist()
+        if not all_foods_indices:
+            return
+        preference_multiplier = self._preference_multiplier(preference)
+
         for attempt in range(max_attempts):
-            if len(found_combinations) >= num_combinations:
-                break
+            if deadline is not None and deadline.expired():
+                return
 
             # 초기 음식 선택 전략 (Seeding)
             initial_food_index = None
             
             # 70% 확률로 선호 음식 중 하나를 먼저 선택 (선호도가 있다면)
-            if preferred_foods_indices and random.random() < 0.7:
-                initial_food_index = random.choice(preferred_foods_indices)
+            if preferred_foods_indices and rng.random() < 0.7:
+                initial_food_index = rng.choice(preferred_foods_indices)
             # 30% 확률 (또는 선호도가 없을 때) 전체 중 랜덤 선택 (다양성 확보)
             else:
-                initial_food_index = random.randint(0, len(self.food_list) - 1)
+                initial_food_index = rng.choice(all_foods_indices)
 
-            combination, totals = self._find_one_combination_greedy(targets, preference, initial_food_index)
+            combination, totals = self._find_one_combination_greedy(targets, initial_food_index, rng,
+                                                                    preference_multiplier)
 
             if combination:
-                signature = tuple(sorted([f['식품명'] for f in combination]))
-                if signature not in found_signatures:
-                    found_signatures.add(signature)
-                    found_combinations.append((combination, totals))
+                yield combination
 
-        if not found_combinations:
-            print("기준을 만족하는 조합을 찾지 못했습니다.")
-        else:
-            print(f"총 {len(found_combinations)}개의 고유한 조합을 찾았습니다.")
+    def _iter_batched_attempts(self, targets: Dict, preference: Optional[int], max_attempts: int, batch_size: int,
+                               workers: Optional[int], seed: Optional[int],
+                               deadline: Optional[Deadline] = None) -> Iterator[List[int]]:
+        """
+        시도를 batch_size개씩 묶어 실행하며 성공한 조합을 시도 순서대로 내보냅니다.
+        배치마다 SeedSequence에서 파생한 시드를 쓰므로 workers 수와 관계없이 결과가 같습니다.
+        deadline은 배치 사이에 확인합니다.
+        """
+        batch_sizes = [min(batch_size, max_attempts - start) for start in range(0, max_attempts, batch_size)]
+        batch_seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
 
-        end_time = time.time()
-        print(f"탐욕 알고리즘 총 실행 시간: {end_time - start_time:.4f}초")
+        if not workers or workers <= 1:
+            for size, batch_seed in zip(batch_sizes, batch_seeds):
+                if deadline is not None and deadline.expired():
+                    return
+                rng = np.random.default_rng(batch_seed)
+                yield from self._run_greedy_batch(targets, preference, size, rng)
+            return
 
-        return found_combinations
+        # 워커 수만큼씩 배치를 제출하고, 제출 순서대로 결과를 합칩니다.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for wave in range(0, len(batch_sizes), workers):
+                futures = [pool.submit(_greedy_batch_worker, self.db_path, targets, preference, size, batch_seed)
+                           for size, batch_seed in zip(batch_sizes[wave:wave + workers], batch_seeds[wave:wave + workers])]
+                try:
+                    for future in futures:
+                        if deadline is not None and deadline.at is not None:
+                            # 마감까지만 기다리고, 넘으면 남은 배치는 취소
+                            wait([future], timeout=deadline.remaining())
+                            if not future.done() and deadline.expired():
+                                return
+                        yield from future.result()
+                finally:
+                    for future in futures:
+                        future.cancel()
 
-    def _find_one_combination_greedy(self, targets: Dict, preference: Optional[str], initial_food_index: int, preference_bonus: float = 1.5) -> Tuple[Optional[List[Dict]], Optional[Dict]]:
+    def _run_greedy_batch(self, targets: Dict, preference: Optional[int], batch_size: int, rng: np.random.Generator,
+                          preference_bonus: float = 1.5, top_k: int = 10) -> List[List[int]]:
+        """
+        batch_size개의 Randomized Greedy 시도를 동시에 진행합니다.
+        상태는 (시도 x 영양소) 합계와 (시도 x 음식) 선택 가능 마스크로 표현되며,
+        한 번의 벡터 연산이 진행 중인 모든 시도의 다음 음식을 고릅니다.
+        음식은 에너지 순 위치로 다루며, 매 단계 진행 중인 시도 중 가장 여유 있는 에너지 예산 안에 드는
+        앞부분의 음식만 열로 평가합니다.
+        반환값: 성공한 시도의 음식 인덱스 리스트 (시도 순서)
+        """
+        index = self.catalog.category_index
+        nutrients = self.sorted_nutrients
+        food_energy = nutrients[:, ENERGY]
+        food_macros = nutrients[:, PROTEIN:]
+        num_foods = len(self.catalog)
+        target_energy = targets['energy']
+        target_macros = np.array([targets['protein'], targets['fat'], targets['carbs']])
+        preference_multiplier = self._preference_multiplier(preference, preference_bonus)
+
+        # 초기 음식 선택: 목표 칼로리 이하인 음식 중 70% 확률로 선호 음식, 나머지는 전체 중 랜덤
+        affordable = index.affordable(target_energy)
+        if not affordable:
+            return []
+        initial_foods = rng.integers(affordable, size=batch_size)
+        if preference:
+            preferred = index.rank[index.within(preference, target_energy)]
+            if preferred.size:
+                use_preferred = rng.random(batch_size) < 0.7
+                initial_foods[use_preferred] = preferred[rng.integers(preferred.size, size=int(use_preferred.sum()))]
+
+        attempt_ids = np.arange(batch_size)
+        current = nutrients[initial_foods].copy()
+        available = np.ones((batch_size, num_foods), dtype=bool)
+        available[attempt_ids, initial_foods] = False
+        selected = [[int(food)] for food in initial_foods]
+        succeeded = np.zeros(batch_size, dtype=bool)
+        active = attempt_ids
+
+        while active.size:
+            deficit = current[active, PROTEIN:] < target_macros
+            finished = ~deficit.any(axis=1)
+            succeeded[active[finished]] = True
+            active, deficit = active[~finished], deficit[~finished]
+            if not active.size:
+                break
+
+            # 부족한 영양소만 목표 대비 비율로 가중 (부족한 영양소의 목표는 항상 양수)
+            weights = np.divide(1.0, target_macros, out=np.zeros(deficit.shape), where=deficit)
+            width = index.affordable(target_energy - current[active, ENERGY].min())
+            scores = weights @ food_macros[:width].T
+            if preference_multiplier is not None:
+                scores *= preference_multiplier[:width]
+
+            feasible = (available[active, :width]
+                        & (current[active, ENERGY][:, None] + food_energy[:width] <= target_energy)
+                        & (scores > 0))
+            scores[~feasible] = 0.0
+
+            # 후보가 없는 시도는 실패로 종료
+            alive = feasible.any(axis=1)
+            active, scores = active[alive], scores[alive]
+            if not active.size:
+                break
+
+            # 시도별 상위 k개 후보 중 점수 가중 랜덤 선택 (불가능 후보는 가중치 0)
+            k = min(top_k, width)
+            if width > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(width), scores.shape)
+            cumulative = np.take_along_axis(scores, top, axis=1).cumsum(axis=1)
+            draws = rng.random(active.size) * cumulative[:, -1]
+            picks = top[np.arange(active.size), np.argmax(cumulative > draws[:, None], axis=1)]
+
+            current[active] += nutrients[picks]
+            available[active, picks] = False
+            for attempt, food in zip(active.tolist(), picks.tolist()):
+                selected[attempt].append(food)
+
+        by_energy = index.by_energy
+        return [by_energy[selected[attempt]].tolist() for attempt in np.flatnonzero(succeeded).tolist()]
+
+    def _preference_multiplier(self, preference: Optional[int], preference_bonus: float = 1.5) -> Optional[np.ndarray]:
+        """선호 분류 음식의 점수 배율 (선호도 보너스, 에너지 순 위치 기준). 선호가 없으면 None"""
+        if not preference:
+            return None
+        index = self.catalog.category_index
+        return np.where(index.mask(preference)[index.by_energy], preference_bonus, 1.0)
+
+    def _find_one_combination_greedy(self, targets: Dict, initial_food_index: int, rng: random.Random,
+                                     preference_multiplier: Optional[np.ndarray] = None,
+                                     top_k: int = 10) -> Tuple[Optional[List[int]], Optional[np.ndarray]]:
         """
         탐욕 알고리즘으로 하나의 음식 조합을 찾습니다.
         initial_food_index: 처음에 강제로 포함할 음식의 인덱스
+        rng: 요청마다 만든 난수 생성기 (전역 random 상태는 쓰지 않음)
+        preference_multiplier: 선호 분류 음식의 점수 배율 (_preference_multiplier, 요청마다 한 번 만듦)
+        반환값: (선택된 음식 인덱스 리스트, 영양소 합계 배열)
+
+        음식은 에너지 순 위치로 다룹니다. 매 단계 색인에서 남은 에너지 예산 안에 드는 앞부분을 조회하고,
+        그 후보들만 마스크 연산으로 한 번에 평가합니다.
         """
-        current_nutrition = {'energy': 0, 'protein': 0, 'fat': 0, 'carbs': 0}
+        index = self.catalog.category_index
+        nutrients = self.sorted_nutrients
+        food_macros = nutrients[:, PROTEIN:]
+        target_energy = targets['energy']
+        target_macros = np.array([targets['protein'], targets['fat'], targets['carbs']])
+
         selected_foods = []
-        available_indices = set(range(len(self.food_list)))
+        available = np.ones(len(self.catalog), dtype=bool)
 
         # 1. 초기 음식 추가
-        first_food = self.food_list[initial_food_index]
-        
         # 초기 음식이 목표 칼로리를 넘으면 실패 처리
-        if first_food['에너지(kcal)'] > targets['energy']:
+        initial = int(index.rank[initial_food_index])
+        if nutrients[initial, ENERGY] > target_energy:
             return None, None
-            
-        selected_foods.append(first_food)
-        current_nutrition['energy'] += first_food['에너지(kcal)']
-        current_nutrition['protein'] += first_food['단백질(g)']
-        current_nutrition['fat'] += first_food['지방(g)']
-        current_nutrition['carbs'] += first_food['탄수화물(g)']
-        available_indices.remove(initial_food_index)
+
+        selected_foods.append(initial)
+        current_nutrition = nutrients[initial].copy()
+        available[initial] = False
 
         # 2. 나머지 음식 채우기
-        while (current_nutrition['protein'] < targets['protein'] or
-               current_nutrition['fat'] < targets['fat'] or
-               current_nutrition['carbs'] < targets['carbs']):
-
-            candidates = []
-            for i in available_indices:
-                food = self.food_list[i]
-                # 칼로리 초과 시 후보에서 제외
-                if current_nutrition['energy'] + food['에너지(kcal)'] > targets['energy']:
-                    continue
-
-                # 점수 계산: 부족한 영양소를 채우는 데 얼마나 기여하는가?
-                score = 0
-                if current_nutrition['protein'] < targets['protein']:
-                    score += food['단백질(g)'] / targets['protein']
-                if current_nutrition['fat'] < targets['fat']:
-                    score += food['지방(g)'] / targets['fat']
-                if current_nutrition['carbs'] < targets['carbs']:
-                    score += food['탄수화물(g)'] / targets['carbs']
-
-                # 선호도 보너스 적용
-                if preference and food.get('분류') == preference:
-                    score *= preference_bonus
-
-                if score > 0:
-                    candidates.append((score, i))
-
-            if not candidates:
+        while True:
+            deficit = current_nutrition[PROTEIN:] < target_macros
+            if not deficit.any():
+                break
+
+            # 점수 계산: 부족한 영양소를 채우는 데 얼마나 기여하는가? (목표 대비 비율의 합)
+            # 부족한 영양소는 현재값(>= 0)보다 목표가 크므로 목표로 나누어도 안전합니다.
+            weights = np.zeros(3)
+            weights[deficit] = 1.0 / target_macros[deficit]
+            # 칼로리를 초과하는 음식은 평가하지 않음 (남은 예산 이하인 에너지 순 앞부분만)
+            width = index.affordable(target_energy - current_nutrition[ENERGY])
+            scores = food_macros[:width] @ weights
+
+            # 선호도 보너스 적용
+            if preference_multiplier is not None:
+                scores *= preference_multiplier[:width]
+
+            # 이미 고른 음식, 기여도 없는 음식은 후보에서 제외
+            feasible = available[:width] & (scores > 0)
+            candidates = np.flatnonzero(feasible)
+
+            if candidates.size == 0:
                 # 더 이상 추가할 수 있는 음식이 없으면 종료
                 return None, None
 
-            # 점수가 높은 상위 10개 후보 중 하나를 무작위로 선택 (다양성 확보를 위해 후보군 확대)
-            candidates.sort(key=lambda x: x[0], reverse=True)
-            top_candidates = candidates[:10]
+            # 점수가 높은 상위 10개 후보 중 하나를 무작위로 선택 (전체 정렬 대신 argpartition)
+            if candidates.size > top_k:
+                top = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+                candidates = candidates[top]
             
             # 가중치 랜덤 선택 (점수가 높을수록 뽑힐 확률 높음)
-            scores = [c[0] for c in top_candidates]
-            indices = [c[1] for c in top_candidates]
-            best_food_index = random.choices(indices, weights=scores, k=1)[0]
+            best_food_index = rng.choices(candidates.tolist(), weights=scores[candidates].tolist(), k=1)[0]
 
-            best_food = self.food_list[best_food_index]
-            selected_foods.append(best_food)
+            selected_foods.append(best_food_index)
 
             # 영양 정보 업데이트
-            current_nutrition['energy'] += best_food['에너지(kcal)']
-            current_nutrition['protein'] += best_food['단백질(g)']
-            current_nutrition['fat'] += best_food['지방(g)']
-            current_nutrition['carbs'] += best_food['탄수화물(g)']
-
-            available_indices.remove(best_food_index)
-
-        # 최종적으로 목표 영양소를 만족하는지 확인
-        if (current_nutrition['protein'] >= targets['protein'] and
-                current_nutrition['fat'] >= targets['fat'] and
-                current_nutrition['carbs'] >= targets['carbs']):
-            return selected_foods, current_nutrition
-        else:
-            return None, None
+            current_nutrition += nutrients[best_food_index]
+
+            available[best_food_index] = False
+
+        # 반복문은 모든 영양소 목표를 만족했을 때만 정상 종료됩니다.
+        return index.by_energy[selected_foods].tolist(), current_nutrition
+
+
+_worker_services: Dict[str, GreedyService] = {}
+
+
+def _greedy_batch_worker(db_path: str, targets: Dict, preference: Optional[int], batch_size: int,
+                         seed: np.random.SeedSequence) -> List[List[int]]:
+    """프로세스 풀 워커: 프로세스마다 서비스를 한 번만 만들고 배치 하나를 실행합니다."""
+    service = _worker_services.get(db_path)
+    if service is None:
+        service = _worker_services[db_path] = GreedyService(db_path, verbose=False)
+    return service._run_greedy_batch(targets, preference, batch_size, np.random.default_rng(seed))
@@ -0,0 +1,227 @@
+import numpy as np
+import time
+from typing import Iterator, List, Dict, Optional
+
+from models.user_info import UserInfo
+from models.menu_combination import MenuCombination
+from services.food_catalog import FoodCatalog, ENERGY, PROTEIN, FAT, CARBS
+from services.metrics import MetricsRegistry, silent, timed
+from services.result_cache import ResultCache
+from services.search_context import SearchContext
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import csr_matrix
+except ImportError:  # scipy는 정수 계획법 모드에서만 필요
+    milp = None
+
+
+class IlpService:
+    MAX_MENU_ITEMS = 6  # 메뉴 개수 제한 (백트래킹과 같은 문제)
+    FEASIBILITY_TOLERANCE = 1e-6  # 솔버 허용 오차를 넘는 해는 버림
+
+    def __init__(self, db_path: str, result_cache: Optional[ResultCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, verbose: bool = True):
+        """
+        metrics: 실행 통계(풀이 횟수, 종료 사유 포함)와 구간별 시간(load, init, search, dedup)을 기록할 곳
+        verbose: False이면 진행 메시지를 출력하지 않습니다. (일괄 처리, 서버 워커 등)
+        """
+        if milp is None:
+            raise ImportError("정수 계획법 모드에는 scipy(>=1.9)가 필요합니다. 'pip install scipy'로 설치해주세요.")
+        self.db_path = db_path
+        self.result_cache = result_cache
+        self.metrics = metrics
+        self.log = print if verbose else silent
+        with timed(metrics, 'ilp.load'):
+            self.catalog = FoodCatalog.load(db_path)
+        with timed(metrics, 'ilp.init'):
+            # 변수로 쓰는 음식 (에너지가 0보다 큰 음식의 카탈로그 인덱스, 요청 사이에 공유하므로 읽기 전용)
+            self.food_indices = np.flatnonzero(self.catalog.nutrients[:, ENERGY] > 0)
+            self.food_indices.flags.writeable = False
+        self.log(f"전체 {len(self.food_indices)}개 식품 데이터를 사용합니다. (정수 계획법용)")
+
+    def get_recommendations(self, user: UserInfo, num_combinations: int = 5, time_limit: Optional[float] = 10.0,
+                            objective: str = 'preference', stats: Optional[Dict] = None) -> List[MenuCombination]:
+        """
+        사용자 정보에 기반하여 0/1 정수 계획법(MILP)으로 음식 조합을 추천합니다. (iter_recommendations의 결과를 모두 모은 리스트)
+        """
+        return list(self.iter_recommendations(user, num_combinations, time_limit, objective, stats))
+
+    def iter_recommendations(self, user: UserInfo, num_combinations: int = 5, time_limit: Optional[float] = 10.0,
+                             objective: str = 'preference', stats: Optional[Dict] = None) -> Iterator[MenuCombination]:
+        """
+        0/1 정수 계획법(MILP)으로 찾은 조합을 풀이마다 하나씩 내보냅니다.
+        생성기를 닫으면 다음 풀이를 시작하지 않습니다.
+        백트래킹과 같은 조건(에너지 <= 상한, 단백질/지방/탄수화물 >= 최소 기준, 최대 MAX_MENU_ITEMS개)을
+        정확히 풀며, 찾은 조합을 포함하는 메뉴를 금지하는 no-good cut을 더해가며 서로 다른 조합을 나열합니다.
+
+        time_limit: 전체 탐색 시간 제한(초). 시간이 다 되면 그때까지 찾은 조합까지만 내보냅니다. (None이면 제한 없음)
+        objective: 'preference'이면 선호 음식 개수를 먼저, 에너지 활용률(에너지 합/상한)을 다음으로 최대화하고,
+            'energy'이면 에너지 활용률만 최대화합니다.
+        stats: 실행 통계(풀이 횟수, 최적성 증명 여부, 목표 개수를 채웠는지(satisfied), 시간 제한으로 멈췄는지(timed_out) 등)를
+            받을 dict. 서비스 하나를 여러 스레드에서 함께 쓸 때는 요청마다 따로 넘깁니다. 결과 캐시에서 찾은 경우에는 채우지 않습니다.
+        """
+        # 목표치 설정 (백트래킹과 동일)
+        targets = {
+            'energy': user.calories_required / 3 + 200,
+            'protein': user.protein_required / 3 * 0.8,
+            'fat': user.fat_required / 3 * 0.8,
+            'carbs': user.carbon_required / 3 * 0.8
+        }
+
+        # 결과 캐시를 쓰면 구간의 보수적인 경계로 양자화한 목표치로 탐색 (비슷한 요구량의 사용자끼리 결과 공유)
+        if self.result_cache is not None:
+            targets = self.result_cache.quantize(targets)
+
+        preference = user.preference[0].code if user.preference else None
+
+        if preference:
+            self.log(f"\n[ILP] 사용자 선호 음식(1순위): '{user.preference[0].label}'")
+        else:
+            self.log("\n[ILP] 사용자 선호 음식이 설정되지 않았습니다.")
+
+        self.log("\n[한 끼 식사 목표 영양소 (최소 기준)]")
+        self.log(
+            f"에너지 <= {targets['energy']:.2f}kcal, 단백질 >= {targets['protein']:.2f}g, 지방 >= {targets['fat']:.2f}g, 탄수화물 >= {targets['carbs']:.2f}g")
+
+        context = SearchContext(time_limit, stats=stats)
+
+        def compute() -> Iterator[MenuCombination]:
+            return self._iter_combinations_ilp(targets, num_combinations, preference, context, objective)
+
+        if self.result_cache is None:
+            yield from compute()
+            return
+        # 시간 제한으로 멈춘 결과는 저장하지 않으므로 time_limit은 키에 넣지 않음
+        yield from self.result_cache.iter_or_compute('ilp', self.catalog, targets, preference,
+                                                     dict(num_combinations=num_combinations, objective=objective), compute,
+                                                     complete=lambda: not context.stats['timed_out'])
+
+    def _iter_combinations_ilp(self, targets: Dict, num_combinations: int, preference: Optional[int],
+                               context: SearchContext, objective: str) -> Iterator[MenuCombination]:
+        """
+        no-good cut으로 조합을 하나씩 나열하며 찾는 대로 내보냅니다.
+        조합 S를 찾으면 sum(x_i, i in S) <= |S| - 1 을 추가하여 S와 S를 포함하는 메뉴를 다시 고르지 않게 합니다.
+        """
+        time_limit = context.time_limit
+        self.log(f"\n--- ILP ({num_combinations}개 조합 탐색, 제한 시간 {time_limit}초) ---")
+        start_time = time.time()
+        deadline = context.deadline
+
+        c = self._objective(targets, preference, objective)
+        base_constraints = self._base_constraints(targets)
+        integrality = np.ones(len(self.food_indices))
+        bounds = Bounds(0, 1)
+
+        found_count = 0
+        found_signatures = set()
+        dedup_seconds = 0.0
+        cut_rows: List[np.ndarray] = []
+        solves = 0
+        proven_optimal = 0
+        status = 'stopped'  # 소비자가 생성기를 중간에 닫은 경우
+
+        try:
+            while found_count < num_combinations:
+                if deadline.expired():
+                    status = 'time_limit'
+                    break
+
+                constraints = list(base_constraints)
+                if cut_rows:
+                    constraints.append(self._cut_constraint(cut_rows))
+                result = milp(c, constraints=constraints, integrality=integrality, bounds=bounds,
+                              options={'time_limit': deadline.remaining()} if time_limit is not None else None)
+                solves += 1
+
+                if result.x is None:
+                    # 2: 가능한 해가 더 없음 (모든 조합을 나열함), 1: 시간 제한 안에 해를 찾지 못함
+                    status = 'exhausted' if result.status == 2 else 'time_limit'
+                    break
+
+                chosen = np.flatnonzero(result.x > 0.5)
+                combination = self.food_indices[chosen].tolist()
+                cut_rows.append(chosen)
+                proven_optimal += result.status == 0
+
+                if not self._is_feasible(combination, targets):
+                    continue
+                # 중복 조합 방지 (같은 식품명으로 이루어진 조합)
+                dedup_start = time.perf_counter()
+                signature = self.catalog.signature(combination)
+                duplicate = signature in found_signatures
+                dedup_seconds += time.perf_counter() - dedup_start
+                if duplicate:
+                    continue
+                found_signatures.add(signature)
+                found_count += 1
+                if result.status != 0:
+                    # 시간 제한으로 최적성은 증명되지 않았지만 가능한 해는 받아들이고 종료
+                    status = 'time_limit'
+                yield self.catalog.materialize(combination)
+                if status == 'time_limit':
+                    break
+            else:
+                status = 'done'
+        finally:
+            end_time = time.time()
+            context.finish(
+                solves=solves,
+                proven_optimal=proven_optimal,
+                found=found_count,
+                status=status,
+                satisfied=found_count >= num_combinations,
+                timed_out=status == 'time_limit' and found_count < num_combinations,
+            )
+
+            if not found_count:
+                self.log("기준을 만족하는 조합을 찾지 못했습니다.")
+                if status == 'exhausted':
+                    self.log("기준을 만족하는 조합이 존재하지 않습니다. (목표 영양소나 칼로리 제한을 확인해주세요)")
+            else:
+                self.log(f"총 {found_count}개의 조합을 발견했습니다.")
+                if status == 'exhausted':
+                    self.log("기준을 만족하는 조합을 모두 찾았습니다.")
+
+            self.log(f"ILP 총 실행 시간: {end_time - start_time:.4f}초 (풀이 횟수: {solves}, 종료 사유: {status})")
+            if self.metrics is not None:
+                self.metrics.record_run('ilp', context.stats,
+                                        {'search': end_time - start_time, 'dedup': dedup_seconds})
+
+    def _objective(self, targets: Dict, preference: Optional[int], objective: str) -> np.ndarray:
+        """milp는 최소화 문제이므로 최대화할 점수에 -1을 곱한 계수를 반환합니다."""
+        nutrients = self.catalog.nutrients[self.food_indices]
+        # 에너지 활용률: 메뉴 전체 합이 1 이하이므로 선호 음식 1개의 가중치(1)보다 항상 작음
+        score = nutrients[:, ENERGY] / max(targets['energy'], 1e-9)
+        if objective == 'preference':
+            if preference is not None:
+                score = score + self.catalog.category_index.mask(preference)[self.food_indices]
+        elif objective != 'energy':
+            raise ValueError(f"알 수 없는 목적 함수입니다: {objective}")
+        return -score
+
+    def _base_constraints(self, targets: Dict) -> List['LinearConstraint']:
+        """에너지 상한, 영양소 최소 기준, 메뉴 개수(1 ~ MAX_MENU_ITEMS) 제약입니다."""
+        nutrients = self.catalog.nutrients[self.food_indices]
+        return [
+            LinearConstraint(nutrients[:, ENERGY], -np.inf, targets['energy']),
+            LinearConstraint(nutrients[:, [PROTEIN, FAT, CARBS]].T,
+                             [targets['protein'], targets['fat'], targets['carbs']], np.inf),
+            LinearConstraint(np.ones(len(self.food_indices)), 1, self.MAX_MENU_ITEMS),
+        ]
+
+    def _cut_constraint(self, cut_rows: List[np.ndarray]) -> 'LinearConstraint':
+        """찾은 조합마다 sum(x_i, i in S) <= |S| - 1 인 no-good cut (희소 행렬)."""
+        row_ids = np.repeat(np.arange(len(cut_rows)), [len(row) for row in cut_rows])
+        columns = np.concatenate(cut_rows)
+        matrix = csr_matrix((np.ones(len(columns)), (row_ids, columns)),
+                            shape=(len(cut_rows), len(self.food_indices)))
+        upper = np.array([len(row) - 1 for row in cut_rows], dtype=np.float64)
+        return LinearConstraint(matrix, -np.inf, upper)
+
+    def _is_feasible(self, combination: List[int], targets: Dict) -> bool:
+        """솔버 허용 오차로 기준을 살짝 벗어난 해를 걸러냅니다."""
+        energy, protein, fat, carbs = self.catalog.totals(combination).tolist()
+        tol = self.FEASIBILITY_TOLERANCE
+        return (0 < len(combination) <= self.MAX_MENU_ITEMS and energy <= targets['energy'] + tol and
+                protein >= targets['protein'] - tol and fat >= targets['fat'] - tol and carbs >= targets['carbs'] - tol)
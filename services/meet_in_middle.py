@@ -0,0 +1,321 @@
+import numpy as np
+import time
+from typing import Iterator, List, Dict, Optional, Tuple
+
+from models.user_info import UserInfo
+from models.menu_combination import MenuCombination
+from services.food_catalog import FoodCatalog, ENERGY, PROTEIN, targets_to_array
+from services.metrics import MetricsRegistry, silent, timed
+from services.pair_index import PairSumIndex
+from services.result_cache import ResultCache
+from services.search_context import SearchContext
+
+
+class MeetInMiddleService:
+    MAX_MENU_ITEMS = 6  # 쌍 + 쌍 + 쌍으로 만들 수 있는 최대 메뉴 개수 (백트래킹, 정수 계획법과 같음)
+    MAX_MIDDLES_PER_LEFT = 64  # 5~6개 메뉴에서 왼쪽 항목 하나당 살펴볼 가운데 쌍의 최대 개수
+    INDEX_HEADROOM = 1.25  # 색인을 넓힐 때 요청한 에너지 상한보다 여유 있게 만드는 비율
+    BOUND_SLACK = 1e-6
+
+    def __init__(self, db_path: str, result_cache: Optional[ResultCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, verbose: bool = True):
+        """
+        metrics: 실행 통계(왼쪽 항목 조회 수 포함)와 구간별 시간(load, init, search, dedup)을 기록할 곳
+        verbose: False이면 진행 메시지를 출력하지 않습니다. (일괄 처리, 서버 워커 등)
+        """
+        self.db_path = db_path
+        self.result_cache = result_cache
+        self.metrics = metrics
+        self.log = print if verbose else silent
+        with timed(metrics, 'pairs.load'):
+            self.catalog = FoodCatalog.load(db_path)
+        with timed(metrics, 'pairs.init'):
+            self.index = PairSumIndex.load(self.catalog, db_path)
+        self.log(f"전체 {len(self.index.foods)}개 식품, {len(self.index)}개 음식 쌍 색인을 사용합니다. (쌍 색인용)")
+
+    def get_recommendations(self, user: UserInfo, num_combinations: int = 5, per_left: int = 3,
+                            seed: Optional[int] = None, time_limit: Optional[float] = None,
+                            stats: Optional[Dict] = None) -> List[MenuCombination]:
+        """
+        사용자 정보에 기반하여 음식 쌍 색인으로 최대 6개짜리 음식 조합을 추천합니다. (iter_recommendations의 결과를 모두 모은 리스트)
+        """
+        return list(self.iter_recommendations(user, num_combinations, per_left, seed, time_limit, stats))
+
+    def iter_recommendations(self, user: UserInfo, num_combinations: int = 5, per_left: int = 3,
+                             seed: Optional[int] = None, time_limit: Optional[float] = None,
+                             stats: Optional[Dict] = None) -> Iterator[MenuCombination]:
+        """
+        음식 쌍 색인으로 찾은 최대 6개짜리 음식 조합을 찾는 대로 하나씩 내보냅니다.
+        백트래킹과 같은 조건(에너지 <= 상한, 단백질/지방/탄수화물 >= 최소 기준)을 깊이 우선 탐색 대신
+        '음식 하나 또는 쌍'(왼쪽)과 '에너지 순으로 정렬된 쌍'(오른쪽, 5~6개면 가운데 쌍 + 오른쪽 쌍)의 범위 조회로 찾습니다.
+        왼쪽 항목마다 받아들이는 조합 수와 살펴보는 가운데 쌍 수를 제한하므로 모든 조합을 나열하지는 않습니다.
+
+        per_left: 왼쪽 항목 하나당 받아들일 최대 조합 수 (같은 음식이 반복되는 조합이 몰리지 않도록)
+        seed: 같은 seed를 주면 같은 결과를 반환합니다.
+        time_limit: 탐색 시간 제한(초). 지나면 그때까지 찾은 조합까지만 내보내고 멈춥니다.
+        stats: 실행 통계(찾은 개수, 목표 개수를 채웠는지(satisfied), 시간 제한으로 멈췄는지(timed_out), 왼쪽 항목 조회 수,
+            종료 사유(status))를 받을 dict. status는 'done'(목표 개수를 채움), 'exhausted'(위 제한 안의 탐색 공간을 모두 살펴봄),
+            'index_limit'(살펴봤지만 색인이 MAX_PAIRS로 잘려 에너지 상한까지 덮지 못함), 'time_limit', 'stopped'(소비자가 닫음)입니다.
+            서비스 하나를 여러 스레드에서 함께 쓸 때는 요청마다 따로 넘깁니다. 결과 캐시에서 찾은 경우에는 채우지 않습니다.
+        """
+        # 목표치 설정 (백트래킹과 동일)
+        targets = {
+            'energy': user.calories_required / 3 + 200,
+            'protein': user.protein_required / 3 * 0.8,
+            'fat': user.fat_required / 3 * 0.8,
+            'carbs': user.carbon_required / 3 * 0.8
+        }
+
+        # 결과 캐시를 쓰면 구간의 보수적인 경계로 양자화한 목표치로 탐색 (비슷한 요구량의 사용자끼리 결과 공유)
+        if self.result_cache is not None:
+            targets = self.result_cache.quantize(targets)
+
+        preference = user.preference[0].code if user.preference else None
+
+        if preference:
+            self.log(f"\n[Pair Index] 사용자 선호 음식(1순위): '{user.preference[0].label}'")
+        else:
+            self.log("\n[Pair Index] 사용자 선호 음식이 설정되지 않았습니다.")
+
+        self.log("\n[한 끼 식사 목표 영양소 (최소 기준)]")
+        self.log(
+            f"에너지 <= {targets['energy']:.2f}kcal, 단백질 >= {targets['protein']:.2f}g, 지방 >= {targets['fat']:.2f}g, 탄수화물 >= {targets['carbs']:.2f}g")
+
+        context = SearchContext(time_limit, seed, stats)
+
+        def compute() -> Iterator[MenuCombination]:
+            return self._iter_combinations(targets, num_combinations, preference, per_left, context)
+
+        if self.result_cache is None:
+            yield from compute()
+            return
+        # 시간 제한으로 멈춘 결과는 저장하지 않으므로 time_limit은 키에 넣지 않음
+        yield from self.result_cache.iter_or_compute('meet_in_middle', self.catalog, targets, preference,
+                                                     dict(num_combinations=num_combinations, per_left=per_left, seed=seed), compute,
+                                                     complete=lambda: not context.stats['timed_out'])
+
+    def _iter_combinations(self, targets: Dict, num_combinations: int, preference: Optional[int],
+                           per_left: int, context: SearchContext) -> Iterator[MenuCombination]:
+        """
+        메뉴 크기 순으로 조합을 찾는 대로 내보냅니다.
+        1~2개: 음식 하나/쌍 하나로 기준을 채우는 메뉴, 3개: 음식 하나 + 쌍, 4개: 쌍 + 쌍,
+        5개: 음식 하나 + 쌍 + 쌍, 6개: 쌍 + 쌍 + 쌍 (가운데 쌍은 왼쪽 항목마다 필요할 때 골라, 세 쌍을 미리 만들지 않음)
+        왼쪽 항목은 선호 음식이 많은 것부터(같은 개수 안에서는 무작위) 살펴봅니다.
+        """
+        self.log(f"\n--- 쌍 색인 탐색 ({num_combinations}개 조합 탐색) ---")
+        start_time = time.time()
+        deadline = context.deadline
+
+        cap = targets['energy']
+        index = self._index_for(cap)
+        rng = np.random.default_rng(context.seed)
+        minimums = targets_to_array(targets)[PROTEIN:]
+        # 가지치기 기준: 최소 기준과 그 열량 환산 (반올림 오차로 경계의 조합을 자르지 않도록 여유를 둠)
+        bound_need = PairSumIndex.with_macro(minimums) - self.BOUND_SLACK
+        nutrients = self.catalog.nutrients[index.foods]
+        preferred = (self.catalog.category_index.mask(preference)[index.foods] if preference is not None
+                     else np.zeros(len(index.foods), dtype=bool))
+
+        found_signatures = set()
+
+        def collect(members: List[int]) -> Optional[MenuCombination]:
+            """처음 보는 유효한 조합이면 MenuCombination을 반환합니다."""
+            # 중복 조합 방지 (같은 음식 집합이 여러 방식으로 나뉘어 발견될 수 있음)
+            combination = index.foods[members].tolist()
+            dedup_start = time.perf_counter()
+            signature = self.catalog.signature(combination)
+            duplicate = signature in found_signatures
+            stats['dedup_seconds'] += time.perf_counter() - dedup_start
+            if duplicate:
+                return None
+            # 부분합을 나누어 더한 값은 경계에서 반올림 오차가 있을 수 있으므로 최종 합계로 다시 확인
+            totals = self.catalog.totals(combination)
+            if totals[ENERGY] <= cap and np.all(totals[PROTEIN:] >= minimums):
+                found_signatures.add(signature)
+                return self.catalog.materialize(combination)
+            return None
+
+        def candidates() -> Iterator[List[int]]:
+            # 1~2개짜리 메뉴
+            single_hits = np.flatnonzero((nutrients[:, ENERGY] <= cap) & np.all(nutrients[:, PROTEIN:] >= minimums, axis=1))
+            for pos in single_hits[self._preferred_first(preferred[single_hits], rng)]:
+                yield [pos]
+            pair_hits = np.flatnonzero(np.all(index.sums[:pair_count, PROTEIN:] >= minimums, axis=1))
+            pair_preferred = preferred[index.first[pair_hits]].astype(np.int8) + preferred[index.second[pair_hits]]
+            for pos in pair_hits[self._preferred_first(pair_preferred, rng)]:
+                yield [index.first[pos], index.second[pos]]
+
+            # 3개: 음식 하나(왼쪽) + 쌍(오른쪽), 4개: 쌍(왼쪽) + 쌍(오른쪽)
+            # 5개: 음식 하나(왼쪽) + 쌍 + 쌍, 6개: 쌍(왼쪽) + 쌍 + 쌍
+            # 남은 에너지 안의 쌍으로 얻을 수 있는 상한(pairs_bound)으로도 기준에 닿지 않는 왼쪽 항목은 한 번에 걸러냄
+            single_members = np.arange(len(nutrients))[:, None]
+            pair_members = np.column_stack([index.first[:pair_count], index.second[:pair_count]])
+            lefts = ((single_members, nutrients, preferred.astype(np.int8)),
+                     (pair_members, index.sums[:pair_count], preferred[pair_members].sum(axis=1)))
+            for num_pairs in (1, 2):
+                for members, left_sums, left_preferred in lefts:
+                    left_values = PairSumIndex.with_macro(left_sums[:, PROTEIN:])
+                    left_room = cap - left_sums[:, ENERGY]
+                    counts = index.count_within(left_room)
+                    viable = np.flatnonzero((counts >= num_pairs) & np.all(
+                        index.pairs_bound(counts, left_room, num_pairs) + left_values >= bound_need, axis=1))
+                    for pos in viable[self._preferred_first(left_preferred[viable], rng)]:
+                        # 조합을 찾지 못하는 왼쪽 항목이 이어져도 시간 제한을 지키도록 항목마다 확인
+                        if deadline.expired():
+                            return
+                        stats['lefts_checked'] += 1
+                        left = members[pos].tolist()
+                        if num_pairs == 1:
+                            for right in self._match_right(index, left_sums[pos], left_values[pos], left,
+                                                           int(counts[pos]), minimums, bound_need, per_left):
+                                yield [*left, index.first[right], index.second[right]]
+                        else:
+                            for middle, right in self._match_middle_right(index, left_sums[pos], left_values[pos], left,
+                                                                          int(counts[pos]), cap, minimums, bound_need,
+                                                                          per_left):
+                                yield [*left, index.first[middle], index.second[middle],
+                                       index.first[right], index.second[right]]
+
+        pair_count = int(index.count_within(cap))
+        stats = {'lefts_checked': 0, 'dedup_seconds': 0.0}
+        found_count = 0
+        status = 'stopped'  # 소비자가 생성기를 중간에 닫은 경우
+        try:
+            if num_combinations > 0:
+                for members in candidates():
+                    if deadline.expired():
+                        status = 'time_limit'
+                        break
+                    combination = collect(members)
+                    if combination is None:
+                        continue
+                    found_count += 1
+                    yield combination
+                    if found_count >= num_combinations:
+                        status = 'done'
+                        break
+                else:
+                    if deadline.expired():
+                        status = 'time_limit'
+                    else:
+                        status = 'exhausted' if cap <= index.covered_energy else 'index_limit'
+            else:
+                status = 'done'
+        finally:
+            end_time = time.time()
+            timed_out = found_count < num_combinations and deadline.reached
+            context.finish(
+                found=found_count,
+                satisfied=found_count >= num_combinations,
+                timed_out=timed_out,
+                lefts_checked=stats['lefts_checked'],
+                status=status,
+            )
+
+            if not found_count:
+                self.log("기준을 만족하는 조합을 찾지 못했습니다.")
+                if status in ('exhausted', 'index_limit'):
+                    self.log(f"팁: 쌍 색인은 왼쪽 항목마다 일부 조합만 살펴보므로, 백트래킹이나 정수 계획법으로 "
+                             f"{self.MAX_MENU_ITEMS}개 이하의 조합이 있는지 확인해보세요.")
+            else:
+                self.log(f"총 {found_count}개의 조합을 발견했습니다.")
+            if status == 'index_limit':
+                self.log(f"쌍 색인이 에너지 합 {index.covered_energy:.0f}kcal까지만 담고 있어 "
+                         f"상한({cap:.0f}kcal) 근처의 쌍은 살펴보지 못했습니다.")
+            if timed_out:
+                self.log(f"시간 제한({context.time_limit}초)으로 탐색을 멈췄습니다.")
+
+            self.log(f"쌍 색인 탐색 총 실행 시간: {end_time - start_time:.4f}초 (왼쪽 항목 조회: {stats['lefts_checked']}회)")
+            if self.metrics is not None:
+                self.metrics.record_run('pairs', context.stats,
+                                        {'search': end_time - start_time, 'dedup': stats['dedup_seconds']})
+
+    def _index_for(self, energy_cap: float) -> PairSumIndex:
+        """
+        에너지 합 energy_cap까지 덮는 쌍 색인을 반환합니다. 지금 색인이 좁으면 여유를 두고 넓혀서 다시 읽습니다.
+        (색인은 읽기 전용이고 통째로 바꾸므로, 진행 중인 다른 요청은 쓰던 색인을 그대로 씀)
+        """
+        index = self.index
+        if energy_cap > index.max_energy:
+            index = self.index = PairSumIndex.load(self.catalog, self.db_path,
+                                                   max_energy=energy_cap * self.INDEX_HEADROOM)
+        return index
+
+    def _match_right(self, index: PairSumIndex, left_sums: np.ndarray, left_values: np.ndarray, members: List[int],
+                     count: int, minimums: np.ndarray, bound_need: np.ndarray, limit: int, start: int = 0) -> List[int]:
+        """
+        왼쪽 항목(영양소 합 left_sums, 음식 members)과 합쳐 기준을 채우는 쌍의 색인 위치를 최대 limit개 찾습니다.
+        count는 남은 에너지 안에 드는 쌍의 개수(정렬된 앞부분)이며, start 이후의 위치만 봅니다.
+        구간별 최댓값으로 기준에 닿을 수 없는 구간은 건너뜁니다.
+        """
+        block_size = index.BLOCK_SIZE
+        num_blocks = -(-count // block_size)
+        first_block = start // block_size
+        blocks = first_block + np.flatnonzero(
+            np.all(index.block_max[first_block:num_blocks] + left_values >= bound_need, axis=1))
+
+        remaining = minimums - left_sums[PROTEIN:]
+        matches = []
+        for block in blocks:
+            start = max(block * block_size, start)
+            stop = min(block * block_size + block_size, count)
+            mask = np.all(index.sums[start:stop, PROTEIN:] >= remaining, axis=1)
+            # 왼쪽 음식과 겹치지 않는 쌍만
+            first = index.first[start:stop]
+            second = index.second[start:stop]
+            for member in members:
+                mask &= (first != member) & (second != member)
+            matches.extend((start + np.flatnonzero(mask)[:limit - len(matches)]).tolist())
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def _match_middle_right(self, index: PairSumIndex, left_sums: np.ndarray, left_values: np.ndarray,
+                            members: List[int], count: int, cap: float, minimums: np.ndarray, bound_need: np.ndarray,
+                            limit: int) -> List[Tuple[int, int]]:
+        """
+        왼쪽 항목과 합쳐 기준을 채우는 (가운데 쌍, 오른쪽 쌍)의 색인 위치를 최대 limit개 찾습니다.
+        가운데 쌍은 구간 단위로 훑으며, 오른쪽 쌍까지 더해도 기준에 닿을 수 없는 쌍과 왼쪽 음식과 겹치는 쌍을 걸러낸 뒤
+        남은 쌍마다 _match_right로 오른쪽 쌍(가운데보다 뒤 위치만, 같은 메뉴를 두 번 만들지 않도록)을 찾습니다.
+        가운데 쌍은 MAX_MIDDLES_PER_LEFT개까지만 살펴봅니다.
+        """
+        block_size = index.BLOCK_SIZE
+        num_blocks = -(-count // block_size)
+        # 가운데 구간의 최댓값 + 남은 에너지 안의 쌍 전체의 최댓값으로도 닿지 않는 구간은 건너뜀
+        rest_bound = index.bound_max(count) + left_values
+        blocks = np.flatnonzero(np.all(index.block_max[:num_blocks] + rest_bound >= bound_need, axis=1))
+
+        left_energy = left_sums[ENERGY]
+        room = cap - left_energy
+        matches: List[Tuple[int, int]] = []
+        middles_checked = 0
+        for block in blocks:
+            start = block * block_size
+            stop = min(start + block_size, count)
+            middle_sums = index.sums[start:stop]
+            middle_values = PairSumIndex.with_macro(middle_sums[:, PROTEIN:])
+            rest_room = room - middle_sums[:, ENERGY]
+            rest_counts = index.count_within(rest_room)
+            mask = (rest_counts > np.arange(start + 1, stop + 1)) & np.all(
+                middle_values + left_values + index.pairs_bound(rest_counts, rest_room) >= bound_need, axis=1)
+            first = index.first[start:stop]
+            second = index.second[start:stop]
+            for member in members:
+                mask &= (first != member) & (second != member)
+
+            for offset in np.flatnonzero(mask).tolist():
+                middle = start + offset
+                rights = self._match_right(index, left_sums + middle_sums[offset], left_values + middle_values[offset],
+                                           [*members, int(first[offset]), int(second[offset])],
+                                           int(rest_counts[offset]), minimums, bound_need, limit - len(matches),
+                                           start=middle + 1)
+                matches.extend((middle, right) for right in rights)
+                middles_checked += 1
+                if len(matches) >= limit or middles_checked >= self.MAX_MIDDLES_PER_LEFT:
+                    return matches
+        return matches
+
+    def _preferred_first(self, preferred_count: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """선호 음식 개수가 많은 순서, 같은 개수 안에서는 무작위 순서의 인덱스를 반환합니다."""
+        order = rng.permutation(len(preferred_count))
+        return order[np.argsort(-preferred_count[order].astype(np.int64), kind='stable')]
@@ -0,0 +1,227 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Deque, Dict, Iterator, List, Optional
+
+Listener = Callable[[str, str, float], None]
+
+
+def silent(*args, **kwargs) -> None:
+    """verbose=False인 서비스가 print 대신 쓰는 출력 함수 (아무것도 하지 않음)"""
+
+
+class Histogram:
+    """
+    관측값의 개수/합계/최솟값/최댓값과, 백분위수 계산용 최근 max_samples개의 값입니다.
+    """
+    __slots__ = ('count', 'total', 'min', 'max', 'samples')
+
+    def __init__(self, max_samples: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {'count': 0}
+        samples = sorted(self.samples)
+
+        def percentile(q: float) -> float:
+            return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count,
+            'min': self.min,
+            'max': self.max,
+            'p50': percentile(0.5),
+            'p90': percentile(0.9),
+            'p99': percentile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    서비스들이 실행 중에 남기는 카운터와 히스토그램(구간 타이머 포함)을 모읍니다.
+
+    이름은 '{알고리즘}.{항목}' 형식입니다. (예: 'greedy.found', 'backtracking.search_seconds')
+    구간 타이머는 '{구간}_seconds' 히스토그램에 초 단위로 기록하며, 서비스가 쓰는 구간은 다음과 같습니다.
+        load: 카탈로그 읽기, init: 알고리즘별 색인/탐색 순서 준비, search: 탐색 한 번의 전체 시간,
+        dedup: 중복 조합 확인, serialize: 결과 캐시/출력 파일/응답으로 직렬화
+    add_listener로 등록한 함수는 값이 기록될 때마다 (종류('counter' | 'histogram'), 이름, 값)으로 호출됩니다.
+    탐색 스레드에서도 기록하므로 잠금으로 보호합니다.
+    """
+
+    def __init__(self, max_samples: int = 1024):
+        self.max_samples = max_samples
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Listener) -> None:
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Listener) -> None:
+        self.listeners.remove(listener)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        for listener in self.listeners:
+            listener('counter', name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.max_samples)
+            histogram.observe(value)
+        for listener in self.listeners:
+            listener('histogram', name, value)
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """with 블록의 실행 시간을 '{phase}_seconds'에 기록합니다."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{phase}_seconds", time.perf_counter() - start)
+
+    def record_run(self, engine: str, stats: Dict, phases: Dict[str, float]) -> None:
+        """
+        알고리즘 실행 한 번을 기록합니다.
+        stats(알고리즘의 stats dict)의 숫자/참거짓 값은 '{engine}.{이름}' 카운터에 더하고,
+        문자열 값은 '{engine}.{이름}.{값}' 카운터를 하나 올립니다. phases는 구간별 초입니다.
+        """
+        self.incr(f"{engine}.runs")
+        for key, value in stats.items():
+            if isinstance(value, str):
+                self.incr(f"{engine}.{key}.{value}")
+            elif isinstance(value, (bool, int, float)):
+                self.incr(f"{engine}.{key}", value)
+        for phase, seconds in phases.items():
+            self.observe(f"{engine}.{phase}_seconds", seconds)
+
+    def snapshot(self) -> Dict:
+        """JSON으로 저장할 수 있는 현재 값 (히스토그램은 요약)"""
+        with self._lock:
+            return {
+                'counters': dict(sorted(self.counters.items())),
+                'histograms': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def timed(metrics: Optional[MetricsRegistry], phase: str) -> ContextManager:
+    """metrics가 있으면 구간 타이머를, 없으면 아무것도 하지 않는 컨텍스트를 반환합니다."""
+    return metrics.timer(phase) if metrics is not None else nullcontext()
+
+
+class _ProfilingSession:
+    __slots__ = ('thread_profiles', 'lock')
+
+    def __init__(self):
+        self.thread_profiles: List[cProfile.Profile] = []
+        self.lock = threading.Lock()
+
+
+_session: Optional[_ProfilingSession] = None
+
+
+@contextmanager
+def profiling(output_dir: str, label: str = 'profile', top: int = 30) -> Iterator[None]:
+    """
+    with 블록을 cProfile과 tracemalloc으로 감싸고, 끝나면 output_dir에 보고서를 씁니다.
+        {label}.prof: pstats 형식 (python -m pstats, snakeviz 등으로 열 수 있음)
+        {label}.txt: 누적 시간 상위 top개 함수, 메모리 할당 상위 top개 줄, tracemalloc 최대 사용량
+    stream_search로 실행되는 탐색 스레드도 따로 측정해 합칩니다. (프로세스 풀 워커는 측정하지 않음)
+    """
+    global _session
+    if _session is not None:
+        raise RuntimeError("프로파일링이 이미 진행 중입니다.")
+    session = _session = _ProfilingSession()
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _session = None
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ])
+        if started_tracing:
+            tracemalloc.stop()
+        _write_profile(output_dir, label, top, profiler, session.thread_profiles, snapshot, peak)
+
+
+def profile_thread(target: Callable[[], None]) -> Callable[[], None]:
+    """프로파일링 중이면 target을 스레드용 cProfile로 감싸 결과를 진행 중인 프로파일에 합칩니다."""
+    session = _session
+    if session is None:
+        return target
+
+    def run() -> None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # 다른 프로파일러가 이미 동작 중인 환경
+            target()
+            return
+        try:
+            target()
+        finally:
+            profiler.disable()
+            with session.lock:
+                session.thread_profiles.append(profiler)
+
+    return run
+
+
+def _write_profile(output_dir: str, label: str, top: int, profiler: cProfile.Profile,
+                   thread_profiles: List[cProfile.Profile], snapshot: tracemalloc.Snapshot, peak: int) -> None:
+    os.makedirs(output_dir, exist_ok=True)
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    for thread_profile in thread_profiles:
+        stats.add(thread_profile)
+    stats.dump_stats(os.path.join(output_dir, f"{label}.prof"))
+
+    report.write(f"tracemalloc 최대 사용량: {peak / 2 ** 20:.2f}MB\n\n")
+    report.write(f"[누적 시간 상위 {top}개 함수]\n")
+    stats.sort_stats('cumulative').print_stats(top)
+    report.write(f"[메모리 할당 상위 {top}개 줄]\n")
+    for stat in snapshot.statistics('lineno')[:top]:
+        report.write(f"{stat}\n")
+    with open(os.path.join(output_dir, f"{label}.txt"), 'w', encoding='utf-8') as f:
+        f.write(report.getvalue())
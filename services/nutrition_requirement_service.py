@@ -1,3 +1,6 @@
+import numpy as np
+from typing import Dict
+
 from models.user_info import UserInfo
 from models.enums import DietPurpose, Sex
 
@@ -25,4 +28,54 @@ class NutritionRequirementService:
             user.protein_required = 1.8 * user.weight
             
         user.fat_required = (user.calories_required * 0.25) / 9
-        user.carbon_required = (user.calories_required - (user.protein_required * 4 + user.fat_required * 9)) / 4
\ No newline at end of file
+        user.carbon_required = (user.calories_required - (user.protein_required * 4 + user.fat_required * 9)) / 4
+
+    def calculate_requirements_columnar(self, height, weight, age, sex, purpose, activity_factor) -> Dict[str, np.ndarray]:
+        """
+        여러 사용자의 요구량을 열 단위 배열로 한 번에 계산합니다. (calculate_requirements와 같은 계산 순서)
+
+        Args:
+            height, weight, age: 신장(cm), 체중(kg), 나이 배열
+            sex: Sex 값 배열 (남자 0, 여자 1)
+            purpose: DietPurpose 값 배열 (일반 0 | 다이어트 1 | 벌크업 2)
+            activity_factor: 활동 지수(ActivityLevel.factor) 배열
+        Returns:
+            bmr, tdee, calories_required, protein_required, fat_required, carbon_required 배열
+        """
+        height = np.asarray(height, dtype=np.float64)
+        weight = np.asarray(weight, dtype=np.float64)
+        age = np.asarray(age, dtype=np.float64)
+        sex = np.asarray(sex)
+        purpose = np.asarray(purpose)
+        activity_factor = np.asarray(activity_factor, dtype=np.float64)
+
+        if np.isnan(activity_factor).any():
+            raise ValueError("활동 수준(activity_factor)이 설정되지 않았습니다.")
+        if not np.isin(purpose, [p.value for p in DietPurpose]).all():
+            raise ValueError("알 수 없는 식단 목적(purpose)이 있습니다.")
+
+        # 기초대사량 계산
+        bmr = 10 * weight + 6.25 * height - 5 * age + np.where(sex == Sex.MALE.value, 5.0, -161.0)
+
+        # 활동대사량 계산
+        tdee = bmr * activity_factor
+
+        # 목적별 칼로리 보정(일반 -400, 다이어트 0, 벌크업 +400)과 체중당 단백질 계수
+        calorie_offset = np.array([-400.0, 0.0, 400.0])
+        protein_per_kg = np.array([1.6, 1.9, 1.8])
+        purpose_index = np.searchsorted([DietPurpose.NORMAL.value, DietPurpose.DIET.value, DietPurpose.BULK.value],
+                                        purpose)
+        calories_required = tdee + calorie_offset[purpose_index]
+        protein_required = protein_per_kg[purpose_index] * weight
+
+        fat_required = (calories_required * 0.25) / 9
+        carbon_required = (calories_required - (protein_required * 4 + fat_required * 9)) / 4
+
+        return {
+            'bmr': bmr,
+            'tdee': tdee,
+            'calories_required': calories_required,
+            'protein_required': protein_required,
+            'fat_required': fat_required,
+            'carbon_required': carbon_required,
+        }
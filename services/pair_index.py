@@ -0,0 +1,223 @@
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from services.food_catalog import FoodCatalog, ENERGY, PROTEIN
+
+
+class PairSumIndex:
+    """
+    카탈로그의 음식 쌍(i < j)과 영양소 합을 에너지 순으로 정렬해 둔 색인입니다.
+
+    목표치와 무관하므로 카탈로그마다 한 번만 만들고, 원본 옆에 바이너리 캐시(.pairs.npz)로 저장합니다.
+    캐시는 카탈로그의 원본 해시가 같고 필요한 에너지 범위를 덮을 때만 재사용합니다.
+    쌍의 수는 음식 수의 제곱에 비례하므로 에너지 합이 max_energy 이하인 쌍만 만들며 (더 큰 상한이 필요하면
+    그때 넓혀서 다시 만듦), 그래도 MAX_PAIRS개를 넘으면 에너지가 낮은 쪽부터 MAX_PAIRS개 이내로 자릅니다.
+        foods(int32, N): 색인에 포함된 음식(에너지 > 0)의 카탈로그 인덱스 (에너지 오름차순)
+        first, second(int32, P): 쌍을 이루는 두 음식의 foods 내 위치 (first < second)
+        sums(float64, P x 4): 쌍의 영양소 합 (에너지 오름차순)
+        max_energy(float): 만들 때 요청한 쌍의 에너지 합 상한
+        covered_energy(float): 색인이 빠짐없이 담고 있는 에너지 합 상한 (MAX_PAIRS로 잘랐으면 max_energy보다 작음)
+        block_max(float64, ceil(P / BLOCK_SIZE) x 4): BLOCK_SIZE개 단위 구간의 열별 최댓값 (구간 단위 가지치기용)
+        block_prefix_max(float64, ceil(P / BLOCK_SIZE)+1 x 4): block_max[:k]의 열별 최댓값
+        value_per_energy(float64, 4): 쌍의 열별 값 / 에너지 합의 최댓값 (쌍 여러 개의 합은 에너지 합 x 이 값을 넘지 않음)
+        two_pair_max(float64, K x 4): 에너지 합이 (K - 2) x BOUND_BUCKET 이하인 쌍 두 개로 얻을 수 있는 열별 합의 상한
+            (구간 단위 0/1 배낭 상한, 5~6개 메뉴의 가지치기용)
+    열은 단백질, 지방, 탄수화물, 열량 환산(4/9/4 kcal/g) 합이며, 쌍마다 저장하지 않고 구간별 최댓값만 보관합니다.
+    카탈로그와 마찬가지로 배열은 모두 읽기 전용입니다.
+    """
+
+    CACHE_VERSION = 2
+    CACHE_SUFFIX = '.pairs.npz'
+    BLOCK_SIZE = 1024
+    BOUND_BUCKET = 10.0  # two_pair_max의 에너지 구간 폭(kcal)
+    DEFAULT_MAX_ENERGY = 2000.0  # 한 끼 에너지 상한이 이보다 큰 요청이 오면 색인을 넓힘
+    MAX_PAIRS = 4_000_000  # 쌍 하나에 40바이트 (약 160MB)
+    MACRO_KCAL = np.array([4.0, 9.0, 4.0])  # 단백질, 지방, 탄수화물 1g당 열량
+
+    _loaded: Dict[str, 'PairSumIndex'] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, foods: np.ndarray, first: np.ndarray, second: np.ndarray, sums: np.ndarray,
+                 source_hash: str = '', max_energy: float = np.inf, covered_energy: Optional[float] = None):
+        self.foods = foods.astype(np.int32, copy=False)
+        self.first = first.astype(np.int32, copy=False)
+        self.second = second.astype(np.int32, copy=False)
+        self.sums = np.ascontiguousarray(sums, dtype=np.float64)
+        self.source_hash = source_hash
+        self.max_energy = float(max_energy)
+        self.covered_energy = self.max_energy if covered_energy is None else float(covered_energy)
+
+        self.energy = self.sums[:, ENERGY]
+        self.block_max = np.zeros((-(-len(self.sums) // self.BLOCK_SIZE), 4))
+        self.value_per_energy = np.zeros(4)
+        # 열량 환산 열을 붙인 값은 구간 단위로만 계산 (전체 P x 4 배열을 만들지 않음)
+        # single[b]: 에너지가 b x BOUND_BUCKET 이하인 쌍 하나의 열별 최댓값 (구간별 최댓값을 모아 누적 최댓값으로)
+        top_energy = float(self.energy[-1]) if len(self.energy) else 0.0
+        num_buckets = int(np.ceil(top_energy / self.BOUND_BUCKET)) + 1
+        single = np.zeros((num_buckets, 4))
+        chunk = self.BLOCK_SIZE * 256
+        for start in range(0, len(self.sums), chunk):
+            values = self.with_macro(self.sums[start:start + chunk, PROTEIN:])
+            block_starts = np.arange(0, len(values), self.BLOCK_SIZE)
+            first_block = start // self.BLOCK_SIZE
+            self.block_max[first_block:first_block + len(block_starts)] = np.maximum.reduceat(values, block_starts, axis=0)
+            ratios = values / self.energy[start:start + chunk, None]
+            self.value_per_energy = np.maximum(self.value_per_energy, ratios.max(axis=0))
+            buckets = np.ceil(self.energy[start:start + chunk] / self.BOUND_BUCKET).astype(np.int64)
+            bucket_ids, bucket_starts = np.unique(buckets, return_index=True)
+            single[bucket_ids] = np.maximum(single[bucket_ids], np.maximum.reduceat(values, bucket_starts, axis=0))
+        np.maximum.accumulate(single, axis=0, out=single)
+        self.block_prefix_max = np.zeros((len(self.block_max) + 1, 4))
+        if len(self.block_max):
+            np.maximum.accumulate(self.block_max, axis=0, out=self.block_prefix_max[1:])
+
+        # two_pair_max[k] = max(single[i] + single[k - i])
+        # 두 쌍의 에너지 e1 + e2 <= e이면 올림한 구간 번호의 합은 floor(e / BOUND_BUCKET) + 2 이하
+        self.two_pair_max = np.zeros((2 * num_buckets - 1, 4))
+        for k in range(len(self.two_pair_max)):
+            i = np.arange(max(0, k - num_buckets + 1), min(k, num_buckets - 1) + 1)
+            self.two_pair_max[k] = (single[i] + single[k - i]).max(axis=0)
+        for array in (self.foods, self.first, self.second, self.sums, self.energy, self.block_max,
+                      self.block_prefix_max, self.value_per_energy, self.two_pair_max):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.sums)
+
+    @classmethod
+    def load(cls, catalog: FoodCatalog, db_path: str, max_energy: float = DEFAULT_MAX_ENERGY,
+             use_cache: bool = True) -> 'PairSumIndex':
+        """
+        에너지 합 max_energy까지 덮는 카탈로그의 쌍 색인을 반환합니다. (프로세스 캐시 → 디스크 캐시 → 새로 생성 순)
+        이미 만든 색인이 더 넓은 범위를 덮으면 그대로 쓰고, 좁으면 넓혀서 다시 만듭니다.
+        """
+        abs_path = os.path.abspath(db_path)
+        with cls._lock:
+            cached = cls._loaded.get(abs_path)
+            if cached is not None and cached.source_hash == catalog.source_hash:
+                if cached.max_energy >= max_energy:
+                    return cached
+                max_energy = max(max_energy, cached.max_energy)
+
+            cache_path = abs_path + cls.CACHE_SUFFIX
+            index = cls._load_cache(cache_path, catalog.source_hash, max_energy) if use_cache else None
+            if index is None:
+                index = cls.build(catalog, max_energy)
+                if use_cache:
+                    index._save_cache(cache_path)
+
+            cls._loaded[abs_path] = index
+            return index
+
+    @classmethod
+    def build(cls, catalog: FoodCatalog, max_energy: float = DEFAULT_MAX_ENERGY,
+              max_pairs: Optional[int] = None) -> 'PairSumIndex':
+        """
+        에너지가 0보다 큰 음식들의 쌍 중 에너지 합이 max_energy 이하인 쌍을 만들어 에너지 순으로 정렬합니다.
+        음식을 에너지 순으로 정렬해 두고 음식마다 짝이 될 수 있는 범위만 이진 탐색으로 구하므로,
+        범위 밖의 쌍은 만들지 않습니다. max_pairs(기본 MAX_PAIRS)를 넘으면 상한을 낮춰 그 안에 들게 합니다.
+        """
+        max_pairs = cls.MAX_PAIRS if max_pairs is None else max_pairs
+        foods = np.flatnonzero(catalog.nutrients[:, ENERGY] > 0)
+        foods = foods[np.argsort(catalog.nutrients[foods, ENERGY], kind='stable')]
+        nutrients = catalog.nutrients[foods]
+        energy = nutrients[:, ENERGY]
+        positions = np.arange(len(foods))
+
+        def partner_counts(limit: float) -> np.ndarray:
+            # i번째 음식과 에너지 합이 limit 이하인 뒤쪽 음식(j > i)의 개수
+            ends = np.searchsorted(energy, limit - energy, side='right')
+            return np.maximum(ends - positions - 1, 0)
+
+        covered_energy = max_energy
+        counts = partner_counts(max_energy)
+        if counts.sum() > max_pairs:
+            # 쌍의 개수가 max_pairs 이하가 되는 가장 큰 상한 (이분 탐색)
+            low, high = 0.0, float(max_energy) if np.isfinite(max_energy) else 2 * float(energy[-1])
+            for _ in range(60):
+                middle = (low + high) / 2
+                if partner_counts(middle).sum() > max_pairs:
+                    high = middle
+                else:
+                    low = middle
+            covered_energy = low
+            counts = partner_counts(low)
+
+        first = np.repeat(positions.astype(np.int32), counts)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        second = (first + 1 + (np.arange(len(first)) - offsets)).astype(np.int32)
+        sums = nutrients[first] + nutrients[second]
+        order = np.argsort(sums[:, ENERGY], kind='stable')
+        return cls(foods, first[order], second[order], sums[order], catalog.source_hash, max_energy, covered_energy)
+
+    @classmethod
+    def _load_cache(cls, cache_path: str, source_hash: str, max_energy: float) -> Optional['PairSumIndex']:
+        """캐시가 같은 원본에서 max_energy 이상의 범위로 만들어졌으면 캐시에서 색인을 복원합니다."""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                if int(data['version']) != cls.CACHE_VERSION or str(data['source_hash']) != source_hash:
+                    return None
+                if float(data['max_energy']) < max_energy:
+                    return None
+                return cls(data['foods'], data['first'], data['second'], data['sums'], source_hash,
+                           float(data['max_energy']), float(data['covered_energy']))
+        except Exception:
+            # 손상된 캐시는 무시하고 다시 만듭니다.
+            return None
+
+    def _save_cache(self, cache_path: str) -> None:
+        """색인을 바이너리 캐시로 저장합니다. (원자적 교체)"""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    version=np.int64(self.CACHE_VERSION),
+                    source_hash=np.array(self.source_hash),
+                    foods=self.foods,
+                    first=self.first,
+                    second=self.second,
+                    sums=self.sums,
+                    max_energy=np.float64(self.max_energy),
+                    covered_energy=np.float64(self.covered_energy),
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # 읽기 전용 환경 등에서는 캐시 없이 계속 진행합니다.
+            print(f"쌍 색인 캐시를 저장하지 못했습니다: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def with_macro(cls, macros: np.ndarray) -> np.ndarray:
+        """(단백질, 지방, 탄수화물) 배열 끝에 열량 환산 열을 붙입니다."""
+        return np.concatenate([macros, (macros @ cls.MACRO_KCAL)[..., None]], axis=-1)
+
+    def count_within(self, energy_cap):
+        """에너지 합이 energy_cap 이하인 쌍의 개수 (정렬된 앞부분의 길이, 배열이면 원소별)."""
+        return np.searchsorted(self.energy, energy_cap, side='right')
+
+    def bound_max(self, counts):
+        """
+        에너지 순 앞 counts개 쌍에서 얻을 수 있는 (단백질, 지방, 탄수화물, 열량 환산)의 열별 최댓값의 상한.
+        구간 단위로 올림하므로 실제 최댓값 이상입니다. (배열이면 원소별, 결과는 ... x 4)
+        """
+        return self.block_prefix_max[-(-np.asarray(counts) // self.BLOCK_SIZE)]
+
+    def pairs_bound(self, counts, energy_cap, num_pairs: int = 1):
+        """
+        에너지 합이 energy_cap 이하인 쌍 num_pairs개(에너지 순 앞 counts개 중에서)로 얻을 수 있는 열별 합의 상한.
+        쌍마다의 최댓값 x num_pairs와, 에너지 합 x value_per_energy 중 작은 값입니다.
+        두 쌍이면 two_pair_max도 함께 봅니다. (배열이면 원소별, 결과는 ... x 4)
+        """
+        energy_cap = np.asarray(energy_cap, dtype=np.float64)
+        bound = np.minimum(num_pairs * self.bound_max(counts), energy_cap[..., None] * self.value_per_energy)
+        if num_pairs == 2:
+            buckets = np.floor(np.maximum(energy_cap, 0) / self.BOUND_BUCKET).astype(np.int64) + 2
+            bound = np.minimum(bound, self.two_pair_max[np.minimum(buckets, len(self.two_pair_max) - 1)])
+        return bound
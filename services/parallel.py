@@ -0,0 +1,56 @@
+import queue
+import threading
+from queue import Empty
+from typing import Any, Callable, Iterator, List
+
+from services.metrics import profile_thread
+
+
+def drain_queue(source, timeout: float) -> List:
+    """큐(source, queue.Queue 또는 Manager 큐)에 쌓인 항목을 모두 꺼냅니다. (첫 항목은 timeout만큼 기다림)"""
+    items = []
+    try:
+        items.append(source.get(timeout=timeout) if timeout else source.get_nowait())
+        while True:
+            items.append(source.get_nowait())
+    except Empty:
+        pass
+    return items
+
+
+_FINISHED = object()
+
+
+def stream_search(search: Callable[[Callable[[Any], None], Callable[[], bool]], None]) -> Iterator:
+    """
+    search(emit, cancelled)를 별도 스레드에서 실행하고, emit으로 넘긴 항목을 찾는 대로 내보냅니다.
+    콜백(collect/should_stop)으로 결과를 넘기는 탐색을 생성기로 바꾸는 데 씁니다.
+    생성기를 닫으면 cancelled()가 True가 되며, 탐색이 이를 확인하고 끝날 때까지 기다립니다.
+    탐색 중 발생한 예외는 항목을 모두 내보낸 뒤 다시 발생시킵니다.
+    """
+    items = queue.Queue()
+    cancel_event = threading.Event()
+    errors = []
+
+    def run() -> None:
+        try:
+            search(items.put, cancel_event.is_set)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            items.put(_FINISHED)
+
+    thread = threading.Thread(target=profile_thread(run), name='stream-search', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _FINISHED:
+                break
+            yield item
+    finally:
+        cancel_event.set()
+        thread.join()
+
+    if errors:
+        raise errors[0]
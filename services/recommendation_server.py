@@ -0,0 +1,289 @@
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from controllers.http_api import HttpError, HttpRequest, read_request, write_json, parse_recommendation_request
+from models.user_info import UserInfo
+from services.batch_recommendation import ENGINES, SEEDED_ENGINES
+from services.metrics import MetricsRegistry
+from services.nutrition_requirement_service import NutritionRequirementService
+from services.result_cache import ResultCache
+
+
+class RecommendationServer:
+    """
+    asyncio 기반 HTTP 추천 서버입니다. (표준 라이브러리만 사용)
+
+    이벤트 루프는 요청을 읽고 요구량을 계산한 뒤, 탐색은 프로세스 풀로 넘기므로 CPU 작업에 막히지 않습니다.
+    워커 프로세스는 시작할 때 카탈로그와 색인(쌍 색인, 캐시 파일)을 한 번 읽어 계속 들고 있으며,
+    워커마다 결과 캐시를 둡니다. (cache_dir를 주면 워커들이 디스크 캐시를 공유)
+    threads=True이면 프로세스 대신 스레드 풀을 쓰고, 모든 워커 스레드가 알고리즘별 서비스 하나(카탈로그/색인 한 벌)와
+    결과 캐시 하나를 함께 씁니다. (서비스는 요청마다의 상태를 SearchContext에 두므로 동시에 써도 안전)
+    메모리는 워커 수와 무관하게 한 벌이지만, 순수 파이썬 구간은 GIL 때문에 동시에 실행되지 않습니다.
+
+    요청마다 시간 예산(time_budget 초)이 있습니다. 워커는 남은 예산을 알고리즘의 time_limit으로 넘기고,
+    예산이 끝나면 그때까지 찾은 조합을 complete=False로 돌려줍니다. (satisfied: 요청한 개수를 모두 채웠는지)
+    이벤트 루프는 예산 + RESPONSE_GRACE초 안에 결과가 없으면 504를 보냅니다. (대기열에서 시작하지 못한 요청은 취소됩니다)
+    동시에 처리 중인 요청이 max_pending개를 넘으면 503으로 바로 거절합니다.
+
+    요청 처리 시간('request_seconds')과 워커의 구간별 시간('{알고리즘}.search_seconds', '{알고리즘}.serialize_seconds'),
+    응답 상태별 횟수('status.{코드}')는 metrics에 기록됩니다.
+
+    엔드포인트:
+        GET /health: 상태와 요청 통계
+        GET /metrics: metrics의 카운터와 히스토그램 요약
+        POST /recommendations: JSON 프로필(일괄 추천 파일과 같은 필드) + 선택 옵션
+            (algorithm, num_combinations, time_budget, seed) -> 요구량과 조합
+            seed를 주면 같은 요청에 같은 결과를 돌려줍니다. (정수 계획법은 결정적이므로 무시)
+    """
+    MAX_BODY_BYTES = 64 * 1024
+    RESPONSE_GRACE = 1.0  # 워커가 예산을 다 쓴 뒤 결과를 돌려줄 때까지 더 기다리는 시간(초)
+
+    def __init__(self, db_path: str, algorithm: str = 'greedy', workers: Optional[int] = None,
+                 num_combinations: int = 5, max_combinations: int = 1000, time_budget: float = 10.0,
+                 max_time_budget: float = 60.0, max_pending: Optional[int] = None,
+                 cache_options: Optional[Dict] = None, engine_options: Optional[Dict[str, Dict]] = None,
+                 metrics: Optional[MetricsRegistry] = None, threads: bool = False):
+        if algorithm not in ENGINES:
+            raise ValueError(f"알 수 없는 알고리즘입니다: {algorithm} (가능: {', '.join(ENGINES)})")
+        self.db_path = db_path
+        self.algorithm = algorithm
+        self.workers = workers or os.cpu_count() or 1
+        self.num_combinations = num_combinations
+        self.max_combinations = max_combinations
+        self.time_budget = time_budget
+        self.max_time_budget = max_time_budget
+        self.max_pending = max_pending or self.workers * 4
+        # None이면 워커마다 기본 설정의 메모리 캐시 (결과 캐시를 끄려면 False)
+        self.cache_options = cache_options
+        self.engine_options = engine_options or {}
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.threads = threads
+
+        self.requirement_service = NutritionRequirementService()
+        self.pool: Optional[Executor] = None
+        self.pending = 0
+        self.stats = {'requests': 0, 'completed': 0, 'partial': 0, 'timeouts': 0, 'rejected': 0, 'errors': 0}
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8000) -> None:
+        """워커를 띄운 뒤 종료될 때까지 요청을 받습니다."""
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        """워커 풀을 만들고 모든 워커가 카탈로그/색인을 읽은 뒤 요청을 받기 시작합니다."""
+        self._create_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ping_worker) for _ in range(self.workers)))
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        bound = ', '.join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        kind = '스레드' if self.threads else '프로세스'
+        print(f"추천 서버 시작: {bound} (기본 알고리즘: {self.algorithm}, 워커 {kind} {self.workers}개, "
+              f"기본 시간 예산 {self.time_budget}초)")
+        return server
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """연결 하나에서 요청을 차례로 처리합니다. (keep-alive)"""
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, self.MAX_BODY_BYTES)
+                except HttpError as e:
+                    await write_json(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                start_time = time.perf_counter()
+                status, payload = await self.dispatch(request)
+                self.metrics.observe('request_seconds', time.perf_counter() - start_time)
+                self.metrics.incr(f"status.{status}")
+                await write_json(writer, status, payload, request.keep_alive)
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def dispatch(self, request: HttpRequest) -> Tuple[int, Dict]:
+        routes = {
+            '/health': ('GET', self.health),
+            '/metrics': ('GET', self.metrics_report),
+            '/recommendations': ('POST', self.recommend),
+        }
+        route = routes.get(request.path)
+        if route is None:
+            return 404, {'error': f"없는 경로입니다: {request.path}"}
+        method, handler = route
+        if request.method != method:
+            return 405, {'error': f"{request.path}는 {method} 요청만 받습니다."}
+
+        try:
+            return await handler(request)
+        except HttpError as e:
+            return e.status, {'error': e.message}
+        except Exception as e:
+            self.stats['errors'] += 1
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+    async def health(self, request: HttpRequest) -> Tuple[int, Dict]:
+        return 200, {
+            'status': 'ok',
+            'algorithm': self.algorithm,
+            'algorithms': sorted(ENGINES),
+            'workers': self.workers,
+            'pending': self.pending,
+            'stats': self.stats,
+        }
+
+    async def metrics_report(self, request: HttpRequest) -> Tuple[int, Dict]:
+        return 200, self.metrics.snapshot()
+
+    async def recommend(self, request: HttpRequest) -> Tuple[int, Dict]:
+        self.stats['requests'] += 1
+        user, options = parse_recommendation_request(request.body)
+        algorithm = options.get('algorithm', self.algorithm)
+        if algorithm not in ENGINES:
+            raise HttpError(400, f"알 수 없는 알고리즘입니다: {algorithm} (가능: {', '.join(ENGINES)})")
+        num_combinations = options.get('num_combinations', self.num_combinations)
+        if not 0 < num_combinations <= self.max_combinations:
+            raise HttpError(400, f"num_combinations는 1 ~ {self.max_combinations} 사이여야 합니다.")
+        time_budget = min(options.get('time_budget', self.time_budget), self.max_time_budget)
+        if time_budget <= 0:
+            raise HttpError(400, "time_budget은 0보다 커야 합니다.")
+
+        if self.pending >= self.max_pending:
+            self.stats['rejected'] += 1
+            raise HttpError(503, f"처리 중인 요청이 너무 많습니다. (최대 {self.max_pending}개)")
+
+        self.requirement_service.calculate_requirements(user)
+        engine_options = dict(self.engine_options.get(algorithm, {}))
+        if 'seed' in options and algorithm in SEEDED_ENGINES:
+            engine_options['seed'] = options['seed']
+        start_time = time.monotonic()
+        deadline = time.time() + time_budget  # 워커 프로세스와 비교하므로 벽시계 시각
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            future = loop.run_in_executor(self.pool, _recommend_worker, self.db_path, algorithm, user,
+                                          num_combinations, deadline, engine_options)
+            result = await asyncio.wait_for(future, time_budget + self.RESPONSE_GRACE)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise HttpError(504, f"시간 예산({time_budget}초) 안에 결과를 받지 못했습니다.")
+        except BrokenProcessPool:
+            # 워커가 비정상 종료되면 풀을 새로 만들고 이 요청은 실패 처리
+            self.close()
+            self._create_pool()
+            raise
+        finally:
+            self.pending -= 1
+
+        self.stats['completed'] += 1
+        self.stats['partial'] += not result['complete']
+        for phase, seconds in result['timings'].items():
+            self.metrics.observe(f"{algorithm}.{phase}_seconds", seconds)
+        return 200, {
+            'algorithm': algorithm,
+            'requirements': {
+                'calories': user.calories_required,
+                'protein': user.protein_required,
+                'fat': user.fat_required,
+                'carbs': user.carbon_required,
+            },
+            'combinations': result['combinations'],
+            'satisfied': len(result['combinations']) >= num_combinations,
+            'complete': result['complete'],
+            'elapsed': round(time.monotonic() - start_time, 4),
+        }
+
+    def _create_pool(self) -> None:
+        executor = ThreadPoolExecutor if self.threads else ProcessPoolExecutor
+        self.pool = executor(max_workers=self.workers, initializer=_init_worker,
+                             initargs=(self.db_path, [self.algorithm], self.cache_options))
+
+
+# 워커(프로세스)마다의 서비스와 결과 캐시 (스레드 풀이면 모든 워커 스레드가 공유)
+_worker_services: Dict[Tuple[str, str], object] = {}
+_worker_cache: Optional[ResultCache] = None
+_worker_cache_ready = False
+_worker_lock = threading.Lock()
+
+
+def _init_worker(db_path: str, algorithms: List[str], cache_options) -> None:
+    """
+    워커 초기화: 기본 알고리즘의 서비스(카탈로그/색인)를 진행 메시지 없이 미리 만듭니다.
+    스레드 풀에서는 스레드마다 호출되므로, 결과 캐시와 서비스는 처음 한 번만 만듭니다.
+    """
+    global _worker_cache, _worker_cache_ready
+    with _worker_lock:
+        if not _worker_cache_ready:
+            if cache_options is not False:
+                _worker_cache = ResultCache(**(cache_options or {}))
+            _worker_cache_ready = True
+    for algorithm in algorithms:
+        _worker_service(db_path, algorithm)
+
+
+def _worker_service(db_path: str, algorithm: str):
+    service = _worker_services.get((db_path, algorithm))
+    if service is None:
+        with _worker_lock:
+            service = _worker_services.get((db_path, algorithm))
+            if service is None:
+                service = ENGINES[algorithm](db_path, result_cache=_worker_cache, verbose=False)
+                _worker_services[(db_path, algorithm)] = service
+    return service
+
+
+def _ping_worker() -> int:
+    return os.getpid()
+
+
+def _recommend_worker(db_path: str, algorithm: str, user: UserInfo, num_combinations: int, deadline: float,
+                      engine_options: Dict) -> Dict:
+    """
+    프로세스 풀 워커: 남은 예산을 알고리즘의 time_limit으로 넘겨 조합을 스트림으로 받습니다.
+    알고리즘이 조합을 내보내는 사이에도 deadline(벽시계 시각)이 지나면 스트림을 닫습니다.
+    반환값: {'combinations': [직렬화된 조합], 'complete': 예산 안에 끝까지 탐색했는지,
+             'timings': {'search': 탐색(직렬화 제외) 초, 'serialize': 직렬화 초}}
+    """
+    combinations = []
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        # 대기열에서 예산을 다 쓴 요청
+        return {'combinations': combinations, 'complete': False, 'timings': {}}
+
+    service = _worker_service(db_path, algorithm)
+    start_time = time.perf_counter()
+    serialize_seconds = 0.0
+    results = service.iter_recommendations(user, num_combinations, **{'time_limit': remaining, **engine_options})
+    try:
+        for combination in results:
+            serialize_start = time.perf_counter()
+            combinations.append(combination.to_dict())
+            serialize_seconds += time.perf_counter() - serialize_start
+            if time.time() >= deadline:
+                break
+    finally:
+        results.close()
+    complete = len(combinations) >= num_combinations or time.time() < deadline
+    timings = {'search': time.perf_counter() - start_time - serialize_seconds, 'serialize': serialize_seconds}
+    return {'combinations': combinations, 'complete': complete, 'timings': timings}
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional
+
+from models.menu_combination import MenuCombination
+from services.food_catalog import FoodCatalog, NUTRIENT_KEYS
+from services.metrics import MetricsRegistry, timed
+
+Combinations = List[MenuCombination]
+
+
+class ResultCache:
+    """
+    추천 결과를 (알고리즘, 양자화된 목표치, 선호 분류, 파라미터)별로 저장하는 LRU 캐시입니다.
+
+    목표치는 구간(energy_step kcal, nutrient_step g) 단위로 양자화하되, 구간 안의 어떤 사용자에게도
+    조건을 만족하도록 보수적인 경계를 씁니다. (에너지 상한은 내림, 단백질/지방/탄수화물 최소 기준은 올림)
+    서비스는 양자화된 목표치로 탐색하므로, 비슷한 요구량의 사용자는 같은 결과를 공유합니다.
+
+    max_entries를 넘으면 가장 오래 쓰지 않은 항목부터 메모리에서 지웁니다.
+    cache_dir를 주면 결과를 JSON 파일로도 저장하며, 전체 크기가 max_disk_bytes를 넘으면
+    가장 오래 쓰지 않은 파일부터 지웁니다. 키에는 카탈로그 원본 해시가 들어가므로 DB가 바뀌면 새로 계산합니다.
+    반환되는 결과는 캐시와 공유되므로 수정하지 않아야 합니다.
+    metrics를 주면 적중/실패 수(cache.hits, cache.misses)와 디스크 파일을 읽고 쓰는 시간
+    (cache.deserialize, cache.serialize)을 기록합니다.
+    """
+
+    FORMAT_VERSION = 2  # 디스크 파일 형식 (음식 인덱스 + 합계)
+
+    def __init__(self, max_entries: int = 256, energy_step: float = 10.0, nutrient_step: float = 1.0,
+                 cache_dir: Optional[str] = None, max_disk_bytes: int = 64 * 1024 * 1024,
+                 metrics: Optional[MetricsRegistry] = None):
+        if energy_step <= 0 or nutrient_step <= 0:
+            raise ValueError("양자화 구간은 0보다 커야 합니다.")
+        self.max_entries = max_entries
+        self.energy_step = energy_step
+        self.nutrient_step = nutrient_step
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.metrics = metrics
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: 'OrderedDict[str, Combinations]' = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def quantize(self, targets: Dict) -> Dict:
+        """목표치를 구간의 보수적인 경계로 옮깁니다. (여러 번 적용해도 같은 값)"""
+        quantized = {}
+        for key in NUTRIENT_KEYS:
+            if key == 'energy':
+                value = math.floor(targets[key] / self.energy_step + 1e-9) * self.energy_step
+            else:
+                value = math.ceil(targets[key] / self.nutrient_step - 1e-9) * self.nutrient_step
+            quantized[key] = round(value, 6)
+        return quantized
+
+    def get_or_compute(self, algorithm: str, catalog: FoodCatalog, targets: Dict, preference: Optional[int],
+                       params: Dict, compute: Callable[[], Combinations]) -> Combinations:
+        """
+        캐시에 있으면 저장된 결과를, 없으면 compute()로 계산해 저장한 결과를 반환합니다.
+        targets는 quantize()를 거친 값이어야 결과가 구간 안의 사용자 모두에게 유효합니다.
+        """
+        key = self._key(algorithm, catalog, self.quantize(targets), preference, params)
+        result = self.get(key, catalog)
+        if result is not None:
+            return result
+        result = compute()
+        self.put(key, result)
+        return result
+
+    def iter_or_compute(self, algorithm: str, catalog: FoodCatalog, targets: Dict, preference: Optional[int],
+                        params: Dict, compute: Callable[[], Iterator[MenuCombination]],
+                        complete: Optional[Callable[[], bool]] = None) -> Iterator[MenuCombination]:
+        """
+        get_or_compute의 스트리밍 버전입니다. 캐시에 있으면 저장된 결과를, 없으면 compute()가 찾는 대로 내보냅니다.
+        끝까지 읽었고 complete()가 True인 결과만 저장합니다.
+        (중간에 닫혔거나 시간 제한으로 멈춘 결과는 일부이므로 저장하지 않음)
+        """
+        key = self._key(algorithm, catalog, self.quantize(targets), preference, params)
+        result = self.get(key, catalog)
+        if result is not None:
+            yield from result
+            return
+
+        result = []
+        combinations = compute()
+        try:
+            for combination in combinations:
+                result.append(combination)
+                yield combination
+        finally:
+            combinations.close()
+        if complete is None or complete():
+            self.put(key, result)
+
+    def get(self, key: str, catalog: FoodCatalog) -> Optional[Combinations]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if result is not None:
+            self._count('cache.hits')
+            return result
+
+        result = self._read_disk(key, catalog)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._store(key, result)
+        self._count('cache.misses' if result is None else 'cache.hits')
+        return result
+
+    def put(self, key: str, result: Combinations) -> None:
+        with self._lock:
+            self._store(key, result)
+        self._write_disk(key, result)
+
+    def clear(self) -> None:
+        """메모리의 항목만 비웁니다. (디스크 캐시는 유지)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _count(self, name: str) -> None:
+        if self.metrics is not None:
+            self.metrics.incr(name)
+
+    def _store(self, key: str, result: Combinations) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _key(self, algorithm: str, catalog: FoodCatalog, targets: Dict, preference: Optional[int],
+             params: Dict) -> str:
+        payload = json.dumps([self.FORMAT_VERSION, algorithm, catalog.source_hash, targets, preference,
+                              sorted(params.items())], ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str, catalog: FoodCatalog) -> Optional[Combinations]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        with timed(self.metrics, 'cache.deserialize'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                os.utime(path)  # LRU 순서를 위해 사용 시각 갱신
+            except (OSError, ValueError):
+                return None
+            return [MenuCombination(indices, totals, catalog) for indices, totals in data]
+
+    def _write_disk(self, key: str, result: Combinations) -> None:
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with timed(self.metrics, 'cache.serialize'), open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([[combination.indices, [combination.energy, combination.protein, combination.fat,
+                                                  combination.carbs]] for combination in result], f)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            # 읽기 전용 환경 등에서는 메모리 캐시만 사용합니다.
+            print(f"결과 캐시를 저장하지 못했습니다: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _evict_disk(self) -> None:
+        """디스크 캐시가 max_disk_bytes를 넘으면 오래 쓰지 않은 파일부터 지웁니다."""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,34 @@
+from typing import Dict, Optional
+
+from services.deadline import Deadline
+
+
+class SearchContext:
+    """
+    요청 하나의 탐색 상태입니다.
+    서비스 인스턴스는 카탈로그/색인 같은 읽기 전용 데이터만 들고 요청마다 바뀌는 값은 여기에 두므로,
+    서비스 객체 하나를 여러 스레드의 요청이 함께 써도 됩니다.
+
+    Args:
+        deadline(Deadline): 탐색 시간 제한 (만든 시점부터)
+        seed(int | None): 이 요청의 난수 생성기 seed (알고리즘이 요청마다 생성기를 만듦)
+        stats(dict): 실행 통계 (찾은 개수, satisfied, timed_out, 알고리즘별 작업량)
+            호출자가 넘긴 dict를 그대로 채우므로, 생성기를 다 읽은 뒤 호출자가 읽을 수 있습니다.
+    """
+    __slots__ = ('deadline', 'seed', 'stats')
+
+    def __init__(self, time_limit: Optional[float] = None, seed: Optional[int] = None,
+                 stats: Optional[Dict] = None):
+        self.deadline = Deadline(time_limit)
+        self.seed = seed
+        self.stats = stats if stats is not None else {}
+
+    @property
+    def time_limit(self) -> Optional[float]:
+        return self.deadline.time_limit
+
+    def finish(self, **stats) -> Dict:
+        """실행 통계를 확정하고 반환합니다. (호출자와 공유하는 dict의 내용을 바꿔 씀)"""
+        self.stats.clear()
+        self.stats.update(stats)
+        return self.stats